@@ -1,7 +1,12 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
+import pandas as pd
 import os
+import time
+from datetime import datetime, timedelta
+
+from src.live_progress import SOURCES, LiveProgress
+from src.report_store import ReportIndex, kpis, read_store, store_file
 
 # --- KONFIGURASI HALAMAN ---
 st.set_page_config(page_title="Bali Demand Forecaster", page_icon="🌴", layout="wide")
@@ -12,63 +17,153 @@ st.markdown("### AI-Powered Prediction for Inventory Management")
 st.markdown("---")
 
 # --- LOAD DATA ---
-# Ganti nama file ini sesuai nama file output Excel Anda yang terakhir
-FILE_PATH = 'Bali_Smart_Forecast.xlsx' 
+# Store ditulis oleh forecaster setiap export (python src/cli.py export)
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STORE_DIR = os.path.join(BASE_DIR, 'data', 'output', 'dashboard')
+TABLE_ROWS = 1000  # Baris yang ditampilkan di tabel (download tetap semua baris terfilter)
+LIVE_INTERVALS = [2, 5, 10, 30, 60]  # Detik antar refresh di mode live
+
+STATUS_COLORS = {
+    '🔥 HIGH DEMAND': '#FF4B4B',
+    '➡️ STABLE': '#FFA500',
+    '❄️ LOW DEMAND': '#00B4D8',
+    '💤 LOW VOLUME': '#A0A0A0',
+    'UNKNOWN': '#D3D3D3',
+    '🟢 HIGH SUPPLY': '#2ECC71',
+    '🟡 MEDIUM SUPPLY': '#F1C40F',
+    '🔴 LOW SUPPLY (SCARCITY)': '#FF4B4B',
+    '⚫ SOLD OUT': '#555555',
+    '❌ ERROR/BLOCKED': '#A0A0A0',
+}
+
+
+def format_eta(seconds):
+    if seconds is None:
+        return "-"
+    return str(timedelta(seconds=int(seconds)))
+
+
+def live_view():
+    """
+    Progress run yang sedang jalan, langsung dari checkpoint JSONL.
+    Offset baca + agregat disimpan di session_state: tiap refresh hanya
+    membaca baris baru (bukan seluruh report).
+    """
+    source = SOURCES[st.sidebar.radio("Sumber:", list(SOURCES))]
+    interval = st.sidebar.select_slider("Refresh tiap (detik):", LIVE_INTERVALS, value=5)
+    auto = st.sidebar.checkbox("Auto refresh", value=True)
+
+    state_key = f"live_{source.name}"
+    reread = st.sidebar.button("🔁 Baca ulang dari awal")
+    if reread or state_key not in st.session_state:
+        st.session_state[state_key] = LiveProgress(source)
+    live = st.session_state[state_key]
+
+    started = time.perf_counter()
+    new_rows = live.refresh()
+    refresh_ms = (time.perf_counter() - started) * 1000
+
+    if not live.done:
+        st.info(f"Belum ada progress di '{live.tail.path}'. Jalankan forecaster / OTA scraper dulu.")
+    else:
+        total, rate = live.total, live.rate()
+        st.sidebar.caption(f"+{new_rows:,} rows | refresh {refresh_ms:.0f} ms | offset {live.tail.offset:,} B")
+        if total:
+            st.progress(min(live.done / total, 1.0), text=f"{live.done:,} / {total:,} ({live.done / total:.1%})")
+
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Rows Done", f"{live.done:,}", delta=f"+{new_rows:,}" if new_rows else None)
+        col2.metric("Throughput", f"{rate * 60:,.1f} rows/min")
+        col3.metric("ETA", format_eta(live.eta()) if total and live.done < total else "✅ Done")
+        col4.metric(f"Avg. {source.value_col}", f"{live.average():,.1f}")
+
+        col_chart1, col_chart2 = st.columns([2, 1])
+        with col_chart1:
+            st.subheader(f"📈 Top {source.value_col}")
+            top = pd.DataFrame(live.top_rows())
+            if not top.empty:
+                top['Label'] = top[list(source.label_cols)].astype(str).agg(' | '.join, axis=1)
+                fig_bar = px.bar(top, x='Label', y=source.value_col, color=source.status_col,
+                                 color_discrete_map=STATUS_COLORS)
+                st.plotly_chart(fig_bar, use_container_width=True)
+
+        with col_chart2:
+            st.subheader("📊 Status")
+            counts = dict(live.status_counts)
+            fig_pie = px.pie(names=list(counts), values=list(counts.values()), hole=0.4,
+                             color=list(counts), color_discrete_map=STATUS_COLORS)
+            st.plotly_chart(fig_pie, use_container_width=True)
+
+        st.subheader("🕒 Progress")
+        samples = pd.DataFrame(list(live.samples), columns=['Time', 'Rows Done'])
+        samples['Time'] = pd.to_datetime(samples['Time'], unit='s')
+        st.line_chart(samples, x='Time', y='Rows Done')
+
+        st.subheader("📋 Latest Rows")
+        st.dataframe(pd.DataFrame(list(live.recent)[::-1]), use_container_width=True, hide_index=True)
+
+    if auto:
+        time.sleep(interval)
+        st.rerun()
+
+
+# --- MODE ---
+mode = st.sidebar.radio("Mode:", ["📊 Report", "📡 Live Progress"])
+if mode == "📡 Live Progress":
+    live_view()
+    st.stop()
+
 
-@st.cache_data
-def load_data():
-    if os.path.exists(FILE_PATH):
-        df = pd.read_excel(FILE_PATH)
-        return df
-    return None
+@st.cache_resource(max_entries=2)
+def load_store(path, mtime):
+    """Cache per mtime: export baru -> otomatis dibaca ulang. Tanpa copy per interaksi."""
+    df, aggs = read_store(os.path.dirname(path))
+    return df, aggs, ReportIndex(df)
 
-df = load_data()
 
-if df is None:
-    st.error(f"File '{FILE_PATH}' tidak ditemukan! Pastikan file Excel ada di folder yang sama.")
+path = store_file(STORE_DIR)
+if path is None:
+    st.error(f"Belum ada data di '{STORE_DIR}'. Jalankan `python src/cli.py fetch` (atau `export`) dulu.")
     st.stop()
 
+mtime = os.path.getmtime(path)
+df, aggs, index = load_store(path, mtime)
+
 # --- SIDEBAR (FILTER) ---
 st.sidebar.header("🔍 Filter Options")
+st.sidebar.caption(f"{aggs['rows']:,} rows | exported {datetime.fromtimestamp(mtime):%Y-%m-%d %H:%M}")
 
-# Filter Wilayah
-all_districts = ["All"] + sorted(df['District'].unique().tolist())
-selected_district = st.sidebar.selectbox("Pilih Wilayah (District):", all_districts)
 
-# Filter Kategori Service
-all_services = ["All"] + sorted(df['Service'].unique().tolist())
-selected_service = st.sidebar.selectbox("Pilih Layanan (Service):", all_services)
+def pick(label, col):
+    choice = st.sidebar.selectbox(label, ["All"] + index.values(col))
+    return None if choice == "All" else choice
 
-# Filter Status Demand
-all_status = ["All"] + sorted(df['Status'].unique().tolist())
-selected_status = st.sidebar.selectbox("Filter Status:", all_status)
 
-# --- FILTER LOGIC ---
-df_filtered = df.copy()
+selected_district = pick("Pilih Wilayah (District):", 'District')
+selected_service = pick("Pilih Layanan (Service):", 'Service Category')
+selected_status = pick("Filter Status:", 'Market Status')
 
-if selected_district != "All":
-    df_filtered = df_filtered[df_filtered['District'] == selected_district]
-
-if selected_service != "All":
-    df_filtered = df_filtered[df_filtered['Service'] == selected_service]
-
-if selected_status != "All":
-    df_filtered = df_filtered[df_filtered['Status'] == selected_status]
+# --- FILTER LOGIC (posisi baris, tanpa copy DataFrame) ---
+positions = index.select(**{
+    'District': selected_district,
+    'Service Category': selected_service,
+    'Market Status': selected_status,
+})
+n_rows, avg_growth, hot_items, status_counts = kpis(
+    aggs, df, positions, selected_district, selected_service, selected_status
+)
 
 # --- MAIN DASHBOARD (KPI) ---
 col1, col2, col3 = st.columns(3)
 
 with col1:
-    st.metric("Total Items Analyzed", len(df_filtered))
+    st.metric("Total Items Analyzed", f"{n_rows:,}")
 
 with col2:
-    # Hitung rata-rata pertumbuhan
-    avg_growth = df_filtered['Growth Forecast %'].mean()
+    # Rata-rata pertumbuhan (dari agregat yang dihitung saat export)
     st.metric("Avg. Market Growth", f"{avg_growth:.1f}%", delta_color="normal")
 
 with col3:
-    # Hitung item yang HOT
-    hot_items = len(df_filtered[df_filtered['Status'] == '🔥 HOT'])
     st.metric("High Demand Opportunities", hot_items, delta=f"{hot_items} Items")
 
 st.markdown("---")
@@ -78,15 +173,15 @@ col_chart1, col_chart2 = st.columns([2, 1])
 
 with col_chart1:
     st.subheader("📈 Top Growth Opportunities")
-    # Bar Chart untuk Growth tertinggi
-    top_growth = df_filtered.sort_values(by='Growth Forecast %', ascending=False).head(10)
+    # Baris sudah urut growth tertinggi -> top 10 = 10 posisi pertama
+    top_growth = df.iloc[positions[:10]]
     if not top_growth.empty:
         fig_bar = px.bar(
-            top_growth, 
-            x='Search Keyword', 
-            y='Growth Forecast %',
-            color='Status',
-            color_discrete_map={'🔥 HOT': '#FF4B4B', '➡️ STABLE': '#FFA500', '❄️ COLD': '#00B4D8'},
+            top_growth,
+            x='Search Keyword',
+            y='Growth %',
+            color='Market Status',
+            color_discrete_map=STATUS_COLORS,
             title="Top 10 Highest Predicted Demand (Next Month)"
         )
         st.plotly_chart(fig_bar, use_container_width=True)
@@ -95,37 +190,41 @@ with col_chart1:
 
 with col_chart2:
     st.subheader("📊 Demand Distribution")
-    # Pie Chart
-    if not df_filtered.empty:
-        status_counts = df_filtered['Status'].value_counts().reset_index()
-        status_counts.columns = ['Status', 'Count']
+    if status_counts:
         fig_pie = px.pie(
-            status_counts, 
-            values='Count', 
-            names='Status', 
+            names=list(status_counts),
+            values=list(status_counts.values()),
             hole=0.4,
-            color='Status',
-            color_discrete_map={'🔥 HOT': '#FF4B4B', '➡️ STABLE': '#FFA500', '❄️ COLD': '#00B4D8'}
+            color=list(status_counts),
+            color_discrete_map=STATUS_COLORS
         )
         st.plotly_chart(fig_pie, use_container_width=True)
 
 # --- DATA TABLE ---
 st.subheader("📋 Detailed Data View")
+if n_rows > TABLE_ROWS:
+    st.caption(f"Showing the top {TABLE_ROWS:,} of {n_rows:,} rows by growth. Download for the full list.")
 st.dataframe(
-    df_filtered[['District', 'Service', 'Growth Forecast %', 'Status', 'Action Plan', 'Data Source']],
+    df.iloc[positions[:TABLE_ROWS]][['District', 'Service Category', 'Growth %', 'Market Status',
+                                     'Recommended Action', 'Data Source']
+                                    + [c for c in ('Model', 'sMAPE %') if c in df.columns]],  # Setelah --backtest
     use_container_width=True,
     hide_index=True
 )
 
-# Tombol Download
-@st.cache_data
-def convert_df(df):
-    return df.to_csv(index=False).encode('utf-8')
-
-csv = convert_df(df_filtered)
-st.download_button(
-    label="📥 Download Filtered Data as CSV",
-    data=csv,
-    file_name='filtered_forecast.csv',
-    mime='text/csv',
-)
\ No newline at end of file
+
+# Tombol Download (CSV dibuat hanya kalau diminta, di-cache per filter + versi file)
+@st.cache_data(max_entries=8)
+def filtered_csv(path, mtime, district, service, status):
+    df, _, index = load_store(path, mtime)
+    rows = index.select(**{'District': district, 'Service Category': service, 'Market Status': status})
+    return df.iloc[rows].to_csv(index=False).encode('utf-8')
+
+
+if st.button("📦 Prepare CSV"):
+    st.download_button(
+        label="📥 Download Filtered Data as CSV",
+        data=filtered_csv(path, mtime, selected_district, selected_service, selected_status),
+        file_name='filtered_forecast.csv',
+        mime='text/csv',
+    )
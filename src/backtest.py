@@ -0,0 +1,330 @@
+"""
+Rolling-origin backtest + model selection for every series of the cube.
+
+Candidates (all vectorized across series):
+    holt            additive trend (same engine as the report)
+    damped          Holt with a damped trend (phi picked per series on SSE)
+    holt_winters    additive seasonal Holt-Winters, needs 2 full seasons of history
+    seasonal_naive  same month last year
+
+Each series is cut at FOLDS origins, every candidate forecasts `horizon`
+months ahead from each cut, and the one with the lowest sMAPE (or MAPE) is
+picked and refit on the full history. Blocks of districts go to a process pool.
+
+    python src/backtest.py [--workers 8] [--out backtest.csv]
+"""
+import argparse
+import os
+import sys
+import time
+import warnings
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+if __package__ in (None, ""):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.batch_forecast import (MIN_POINTS, STATUS_LABELS, STATUS_NO_DATA, STATUS_OK, growth_pct,
+                                holt_forecast_batch)
+from src.series_cube import ACTIONS, MARKET_STATUS, SOURCE_LABELS, SeriesCube, classify, monthly_means
+
+MODELS = ("holt", "damped", "holt_winters", "seasonal_naive")  # Order = tie-break (holt is the default)
+SEASON = 12            # Months per season
+FOLDS = 3              # Rolling origins per series
+HORIZON = 2            # Months ahead, same as the report's forecast
+HISTORY_MONTHS = 36    # Most recent months used (3 seasons)
+SELECT_BY = "smape"    # or "mape"
+
+PHI_GRID = (0.8, 0.9, 0.98)
+HW_ALPHAS = np.array([0.1, 0.3, 0.5, 0.7, 0.9])
+HW_BETAS = np.array([0.0, 0.05, 0.2])
+HW_GAMMAS = np.array([0.05, 0.2, 0.5])
+
+BacktestResult = namedtuple("BacktestResult", ["model", "mape", "smape", "forecast", "growth", "status"])
+
+
+def _ffill(Y):
+    """Forward-fills internal gaps (leading NaNs stay NaN), like holt_forecast_batch."""
+    Y = np.array(Y, dtype=np.float64, ndmin=2)
+    for t in range(1, Y.shape[1]):
+        gap = np.isnan(Y[:, t])
+        Y[gap, t] = Y[gap, t - 1]
+    return Y
+
+
+def _start(Y):
+    valid = ~np.isnan(Y)
+    return np.where(valid.any(axis=1), valid.argmax(axis=1), Y.shape[1]), valid.sum(axis=1)
+
+
+def _holt(Y, horizon, phi=1.0):
+    """
+    holt_forecast_batch per group of rows sharing a start month, leading NaN
+    columns cut off: same result per row, but every group takes the fast
+    uniform-start path. Returns (forecast, sse, status).
+    """
+    start, _ = _start(Y)
+    forecast = np.full(len(Y), np.nan)
+    sse = np.full(len(Y), np.inf)
+    status = np.full(len(Y), STATUS_NO_DATA, dtype=np.int8)
+    for first in np.unique(start[start < Y.shape[1]]):
+        rows = np.flatnonzero(start == first)
+        result = holt_forecast_batch(Y[rows, first:], horizon=horizon, phi=phi)
+        ok = result.status == STATUS_OK
+        forecast[rows[ok]] = result.forecast[ok]
+        sse[rows[ok]] = result.sse[ok]
+        status[rows] = result.status
+    return forecast, sse, status
+
+
+def holt_forecast(Y, horizon):
+    return _holt(Y, horizon)[0]
+
+
+def damped_forecast(Y, horizon, phis=PHI_GRID):
+    """Damped-trend Holt, phi per series picked on in-sample SSE."""
+    best_sse = np.full(len(Y), np.inf)
+    forecast = np.full(len(Y), np.nan)
+    for phi in phis:
+        predicted, sse, _ = _holt(Y, horizon, phi)
+        better = sse < best_sse
+        best_sse[better] = sse[better]
+        forecast[better] = predicted[better]
+    return forecast
+
+
+def seasonal_naive_forecast(Y, horizon, period=SEASON):
+    """Value of the same month one season earlier (NaN if history is too short)."""
+    Y = _ffill(Y)
+    lag = Y.shape[1] - 1 + horizon - period * -(-horizon // period)
+    if lag < 0:
+        return np.full(len(Y), np.nan)
+    return Y[:, lag]
+
+
+def holt_winters_forecast(Y, horizon, period=SEASON, alphas=HW_ALPHAS, betas=HW_BETAS, gammas=HW_GAMMAS):
+    """
+    Additive Holt-Winters for every row with 2+ full seasons (NaN otherwise).
+    Level/trend/seasonals start from the first two seasons of each row; the
+    smoothing parameters are picked per row from a fixed grid on one-step SSE.
+    """
+    Y = _ffill(Y)
+    n_series, n_obs = Y.shape
+    start, n_valid = _start(Y)
+    eligible = np.flatnonzero(n_valid >= 2 * period)
+    forecast = np.full(n_series, np.nan)
+    if not len(eligible):
+        return forecast
+
+    Y, start = Y[eligible], start[eligible]
+    rows = np.arange(len(eligible))
+    first = Y[rows[:, None], start[:, None] + np.arange(period)]
+    second = Y[rows[:, None], start[:, None] + period + np.arange(period)]
+
+    alpha, beta, gamma = (m.ravel()[None, :] for m in np.meshgrid(alphas, betas, gammas, indexing="ij"))
+    n_params = alpha.shape[1]
+    level = np.repeat(first.mean(axis=1, keepdims=True), n_params, axis=1)
+    trend = np.repeat((second.mean(axis=1, keepdims=True) - level[:, :1]) / period, n_params, axis=1)
+    season = np.repeat((first - level[:, :1])[:, None, :], n_params, axis=1)  # rows x params x period
+    sse = np.zeros_like(level)
+
+    for t in range(n_obs):
+        active = (t >= start + period)[:, None]
+        if not active.any():
+            continue
+        phase = (t - start) % period
+        y = np.nan_to_num(Y[:, t])[:, None]
+        s = season[rows, :, phase]
+
+        err = y - (level + trend + s)
+        new_level = alpha * (y - s) + (1 - alpha) * (level + trend)
+        new_trend = beta * (new_level - level) + (1 - beta) * trend
+        new_season = gamma * (y - new_level) + (1 - gamma) * s
+
+        sse += np.where(active, err * err, 0.0)
+        level = np.where(active, new_level, level)
+        trend = np.where(active, new_trend, trend)
+        season[rows, :, phase] = np.where(active, new_season, s)
+
+    best = sse.argmin(axis=1)
+    phase = (n_obs - 1 + horizon - start) % period
+    forecast[eligible] = level[rows, best] + horizon * trend[rows, best] + season[rows, best, phase]
+    return forecast
+
+
+CANDIDATES = {
+    "holt": holt_forecast,
+    "damped": damped_forecast,
+    "holt_winters": holt_winters_forecast,
+    "seasonal_naive": seasonal_naive_forecast,
+}
+
+
+def backtest_matrix(Y, horizon=HORIZON, folds=FOLDS, select_by=SELECT_BY, models=MODELS):
+    """
+    Backtest + selection for every row of Y (series x months, left-padded with NaN).
+    A model only competes on a series if it produced a forecast at every origin
+    with a known actual; rows where no model qualifies keep holt.
+    """
+    Y = np.array(Y, dtype=np.float64, ndmin=2)
+    n_series, n_obs = Y.shape
+    n_models = len(models)
+    ape = np.full((n_series, n_models, folds), np.nan)
+    sape = np.full((n_series, n_models, folds), np.nan)
+    missing = np.zeros((n_series, n_models), dtype=bool)
+
+    for k in range(folds):
+        target = n_obs - 1 - k
+        origin = target - horizon + 1
+        if origin < MIN_POINTS:
+            break
+        actual = Y[:, target]
+        known = ~np.isnan(actual)
+        for m, name in enumerate(models):
+            predicted = CANDIDATES[name](Y[:, :origin], horizon)
+            missing[:, m] |= known & np.isnan(predicted)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                diff = np.abs(actual - predicted)
+                ape[:, m, k] = np.where(actual != 0, diff / np.abs(actual), np.nan)
+                denom = np.abs(actual) + np.abs(predicted)
+                sape[:, m, k] = np.where(denom > 0, 2 * diff / denom, 0.0)
+            sape[~known | np.isnan(predicted), m, k] = np.nan
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        mape = np.nanmean(ape, axis=2) * 100
+        smape = np.nanmean(sape, axis=2) * 100
+    mape[missing] = np.nan
+    smape[missing] = np.nan
+
+    score = np.where(np.isnan(smape if select_by == "smape" else mape), np.inf,
+                     smape if select_by == "smape" else mape)
+    model = score.argmin(axis=1)
+    model[np.isinf(score).all(axis=1)] = 0
+
+    # Final forecast: selected model refit on the full history
+    forecast, _, status = _holt(Y, horizon)
+    for m, name in enumerate(models):
+        rows = np.flatnonzero((model == m) & (status == STATUS_OK))
+        if m == 0 or not len(rows):
+            continue
+        predicted = CANDIDATES[name](Y[rows], horizon)
+        ok = np.isfinite(predicted)
+        forecast[rows[ok]] = predicted[ok]
+        model[rows[~ok]] = 0
+    model[status != STATUS_OK] = 0
+    forecast = np.where(status == STATUS_OK, forecast, 0.0)
+    growth = np.where(status == STATUS_OK, growth_pct(forecast, np.nan_to_num(_ffill(Y)[:, -1])), 0.0)
+    return BacktestResult(model, mape, smape, forecast, growth, status)
+
+
+def _backtest_block(task):
+    """One block of cube districts (runs in a worker process)."""
+    path, lo, hi, horizon, folds, select_by = task
+    cube = SeriesCube(path)
+    rows, cols = np.nonzero(np.asarray(cube.mask[lo:hi]))
+    if not len(rows):
+        return lo + rows, cols, None
+    values = np.asarray(cube.values[lo:hi], dtype=np.float64)[rows, cols]
+    monthly, _ = monthly_means(values, cube.weeks)
+    # Drop the incomplete current month (like SeriesCube.forecast), keep the recent seasons
+    monthly = monthly[:, :-1][:, -HISTORY_MONTHS:]
+    return lo + rows, cols, backtest_matrix(monthly, horizon, folds, select_by)
+
+
+def run_backtest(path, workers=None, horizon=HORIZON, folds=FOLDS, select_by=SELECT_BY):
+    """Backtests every stored cell of the cube at path -> one report row per cell."""
+    cube = SeriesCube(path)
+    n_districts = len(cube.districts)
+    tasks = [(path, lo, min(n_districts, lo + SeriesCube.BLOCK), horizon, folds, select_by)
+             for lo in range(0, n_districts, SeriesCube.BLOCK)]
+    workers = workers or os.cpu_count() or 1
+
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            blocks = list(pool.map(_backtest_block, tasks))
+    else:
+        blocks = [_backtest_block(task) for task in tasks]
+    return backtest_report(cube, [block for block in blocks if block[2] is not None])
+
+
+def backtest_report(cube, blocks):
+    """Rows of every block -> report frame (selected model, its errors, per-model sMAPE)."""
+    columns = ['District', 'Service Category', 'Data Source', 'Model', 'MAPE %', 'sMAPE %',
+               'Forecast Index', 'Growth %', 'Market Status', 'Recommended Action', 'Forecast Status']
+    if not blocks:
+        return pd.DataFrame(columns=columns + [f"sMAPE % {name}" for name in MODELS])
+
+    rows = np.concatenate([b[0] for b in blocks])
+    cols = np.concatenate([b[1] for b in blocks])
+    result = BacktestResult(*(np.concatenate([getattr(b[2], f) for b in blocks]) for f in BacktestResult._fields))
+    picked = np.arange(len(rows))
+    ok = result.status == STATUS_OK
+    market = classify(result.growth)
+
+    df = pd.DataFrame({
+        'District': np.array([name for _, name in cube.districts], dtype=object)[rows],
+        'Service Category': np.array([name for _, name in cube.services], dtype=object)[cols],
+        'Data Source': [SOURCE_LABELS[s] for s in np.asarray(cube.mask)[rows, cols]],
+        'Model': np.array(MODELS)[result.model],
+        'MAPE %': np.round(result.mape[picked, result.model], 1),
+        'sMAPE %': np.round(result.smape[picked, result.model], 1),
+        'Forecast Index': np.where(ok, np.round(result.forecast, 1), 0),
+        'Growth %': np.where(ok, np.round(result.growth, 1), 0),
+        'Market Status': np.where(ok, MARKET_STATUS[market], "UNKNOWN"),
+        'Recommended Action': np.where(ok, ACTIONS[market], "Check"),
+        'Forecast Status': [STATUS_LABELS[s] for s in result.status],
+    })
+    for m, name in enumerate(MODELS):
+        df[f"sMAPE % {name}"] = np.round(result.smape[:, m], 1)
+    return df
+
+
+def apply_selection(report, backtest):
+    """
+    Report rows with the backtest's selected-model forecast (cells it covers
+    with an OK forecast) plus its Model / MAPE % / sMAPE % columns.
+    """
+    keys = ['District', 'Service Category']
+    picked = backtest[keys + ['Model', 'MAPE %', 'sMAPE %', 'Forecast Index', 'Growth %', 'Market Status',
+                              'Recommended Action', 'Forecast Status']]
+    merged = report.merge(picked, on=keys, how='left', suffixes=('', ' (backtest)'))
+    use = (merged['Forecast Status (backtest)'] == STATUS_LABELS[STATUS_OK]).to_numpy()
+    for col in ['Forecast Index', 'Growth %', 'Market Status', 'Recommended Action']:
+        merged.loc[use, col] = merged.loc[use, f"{col} (backtest)"]
+    merged['Model'] = merged['Model'].where(use, "-")
+    return merged.drop(columns=[c for c in merged.columns if c.endswith(' (backtest)')])
+
+
+def summary(df):
+    if df.empty:
+        return "🧪 Backtest: no stored series."
+    counts = df['Model'].value_counts()
+    parts = [f"{name} {counts.get(name, 0)}" for name in MODELS]
+    return (f"🧪 Backtest: {len(df)} series | " + ", ".join(parts)
+            + f" | median sMAPE {df['sMAPE %'].median():.1f}%, MAPE {df['MAPE %'].median():.1f}%")
+
+
+if __name__ == "__main__":
+    BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description="Rolling-origin backtest + model selection over the series cube")
+    parser.add_argument("--path", default=os.path.join(BASE_DIR, 'data', 'cache', 'series_cube'))
+    parser.add_argument("--out", default=os.path.join(BASE_DIR, 'data', 'output', 'backtest.csv'))
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--folds", type=int, default=FOLDS)
+    parser.add_argument("--horizon", type=int, default=HORIZON)
+    parser.add_argument("--select-by", choices=["smape", "mape"], default=SELECT_BY)
+    args = parser.parse_args()
+
+    if not os.path.exists(os.path.join(args.path, "index.json")):
+        print(f"⚠️ No cube at {args.path}. Run the forecaster first.")
+        sys.exit(1)
+    started = time.perf_counter()
+    df = run_backtest(args.path, args.workers, args.horizon, args.folds, args.select_by)
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    df.to_csv(args.out, index=False)
+    print(summary(df))
+    print(f"✅ {args.out} ({time.perf_counter() - started:.1f}s)")
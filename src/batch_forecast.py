@@ -0,0 +1,291 @@
+import warnings
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+# --- PER-SERIES STATUS CODES ---
+STATUS_OK = 0
+STATUS_TOO_SHORT = 1   # Less than MIN_POINTS usable months
+STATUS_NO_DATA = 2     # Series is empty / all NaN
+STATUS_FIT_ERROR = 3   # Fit produced a non-finite forecast
+
+STATUS_LABELS = {
+    STATUS_OK: "OK",
+    STATUS_TOO_SHORT: "TOO_SHORT",
+    STATUS_NO_DATA: "NO_DATA",
+    STATUS_FIT_ERROR: "FIT_ERROR",
+}
+
+MIN_POINTS = 3
+
+# Parameter search grid (evaluated for all series at once).
+# Like statsmodels, the trend smoothing is bounded by the level smoothing.
+# Coarse grid first, then two finer passes around each series' best pair.
+ALPHA_GRID = np.round(np.linspace(0.1, 1.0, 10), 2)
+BETA_GRID = np.round(np.linspace(0.0, 1.0, 11), 2)
+REFINE_STEPS = 2
+
+HoltResult = namedtuple(
+    "HoltResult",
+    ["forecast", "growth", "avg_volume", "status", "alpha", "beta", "level", "trend", "sse"],
+)
+
+
+def _param_grid(alphas, betas):
+    a, b = np.meshgrid(alphas, betas, indexing="ij")
+    keep = b <= a
+    return a[keep].astype(np.float64), b[keep].astype(np.float64)
+
+
+def growth_pct(next_val, curr_val):
+    """Same growth rule as the original per-series path (vectorized)."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        growth = (next_val - curr_val) / curr_val * 100
+    flat = np.where(next_val > 0.1, 100.0, 0.0)
+    return np.where(curr_val == 0, flat, growth)
+
+
+def _holt_pass(Y, start, alpha, beta, phi=1.0):
+    """
+    Runs the Holt recursion for all series x parameter pairs (phi < 1: damped trend).
+    The recursion is linear in the initial state (l0, b0), so the data-driven
+    part and the unit responses to l0/b0 are tracked separately and the
+    SSE-optimal initial state is solved in closed form (2x2 least squares),
+    like statsmodels' "estimated" initialisation.
+    """
+    n_series, n_obs = Y.shape
+    shape = np.broadcast(np.empty((n_series, 1)), alpha).shape
+
+    # Same start for every row (the usual case): the unit responses do not
+    # depend on the data, so they only need the parameter axis.
+    uniform = bool((start == start[0]).all())
+    unit_shape = np.shape(alpha) if uniform else shape
+
+    # [data part, response to l0 = 1, response to b0 = 1]
+    level = [np.zeros(shape), np.ones(unit_shape), np.zeros(unit_shape)]
+    trend = [np.zeros(shape), np.zeros(unit_shape), np.ones(unit_shape)]
+
+    s_ll = np.zeros(unit_shape)
+    s_lb = np.zeros(unit_shape)
+    s_bb = np.zeros(unit_shape)
+    s_lr = np.zeros(shape)
+    s_br = np.zeros(shape)
+    s_rr = np.zeros(shape)
+
+    for t in range(n_obs):
+        if uniform:
+            if start[0] > t:
+                continue
+            active = True
+        else:
+            active = (start <= t)[:, None]
+        y = np.nan_to_num(Y[:, t])[:, None]
+
+        pred = [level[k] + phi * trend[k] for k in range(3)]
+        r = y - pred[0]
+        p_l, p_b = pred[1], pred[2]
+
+        if active is True:
+            s_ll += p_l * p_l
+            s_lb += p_l * p_b
+            s_bb += p_b * p_b
+            s_lr += p_l * r
+            s_br += p_b * r
+            s_rr += r * r
+        else:
+            s_ll += np.where(active, p_l * p_l, 0.0)
+            s_lb += np.where(active, p_l * p_b, 0.0)
+            s_bb += np.where(active, p_b * p_b, 0.0)
+            s_lr += np.where(active, p_l * r, 0.0)
+            s_br += np.where(active, p_b * r, 0.0)
+            s_rr += np.where(active, r * r, 0.0)
+
+        for k in range(3):
+            new_level = (1 - alpha) * pred[k]
+            if k == 0:
+                new_level += alpha * y
+            new_trend = beta * (new_level - level[k]) + (1 - beta) * phi * trend[k]
+            if active is True:
+                level[k], trend[k] = new_level, new_trend
+            else:
+                level[k] = np.where(active, new_level, level[k])
+                trend[k] = np.where(active, new_trend, trend[k])
+
+    det = s_ll * s_bb - s_lb ** 2
+    ok = np.abs(det) > 1e-9
+    safe_det = np.where(ok, det, 1.0)
+    l0 = np.where(ok, (s_bb * s_lr - s_lb * s_br) / safe_det, 0.0)
+    b0 = np.where(ok, (s_ll * s_br - s_lb * s_lr) / safe_det, 0.0)
+
+    # Singular system (e.g. alpha = 1): fall back to l0 = first observation
+    first = np.nan_to_num(Y[np.arange(n_series), np.minimum(start, n_obs - 1)])[:, None]
+    l0 = np.where(ok, l0, first)
+
+    sse = (s_rr - 2 * l0 * s_lr - 2 * b0 * s_br
+           + l0 * l0 * s_ll + 2 * l0 * b0 * s_lb + b0 * b0 * s_bb)
+    final_level = level[0] + l0 * level[1] + b0 * level[2]
+    final_trend = trend[0] + l0 * trend[1] + b0 * trend[2]
+    return np.maximum(sse, 0.0), final_level, final_trend
+
+
+def holt_forecast_batch(Y, horizon=2, min_points=MIN_POINTS, alphas=ALPHA_GRID, betas=BETA_GRID,
+                        refine_steps=REFINE_STEPS, phi=1.0):
+    """
+    Holt additive-trend smoothing for every row of Y (series x months) at once.
+    Rows may be left-padded with NaN; internal gaps are forward-filled.
+    alpha/beta are picked per row on one-step-ahead SSE: a coarse grid shared by
+    all rows, then finer grids around each row's best pair. phi < 1 damps the
+    trend (fixed, not searched).
+    """
+    Y = np.array(Y, dtype=np.float64, ndmin=2)
+    n_series, n_obs = Y.shape
+
+    # Forward-fill internal gaps (leading NaNs stay NaN)
+    for t in range(1, n_obs):
+        gap = np.isnan(Y[:, t])
+        Y[gap, t] = Y[gap, t - 1]
+
+    valid = ~np.isnan(Y)
+    n_valid = valid.sum(axis=1)
+    start = np.where(n_valid > 0, valid.argmax(axis=1), n_obs)
+
+    status = np.full(n_series, STATUS_OK, dtype=np.int8)
+    status[n_valid < min_points] = STATUS_TOO_SHORT
+    status[n_valid == 0] = STATUS_NO_DATA
+
+    rows = np.arange(n_series)
+
+    # 1. Coarse grid (same pairs for every series)
+    alpha, beta = _param_grid(alphas, betas)
+    alpha, beta = alpha[None, :], beta[None, :]
+    sse, level, trend = _holt_pass(Y, start, alpha, beta, phi)
+    best = sse.argmin(axis=1)
+    best_alpha = alpha[0, best] if alpha.shape[0] == 1 else alpha[rows, best]
+    best_beta = beta[0, best] if beta.shape[0] == 1 else beta[rows, best]
+
+    # 2. Finer grids around each series' best pair (step halves every pass)
+    step_a = alphas[1] - alphas[0] if len(alphas) > 1 else 0.1
+    step_b = betas[1] - betas[0] if len(betas) > 1 else 0.1
+    offsets = np.array([-1.0, -0.5, 0.0, 0.5, 1.0])
+    for _ in range(refine_steps):
+        da, db = [m.ravel() for m in np.meshgrid(offsets * step_a, offsets * step_b, indexing="ij")]
+        alpha = np.clip(best_alpha[:, None] + da[None, :], 0.0, 1.0)
+        beta = np.minimum(np.clip(best_beta[:, None] + db[None, :], 0.0, 1.0), alpha)
+
+        sse, level, trend = _holt_pass(Y, start, alpha, beta, phi)
+        best = sse.argmin(axis=1)
+        best_alpha, best_beta = alpha[rows, best], beta[rows, best]
+        step_a, step_b = step_a / 2, step_b / 2
+
+    level = level[rows, best]
+    trend = trend[rows, best]
+    forecast = level + trend * (horizon if phi == 1.0 else np.sum(phi ** np.arange(1, horizon + 1)))
+
+    last = Y[:, -1]
+    growth = growth_pct(forecast, np.nan_to_num(last))
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        avg_volume = np.nanmean(Y, axis=1)
+
+    status[(status == STATUS_OK) & ~np.isfinite(forecast)] = STATUS_FIT_ERROR
+    failed = status != STATUS_OK
+    forecast[failed] = 0.0
+    growth[failed] = 0.0
+
+    return HoltResult(
+        forecast=forecast,
+        growth=growth,
+        avg_volume=np.nan_to_num(avg_volume),
+        status=status,
+        alpha=best_alpha,
+        beta=best_beta,
+        level=level,
+        trend=trend,
+        sse=sse[rows, best],
+    )
+
+
+def monthly_frame(frame):
+    """
+    Weekly Trends frame (one column per series) -> monthly means.
+    Returns (clean months used for fitting, average over all months).
+    """
+    monthly = frame.resample("MS").mean()
+    avg_volume = monthly.mean().to_numpy(dtype=np.float64)
+
+    # Drop the incomplete current month (same rule as the per-series path)
+    if len(monthly) and monthly.index[-1].day < 28:
+        monthly = monthly.iloc[:-1]
+
+    return monthly, avg_volume
+
+
+def to_monthly(frame):
+    """Same as monthly_frame, as a (series x months) matrix."""
+    monthly, avg_volume = monthly_frame(frame)
+    return monthly.to_numpy(dtype=np.float64).T, avg_volume
+
+
+def forecast_frame(frame, horizon=2):
+    """Forecasts every column of a Trends frame in one vectorized pass."""
+    frame = frame.drop(columns=["isPartial"], errors="ignore").astype(float)
+    if frame.empty or not len(frame.columns):
+        return HoltResult(*(np.zeros(0) for _ in HoltResult._fields))
+
+    Y, avg_volume = to_monthly(frame)
+    result = holt_forecast_batch(Y, horizon=horizon)
+    return result._replace(avg_volume=np.nan_to_num(avg_volume))
+
+
+def reference_forecast(series, horizon=2):
+    """
+    Original statsmodels path, kept as the reference implementation.
+    Returns (next_val, growth, avg_vol, status).
+    """
+    from statsmodels.tsa.holtwinters import ExponentialSmoothing
+
+    series_monthly = series.resample("MS").mean()
+    if series_monthly.dropna().empty:
+        return 0, 0, 0, STATUS_NO_DATA
+    avg_vol = series_monthly.mean()
+
+    if series_monthly.index[-1].day < 28:
+        series_clean = series_monthly[:-1]
+    else:
+        series_clean = series_monthly
+
+    if len(series_clean) < MIN_POINTS:
+        return 0, 0, avg_vol, STATUS_TOO_SHORT
+
+    try:
+        model = ExponentialSmoothing(series_clean, trend="add", seasonal=None).fit()
+        next_val = model.forecast(horizon).iloc[-1]
+    except Exception:
+        return 0, 0, avg_vol, STATUS_FIT_ERROR
+    if not np.isfinite(next_val):
+        return 0, 0, avg_vol, STATUS_FIT_ERROR
+
+    curr_val = series_clean.iloc[-1]
+    growth = float(growth_pct(np.float64(next_val), np.float64(curr_val)))
+    return next_val, growth, avg_vol, STATUS_OK
+
+
+def compare_with_reference(frame, horizon=2):
+    """Batch engine vs statsmodels, one row per column (for spot checks)."""
+    frame = frame.drop(columns=["isPartial"], errors="ignore").astype(float)
+    batch = forecast_frame(frame, horizon=horizon)
+    rows = []
+    for i, col in enumerate(frame.columns):
+        ref_val, ref_growth, _, ref_status = reference_forecast(frame[col], horizon=horizon)
+        rows.append({
+            "Series": col,
+            "Batch Forecast": batch.forecast[i],
+            "Reference Forecast": ref_val,
+            "Batch Growth %": batch.growth[i],
+            "Reference Growth %": ref_growth,
+            "Batch Status": STATUS_LABELS[int(batch.status[i])],
+            "Reference Status": STATUS_LABELS[ref_status],
+        })
+    return pd.DataFrame(rows)
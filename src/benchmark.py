@@ -0,0 +1,256 @@
+"""
+Offline benchmark: runs the full forecaster sweep and the OTA scraper against
+deterministic fake backends, with every sleep on a simulated clock.
+
+    python src/benchmark.py                          # 1x and 10x the shipped sweep
+    python src/benchmark.py --sizes 1 10 100 --p429 0.02 --sessions 4
+    python src/benchmark.py --compare data/benchmarks/<older run>.json
+
+Each run is written to data/benchmarks/<timestamp>_<commit>.json.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+if __package__ in (None, ""):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import ota_scraper
+from src.fake_ota import FakeOTAServer
+from src.fake_trends import FakeTrendReq
+from src.fetch_pool import TrendsFetchPool, TrendsSession
+from src.forecaster import BaliDemandForecaster
+from src.rate_limiter import AdaptiveRateLimiter
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BASE_DIR, 'data', 'benchmarks')
+
+
+class SimClock:
+    """Virtual monotonic clock: sleep() moves it forward instead of waiting."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.slept = 0.0
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            with self.lock:
+                self.now += seconds
+                self.slept += seconds
+
+    async def async_sleep(self, seconds):
+        # Reservations are handed out in order, so advancing right away keeps
+        # concurrent waiters on the same timeline as the real token bucket
+        self.sleep(seconds)
+        await asyncio.sleep(0)
+
+
+def scale_districts(districts, scale):
+    """`scale` copies of the district list ("Ubud", "Ubud 2", ...); every copy gets its own series."""
+    return [d if k == 0 else f"{d} {k + 1}" for k in range(scale) for d in districts]
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+@contextlib.contextmanager
+def measure():
+    """Real time + peak traced memory of the block."""
+    stats = {}
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    started = time.perf_counter()
+    try:
+        yield stats
+    finally:
+        stats['real_seconds'] = time.perf_counter() - started
+        stats['peak_mb'] = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+
+
+def bench_trends(scale, sessions=1, latency=(0.5, 1.5), p429=0.0, seed=0):
+    """Full forecaster run (cold cache) over `scale` x the shipped districts."""
+    with tempfile.TemporaryDirectory() as work_dir:
+        forecaster = BaliDemandForecaster(work_dir=work_dir)
+        with contextlib.redirect_stdout(io.StringIO()):
+            districts, services = forecaster.load_data()
+        districts = scale_districts(districts, scale)
+        forecaster.load_data = lambda: (districts, services)
+
+        # One simulated clock per session: sessions run in parallel, so the
+        # sweep takes as long as the busiest session
+        clocks = [SimClock() for _ in range(sessions)]
+        clients = []
+
+        def make_session(i):
+            clock = clocks[i]
+
+            def client_factory(proxy):
+                client = FakeTrendReq(latency=latency, p429=p429, seed=seed * 1000 + len(clients), sleep=clock.sleep)
+                clients.append(client)
+                return client
+
+            limiter = AdaptiveRateLimiter(rate_per_min=forecaster.RATE_START, min_rate=forecaster.RATE_MIN,
+                                          max_rate=forecaster.RATE_MAX, clock=clock, sleep=clock.sleep)
+            return TrendsSession(f"sim{i}", f"sim{i}", client_factory, limiter)
+
+        forecaster.pool = TrendsFetchPool([make_session(i) for i in range(sessions)])
+
+        with measure() as stats, contextlib.redirect_stdout(io.StringIO()):
+            forecaster.run()
+
+        pool, models = forecaster.pool, forecaster.models
+        forecasts = models.refits + models.advanced + models.reused
+        simulated = max(c.now for c in clocks)
+        return {
+            'scale': scale,
+            'districts': len(districts),
+            'services': len(services),
+            'cells': len(districts) * len(services),
+            'sessions': sessions,
+            'requests': sum(s.requests for s in pool.sessions),
+            'rate_limited': sum(s.rate_limited for s in pool.sessions),
+            'errors': sum(s.errors for s in pool.sessions),
+            'cache_hits': forecaster.cache.hits,
+            'simulated_seconds': round(simulated, 1),
+            'slept_seconds': round(sum(c.slept for c in clocks), 1),
+            'real_seconds': round(stats['real_seconds'], 3),
+            'forecasts': forecasts,
+            'forecasts_per_sec': round(forecasts / stats['real_seconds'], 1),
+            'peak_mb': round(stats['peak_mb'], 1),
+        }
+
+
+def bench_ota(scale, concurrency=8, latency=(0.0, 0.02), p_captcha=0.0, seed=0, mode='http'):
+    """OTA scrape of `scale` x the shipped districts against the local fixture server."""
+    server = FakeOTAServer(latency=latency, p_captcha=p_captcha, seed=seed).start()
+    clock = SimClock()
+    limiter = AdaptiveRateLimiter(rate_per_min=10, min_rate=2, max_rate=30, cooldown_seconds=60,
+                                  clock=clock, sleep=clock.sleep, async_sleep=clock.async_sleep)
+    original = ota_scraper.LIMITER
+    ota_scraper.LIMITER = limiter
+
+    districts = scale_districts(ota_scraper.load_districts(), scale)
+    jobs = [(d, ota_scraper.CHECKIN_DATE) for d in districts]
+    results = []
+
+    def save(job, count, raw_text, elapsed, fetch_mode):
+        results.append((count, elapsed))
+
+    try:
+        with measure() as stats, contextlib.redirect_stdout(io.StringIO()):
+            asyncio.run(ota_scraper.scrape_jobs(jobs, save, server.url, concurrency, headless=True, mode=mode))
+    finally:
+        ota_scraper.LIMITER = original
+        server.stop()
+
+    simulated = clock.now + stats['real_seconds']
+    return {
+        'scale': scale,
+        'districts': len(districts),
+        'concurrency': concurrency,
+        'requests': server.requests['page'],
+        'ok': sum(1 for count, _ in results if count is not None and count > 0),
+        'captchas': server.captchas,
+        'bytes_sent': server.bytes_sent,
+        'simulated_seconds': round(simulated, 1),
+        'slept_seconds': round(clock.slept, 1),
+        'real_seconds': round(stats['real_seconds'], 3),
+        'pages_per_sim_minute': round(len(results) / simulated * 60, 1) if simulated else 0,
+        'peak_mb': round(stats['peak_mb'], 1),
+    }
+
+
+def compare(current, previous):
+    """Prints current / previous for the headline metrics of matching sizes."""
+    print(f"\n📊 vs {previous.get('commit')} ({previous.get('created_at')})")
+    for section, metrics in (('trends', ['requests', 'simulated_seconds', 'real_seconds', 'forecasts_per_sec', 'peak_mb']),
+                             ('ota', ['requests', 'simulated_seconds', 'real_seconds', 'pages_per_sim_minute', 'peak_mb'])):
+        old = {row['scale']: row for row in previous.get(section, [])}
+        for row in current.get(section, []):
+            if row['scale'] not in old:
+                continue
+            ratios = ", ".join(
+                f"{m} x{row[m] / old[row['scale']][m]:.2f}" for m in metrics if old[row['scale']].get(m)
+            )
+            print(f"   {section:<6} {row['scale']:>4}x  {ratios}")
+
+
+def main(sizes=(1, 10), sessions=1, latency=(0.5, 1.5), p429=0.0, ota_concurrency=8, p_captcha=0.0,
+         seed=0, skip_ota=False, previous=None):
+    report = {
+        'commit': git_commit(),
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'config': {'sizes': list(sizes), 'sessions': sessions, 'latency': list(latency), 'p429': p429,
+                   'ota_concurrency': ota_concurrency, 'p_captcha': p_captcha, 'seed': seed},
+        'trends': [],
+        'ota': [],
+    }
+
+    for scale in sizes:
+        print(f"🧪 Trends sweep {scale}x...", end=" ", flush=True)
+        row = bench_trends(scale, sessions=sessions, latency=latency, p429=p429, seed=seed)
+        report['trends'].append(row)
+        print(f"{row['cells']} cells | {row['requests']} requests ({row['rate_limited']} 429s) | "
+              f"sim {row['simulated_seconds'] / 3600:.1f}h | real {row['real_seconds']:.1f}s | "
+              f"{row['forecasts_per_sec']:.0f} forecasts/s | peak {row['peak_mb']:.0f} MB")
+
+        if not skip_ota:
+            print(f"🧪 OTA scrape {scale}x...", end=" ", flush=True)
+            row = bench_ota(scale, concurrency=ota_concurrency, p_captcha=p_captcha, seed=seed)
+            report['ota'].append(row)
+            print(f"{row['districts']} districts | {row['requests']} pages ({row['captchas']} captchas) | "
+                  f"sim {row['simulated_seconds'] / 60:.1f} min | real {row['real_seconds']:.1f}s | "
+                  f"peak {row['peak_mb']:.0f} MB")
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d_%H%M%S}_{report['commit']}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✅ Results: {path}")
+
+    if previous:
+        with open(previous, encoding='utf-8') as f:
+            compare(report, json.load(f))
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline benchmark with simulated Trends and OTA backends")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10], help="Sweep sizes as multiples of data/raw")
+    parser.add_argument("--sessions", type=int, default=1, help="Simulated Trends sessions (proxies)")
+    parser.add_argument("--latency", type=float, nargs=2, default=[0.5, 1.5], metavar=("MIN", "MAX"),
+                        help="Simulated Trends latency range (seconds)")
+    parser.add_argument("--p429", type=float, default=0.0, help="Probability of a 429 per Trends request")
+    parser.add_argument("--ota-concurrency", type=int, default=8)
+    parser.add_argument("--p-captcha", type=float, default=0.0, help="Probability of a captcha page per OTA request")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skip-ota", action="store_true")
+    parser.add_argument("--compare", metavar="JSON", help="Earlier result file to compare against")
+    args = parser.parse_args()
+
+    main(sizes=args.sizes, sessions=args.sessions, latency=tuple(args.latency), p429=args.p429,
+         ota_concurrency=args.ota_concurrency, p_captcha=args.p_captcha, seed=args.seed,
+         skip_ota=args.skip_ota, previous=args.compare)
@@ -0,0 +1,192 @@
+import json
+import os
+import time
+
+
+class CheckpointLog:
+    """
+    Append-only JSONL progress log (one result row per line, fsync per batch).
+    A sidecar `.keys` file holds one resume key per line, so resuming never
+    has to parse the rows. A torn last line from a crash is cut off on open.
+    A `.run` sidecar holds the expected total of the current run (progress /
+    ETA for live readers, see CheckpointTail).
+    """
+
+    def __init__(self, path, key_fn):
+        self.path = path
+        self.keys_path = path + ".keys"
+        self.run_path = path + ".run"
+        self.key_fn = key_fn
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._repair(self.path)
+        self._repair(self.keys_path)
+
+    @staticmethod
+    def _repair(path):
+        """Drops a half-written trailing line (crash mid-append)."""
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return
+        with open(path, "rb+") as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) == b"\n":
+                return
+            f.seek(0)
+            data = f.read()
+            f.seek(data.rfind(b"\n") + 1)
+            f.truncate()
+
+    @staticmethod
+    def _append_lines(path, lines):
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("".join(line + "\n" for line in lines))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def exists(self):
+        return os.path.exists(self.path) and os.path.getsize(self.path) > 0
+
+    def append(self, rows):
+        """Rows first, keys second: a key is only visible once its row is durable."""
+        if not rows:
+            return
+        self._append_lines(self.path, [json.dumps(row, ensure_ascii=False, default=str) for row in rows])
+        self._append_lines(self.keys_path, [self.key_fn(row) for row in rows])
+
+    def start_run(self, total, done=0):
+        """Records the run's expected row count (unique keys) and what was already done."""
+        tmp = f"{self.run_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"total": total, "done_at_start": done, "started_at": time.time()}, f)
+        os.replace(tmp, self.run_path)
+
+    def read_keys(self):
+        if not os.path.exists(self.keys_path) and self.exists():
+            # Old log without sidecar: rebuild it once from the rows
+            self._append_lines(self.keys_path, [self.key_fn(row) for row in self.read_rows()])
+        if not os.path.exists(self.keys_path):
+            return set()
+        with open(self.keys_path, encoding="utf-8") as f:
+            return set(line.rstrip("\n") for line in f if line.strip())
+
+    def read_rows(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+    def to_frame(self):
+        """All rows, last write wins per key (a crash between rows and keys can duplicate)."""
+        import pandas as pd  # Lazy: resume checks / live readers never build a frame
+        latest = {}
+        for row in self.read_rows():
+            latest[self.key_fn(row)] = row
+        return pd.DataFrame(list(latest.values()))
+
+
+def read_keys(path, key_fn):
+    """
+    Resume keys of the CheckpointLog at path, read-only: safe next to a
+    running writer (CheckpointTail rules). The `.keys` sidecar is read up to
+    its last complete line; an old log without one is keyed from its rows.
+    Nothing is created, repaired or rebuilt.
+    """
+    keys_path = path + ".keys"
+    if os.path.exists(keys_path):
+        with open(keys_path, "rb") as f:
+            data = f.read()
+        data = data[:data.rfind(b"\n") + 1]  # A key still being written counts next time
+        return set(line.decode("utf-8") for line in data.splitlines() if line.strip())
+    rows, _ = CheckpointTail(path).read_new()
+    return set(key_fn(row) for row in rows)
+
+
+def read_run(path):
+    """`.run` sidecar of the checkpoint at path (None if the writer never recorded one)."""
+    try:
+        with open(path + ".run", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class CheckpointTail:
+    """
+    Reader side of a CheckpointLog that is still being written: remembers its
+    byte offset and only parses what was appended since the last read. Stops
+    at the last complete line (a half-written row is picked up next time).
+    Never opens the log for writing, so it is safe next to a running writer.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.offset = 0
+        self.inode = None
+
+    def read_new(self):
+        """(rows appended since the last call, True if the log was replaced/truncated and reread from 0)."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return [], False
+
+        reset = self.inode is not None and (stat.st_ino != self.inode or stat.st_size < self.offset)
+        if reset:
+            self.offset = 0
+        self.inode = stat.st_ino
+        if stat.st_size == self.offset:
+            return [], reset
+
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            data = f.read(stat.st_size - self.offset)
+        end = data.rfind(b"\n") + 1
+        self.offset += end
+
+        rows = []
+        for line in data[:end].splitlines():
+            if not line.strip():
+                continue
+            try:
+                rows.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+        return rows, reset
+
+
+def export_report(df, output_file, formats=("xlsx",)):
+    """
+    Writes the final report once, per format, next to `output_file`.
+    Each file is written to a temp name and swapped in, so a crash during
+    export never leaves a half-written report behind.
+    """
+    base, _ = os.path.splitext(output_file)
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    written = []
+
+    for fmt in formats:
+        target = f"{base}.{fmt}"
+        tmp = f"{base}.tmp.{fmt}"
+        if fmt == "xlsx":
+            df.to_excel(tmp, index=False)
+        elif fmt == "csv":
+            df.to_csv(tmp, index=False)
+        elif fmt == "parquet":
+            try:
+                df.to_parquet(tmp, index=False)
+            except ImportError:
+                print("⚠️ Parquet export needs pyarrow -> skipped.")
+                continue
+        else:
+            raise ValueError(f"Unknown export format: {fmt}")
+        os.replace(tmp, target)
+        written.append(target)
+
+    return written
@@ -0,0 +1,329 @@
+"""
+Command line entry point. Every subcommand imports only what it needs:
+`status` and `plan` run on the standard library (no pandas / NumPy), the
+sweep commands load the forecaster, `scrape-ota` the scraper (Playwright
+only if a district needs the browser). The Trends client is created on the
+first real request.
+
+    python src/cli.py status                  # progress, queue, report, last run
+    python src/cli.py plan [--prune]          # query plan + cost, sends nothing
+    python src/cli.py fetch [--refresh | --enqueue | --worker NAME]
+    python src/cli.py forecast [--workers N]  # backtest + model selection, offline
+    python src/cli.py export [--collect]
+    python src/cli.py scrape-ota [--sweep [NIGHTS]] [--mode http] ...
+    python src/cli.py scrape-ota --weekends Ubud [--weeks 8]
+    python src/cli.py serve [--port 8080]     # forecast API (aiohttp), see src/serve.py
+
+Global options: `--work-dir DIR` (output/ + cache/), `--set NAME=VALUE`
+(any setting of src/settings.py, value parsed as JSON if it can be).
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+# Allow `python src/cli.py` as well as `python -m src.cli`
+if __package__ in (None, ""):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.checkpoint import read_run
+from src.metrics import profiled
+from src.planner import QueryPlan
+from src.settings import ForecasterConfig
+from src.trends_cache import TrendsCache
+from src.work_queue import WorkQueue
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUNNING_SECONDS = 120  # Checkpoint written this recently -> a sweep is probably still running
+METRICS_JOBS = ("backtest", "export", "plan")  # run_metrics_<job>.json besides the sweep's ("forecast")
+
+
+def parse_overrides(pairs):
+    """["NAME=VALUE", ...] -> {NAME: value}; JSON values (numbers, lists, null), plain strings otherwise."""
+    overrides = {}
+    for pair in pairs:
+        name, sep, raw = pair.partition("=")
+        if not sep:
+            raise argparse.ArgumentTypeError(f"--set expects NAME=VALUE, got {pair!r}")
+        try:
+            overrides[name.strip()] = json.loads(raw)
+        except ValueError:
+            overrides[name.strip()] = raw
+    return overrides
+
+
+def _ago(timestamp):
+    seconds = max(time.time() - timestamp, 0)
+    if seconds < 120:
+        return f"{seconds:.0f}s ago"
+    if seconds < 7200:
+        return f"{seconds / 60:.0f} min ago"
+    if seconds < 172800:
+        return f"{seconds / 3600:.1f} h ago"
+    return f"{seconds / 86400:.0f} days ago"
+
+
+def _count_lines(path):
+    if not os.path.exists(path):
+        return 0
+    with open(path, "rb") as f:
+        return sum(1 for line in f if line.strip())
+
+
+# --- Light commands (standard library only) ---
+def cmd_status(config, args):
+    districts, services = config.load_data()
+    # Read-only: a sweep may be appending right now (no repair, no `.keys` rebuild)
+    done = config.checkpoint_keys()
+    has_checkpoint = os.path.exists(config.CHECKPOINT_FILE) and os.path.getsize(config.CHECKPOINT_FILE) > 0
+    plan = QueryPlan(districts, services, config.KEYWORD_MAP, done)
+    total = len(done) + len(plan.cells)
+    print(f"✅ Forecast: {len(done)}/{total} cells ({len(done) / max(total, 1):.0%}) | "
+          f"{len(plan.districts)} districts to go -> {config.CHECKPOINT_FILE}")
+
+    run = read_run(config.CHECKPOINT_FILE)
+    if run and has_checkpoint:
+        last_write = os.path.getmtime(config.CHECKPOINT_FILE)
+        elapsed = last_write - run["started_at"]
+        new = len(done) - run.get("done_at_start", 0)
+        if not plan.cells:
+            state = "🏁 complete"
+        else:
+            state = "🟢 running" if time.time() - last_write < RUNNING_SECONDS else "⚪ idle"
+        rate = f" | {new / elapsed * 60:.1f} cells/min" if elapsed > 0 and new > 0 else ""
+        print(f"   {state} | last run started {_ago(run['started_at'])}, last write {_ago(last_write)}{rate}")
+
+    if os.path.exists(config.QUEUE_FILE):
+        queue = WorkQueue(config.QUEUE_FILE)
+        print(queue.summary())
+        queue.close()
+
+    base, _ = os.path.splitext(config.OUTPUT_FILE)
+    reports = [f"{base}.{fmt}" for fmt in config.EXPORT_FORMATS if os.path.exists(f"{base}.{fmt}")]
+    if reports:
+        exported = min(os.path.getmtime(path) for path in reports)
+        stale = has_checkpoint and os.path.getmtime(config.CHECKPOINT_FILE) > exported
+        print(f"📄 Report: {', '.join(os.path.basename(p) for p in reports)} exported {_ago(exported)}"
+              + (" (older than the checkpoint -> run `export`)" if stale else ""))
+    else:
+        print("📄 Report: not exported yet")
+
+    if os.path.exists(config.BACKTEST_FILE):
+        print(f"🧪 Backtest: {config.BACKTEST_FILE} ({_ago(os.path.getmtime(config.BACKTEST_FILE))})")
+
+    if os.path.exists(config.CACHE_FILE):
+        print(f"💾 Trends cache: {os.path.getsize(config.CACHE_FILE) / 1e6:.1f} MB "
+              f"(limit {config.CACHE_MAX_MB} MB, TTL {config.CACHE_TTL_HOURS} h)")
+
+    # Each job has its own metrics file, so an `export` after the sweep keeps the sweep's numbers
+    metrics_file = os.path.join(config.METRICS_DIR, 'run_metrics_forecast.json')
+    if os.path.exists(metrics_file):
+        with open(metrics_file, encoding="utf-8") as f:
+            counters = json.load(f).get("counters", {})
+        print(f"📈 Last sweep: finished {_ago(os.path.getmtime(metrics_file))} | "
+              f"Requests: {counters.get('requests', 0)} | 429s: {counters.get('rate_limited', 0)} | "
+              f"Cache hits: {counters.get('cache_hits', 0)}")
+    other_runs = [(job, os.path.join(config.METRICS_DIR, f'run_metrics_{job}.json')) for job in METRICS_JOBS]
+    other_runs = [f"{job} {_ago(os.path.getmtime(path))}" for job, path in other_runs if os.path.exists(path)]
+    if other_runs:
+        print(f"   Other runs: {', '.join(other_runs)}")
+
+    ota_checkpoint = os.path.join(BASE_DIR, 'data', 'output', 'ota_checkpoint.jsonl')
+    if os.path.exists(ota_checkpoint):
+        ota_run = read_run(ota_checkpoint)
+        ota_total = f"/{ota_run['total']}" if ota_run else ""
+        print(f"🏨 OTA: {_count_lines(ota_checkpoint + '.keys')}{ota_total} districts scraped "
+              f"({_ago(os.path.getmtime(ota_checkpoint))})")
+
+
+def cmd_plan(config, args):
+    if args.prune:
+        # Pruning with the cached Bali-wide / region stages needs their forecasts
+        forecaster = _forecaster(config, args, job="plan")
+        forecaster.plan()
+        forecaster.write_metrics()
+        return
+
+    districts, services = config.load_data()
+    plan = QueryPlan(districts, services, config.KEYWORD_MAP, config.checkpoint_keys())
+
+    cached = 0
+    proxy_cached = False
+    if os.path.exists(config.CACHE_FILE):
+        cache = TrendsCache(config.CACHE_FILE, ttl_hours=config.CACHE_TTL_HOURS, max_mb=config.CACHE_MAX_MB)
+        proxy_keys = config.batch_cache_keys(plan.proxy_keywords())
+        stage_keys = proxy_keys + config.batch_cache_keys(plan.region_keywords())
+        for district in plan.districts:
+            stage_keys += config.batch_cache_keys(plan.specific_keywords(district))
+        hits = {key for key in stage_keys if cache.contains(key)}
+        cached = len(hits)
+        proxy_cached = bool(proxy_keys) and hits.issuperset(proxy_keys)
+
+    print(plan.describe(config.BATCH_SIZE, config.RATE_START, sessions=max(len(config.PROXIES), 1), cached=cached))
+    print("   (Upper bound: no pruning, all districts counted as active)")
+    if proxy_cached:
+        print("   Bali-wide proxies are cached -> `plan --prune` drops dead keywords / quiet districts")
+
+
+# --- Sweep commands (load the forecaster: pandas, NumPy, the Trends pool) ---
+def _forecaster(config, args, worker=None, job="forecast"):
+    from src.forecaster import BaliDemandForecaster
+
+    client_factory = None
+    if getattr(args, "trends_url", None):
+        from src.fake_trends import FakeTrendsClient
+        client_factory = lambda proxy: FakeTrendsClient(args.trends_url, egress=proxy or worker or "direct")
+    # A worker keeps its own cache / model state (as on its own machine); only the queue is shared
+    work_dir = args.work_dir or (os.path.join(BASE_DIR, 'data', 'workers', worker) if worker else None)
+    return BaliDemandForecaster(client_factory=client_factory, work_dir=work_dir, overrides=args.overrides, job=job)
+
+
+def _queue(forecaster, args):
+    return WorkQueue(args.queue or forecaster.QUEUE_FILE)
+
+
+def cmd_fetch(config, args):
+    forecaster = _forecaster(config, args, worker=args.worker)
+    with profiled(_profile_path(forecaster.METRICS_DIR, args)):
+        if args.refresh:
+            forecaster.refresh()
+        elif args.enqueue:
+            forecaster.enqueue(_queue(forecaster, args))
+        elif args.worker:
+            forecaster.work(_queue(forecaster, args), args.worker)
+        else:
+            forecaster.run()
+    forecaster.write_metrics()
+
+
+def cmd_forecast(config, args):
+    if args.workers:
+        args.overrides["BACKTEST_WORKERS"] = args.workers
+    forecaster = _forecaster(config, args, job="backtest")
+    with profiled(_profile_path(forecaster.METRICS_DIR, args)):
+        forecaster.backtest()
+    forecaster.write_metrics()
+
+
+def cmd_export(config, args):
+    forecaster = _forecaster(config, args, job="export")
+    with profiled(_profile_path(forecaster.METRICS_DIR, args)):
+        if args.collect:
+            forecaster.collect(_queue(forecaster, args))
+        else:
+            forecaster.export_report()
+    forecaster.write_metrics()
+
+
+def cmd_scrape_ota(config, args):
+    import asyncio
+    from src import ota_scraper
+
+    if args.weekends:
+        ota_scraper.print_weekends(args.weekends, args.weeks)
+        return
+    options = dict(concurrency=args.concurrency or ota_scraper.CONCURRENCY,
+                   headless=args.headless or ota_scraper.HEADLESS,
+                   base_url=args.base_url, mode=args.mode or ota_scraper.FETCH_MODE)
+    with profiled(_profile_path(ota_scraper.METRICS_DIR, args)):
+        if args.sweep:
+            nights = ota_scraper.SWEEP_NIGHTS if args.sweep is True else args.sweep
+            asyncio.run(ota_scraper.sweep(nights=nights, **options))
+        else:
+            asyncio.run(ota_scraper.main(**options))
+    ota_scraper.write_metrics()
+
+
+def cmd_serve(config, args):
+    from src.serve import serve
+    serve(args.host, args.port, args.trends_url, args.stale_hours, config=config, overrides=args.overrides)
+
+
+def _profile_path(directory, args):
+    if args.profile == "":
+        return os.path.join(directory, f'profile_{args.command}.prof')
+    return args.profile
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="Bali Tourism Demand Forecaster")
+    parser.add_argument("--work-dir", metavar="DIR", help="Directory for output/ + cache/ (default: data/)")
+    parser.add_argument("--set", dest="settings", action="append", default=[], metavar="NAME=VALUE",
+                        help="Override a setting of src/settings.py, e.g. --set RATE_START=8 (repeatable)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    # Shared by the commands that do real work
+    profile = argparse.ArgumentParser(add_help=False)
+    profile.add_argument("--profile", nargs="?", const="", metavar="PATH",
+                         help="Run under cProfile and save the stats (default: data/output/profile_<command>.prof)")
+
+    commands.add_parser("status", help="Progress of the sweep, queue, report and last run (no network)")
+
+    plan = commands.add_parser("plan", help="Print the query plan and estimated cost, send nothing")
+    plan.add_argument("--prune", action="store_true", help="Prune with the cached Bali-wide / region stages")
+
+    fetch = commands.add_parser("fetch", parents=[profile],
+                                help="Run the sweep: fetch Trends data, forecast, checkpoint, export")
+    mode = fetch.add_mutually_exclusive_group()
+    mode.add_argument("--refresh", action="store_true", help="Delta refresh: fetch recent weeks only")
+    mode.add_argument("--enqueue", action="store_true", help="Work queue: plan every remaining cell into the queue")
+    mode.add_argument("--worker", metavar="NAME", help="Work queue: lease and process cells until the queue is empty")
+    fetch.add_argument("--queue", metavar="PATH", help="Work queue database (default: data/queue/work_queue.sqlite)")
+    fetch.add_argument("--trends-url", metavar="URL",
+                       help="Trends backend URL (e.g. `python src/fake_trends.py`), egress = proxy or worker name")
+
+    forecast = commands.add_parser("forecast", parents=[profile],
+                                   help="Backtest every stored series, pick a model per cell, re-export")
+    forecast.add_argument("--workers", type=int, help="Backtest processes (default: all cores)")
+
+    export = commands.add_parser("export", parents=[profile], help="Rebuild the report from the checkpoint")
+    export.add_argument("--collect", action="store_true", help="Move finished work-queue cells into the checkpoint first")
+    export.add_argument("--queue", metavar="PATH", help="Work queue database (default: data/queue/work_queue.sqlite)")
+
+    # Defaults come from src/ota_scraper.py once it is imported (it loads pandas)
+    ota = commands.add_parser("scrape-ota", parents=[profile],
+                              help="Scrape OTA supply per district (see src/ota_scraper.py)")
+    ota.add_argument("--concurrency", type=int, help="Pages / HTTP connections scraping at the same time")
+    ota.add_argument("--headless", action="store_true", help="Run Chromium without a window")
+    ota.add_argument("--base-url", default=None, help="OTA base URL (e.g. a local fixture server)")
+    ota.add_argument("--mode", choices=['auto', 'http', 'browser'],
+                     help="auto (default): plain HTTP first, browser only on captcha/layout change")
+    ota.add_argument("--sweep", type=int, nargs="?", const=True, default=None, metavar="NIGHTS",
+                     help="Scrape every district for the next NIGHTS check-in dates (default 90)")
+    ota.add_argument("--weekends", metavar="DISTRICT", help="Print supply of DISTRICT for the next weekends (latest sweep)")
+    ota.add_argument("--weeks", type=int, default=8, help="Weekends shown by --weekends")
+
+    serve = commands.add_parser("serve", help="Local forecast API over the latest export (see src/serve.py)")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8080)
+    serve.add_argument("--trends-url", metavar="URL", help="Trends backend for on-demand forecasts")
+    serve.add_argument("--stale-hours", type=float, default=24 * 7,
+                       help="Re-forecast export rows older than this on demand (default 168)")
+    return parser
+
+
+COMMANDS = {
+    "status": cmd_status,
+    "plan": cmd_plan,
+    "fetch": cmd_fetch,
+    "forecast": cmd_forecast,
+    "export": cmd_export,
+    "scrape-ota": cmd_scrape_ota,
+    "serve": cmd_serve,
+}
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        args.overrides = parse_overrides(args.settings)
+        config = ForecasterConfig(work_dir=args.work_dir, overrides=args.overrides)
+    except (argparse.ArgumentTypeError, KeyError) as e:
+        parser.error(str(e).strip("'\""))
+    COMMANDS[args.command](config, args)
+
+
+if __name__ == "__main__":
+    main()
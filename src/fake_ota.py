@@ -0,0 +1,185 @@
+"""
+Local stand-in for the Booking.com search results page, for tests and benchmarks.
+Serves the saved fixtures in data/fixtures/ plus the images, fonts, scripts and
+analytics beacons they reference, and counts the bytes it sends.
+
+    server = FakeOTAServer(latency=(0.05, 0.2), p_captcha=0.02).start()
+    asyncio.run(ota_scraper.main(base_url=server.url, headless=True))
+    server.stop()
+"""
+import os
+import random
+import threading
+import time
+import urllib.parse
+import zlib
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from string import Template
+
+import pandas as pd
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'fixtures')
+RESULTS_FIXTURE = os.path.join(FIXTURE_DIR, 'booking_searchresults.html')
+CAPTCHA_FIXTURE = os.path.join(FIXTURE_DIR, 'booking_captcha.html')
+
+CARDS_PER_PAGE = 25
+
+# Payload sizes of the assets a real result page pulls in (bytes)
+ASSET_SIZES = {
+    'img': 60_000,
+    'fonts': 40_000,
+    'css': 30_000,
+    'js': 120_000,
+    'analytics': 20_000,
+}
+CONTENT_TYPES = {
+    'img': 'image/jpeg',
+    'fonts': 'font/woff2',
+    'css': 'text/css',
+    'js': 'application/javascript',
+    'analytics': 'application/javascript',
+}
+
+CARD = Template(
+    '    <div class="sr-card" data-testid="property-card">\n'
+    '      <img src="/static/img/property-$n.jpg" alt="" loading="lazy" width="200" height="200">\n'
+    '      <div class="sr-card__body"><h3>$district Villa $n</h3>'
+    '<span class="review-score">8.$score</span></div>\n'
+    '    </div>'
+)
+
+
+def property_count(district, checkin):
+    """Deterministic available-property count per district and check-in date (weekends fuller)."""
+    base = 20 + zlib.crc32(district.encode('utf-8')) % 3000
+    day = pd.Timestamp(checkin)
+    weekend = 0.85 if day.dayofweek in (4, 5) else 1.0
+    wobble = 0.9 + (zlib.crc32(f"{district}|{day.date()}".encode('utf-8')) % 200) / 1000
+    return int(base * weekend * wobble)
+
+
+def render_results(district, checkin, checkout):
+    with open(RESULTS_FIXTURE, encoding='utf-8') as f:
+        template = Template(f.read())
+    cards = '\n'.join(CARD.substitute(n=n, district=district, score=n % 10) for n in range(CARDS_PER_PAGE))
+    return template.substitute(
+        district=district, count=f"{property_count(district, checkin):,}",
+        checkin=checkin, checkout=checkout, cards=cards,
+    )
+
+
+class FakeOTAServer:
+    """
+    Threaded HTTP server on 127.0.0.1 serving search result pages with
+    configurable latency, captcha pages and 429s.
+    """
+
+    def __init__(self, latency=(0.05, 0.2), p_captcha=0.0, p429=0.0, seed=0):
+        self.latency = latency
+        self.p_captcha = p_captcha
+        self.p429 = p429
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+
+        # Stats
+        self.requests = Counter()      # per kind: page / img / fonts / css / js / analytics
+        self.bytes_sent = 0
+        self.captchas = 0
+        self.rate_limited = 0
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def summary(self):
+        kinds = ", ".join(f"{kind}: {n}" for kind, n in sorted(self.requests.items()))
+        return (f"🧪 Fake OTA: {sum(self.requests.values())} requests ({kinds}) | "
+                f"{self.bytes_sent / 1e6:.1f} MB sent | Captchas: {self.captchas} | 429s: {self.rate_limited}")
+
+    def _roll(self, kind):
+        with self.lock:
+            self.requests[kind] += 1
+            delay = self.rng.uniform(*self.latency) if kind == 'page' else 0.0
+            outcome = None
+            if kind == 'page':
+                roll = self.rng.random()
+                if roll < self.p429:
+                    outcome = 429
+                    self.rate_limited += 1
+                elif roll < self.p429 + self.p_captcha:
+                    outcome = 'captcha'
+                    self.captchas += 1
+        return outcome, delay
+
+    def _sent(self, n):
+        with self.lock:
+            self.bytes_sent += n
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Keep-alive, like the real site
+
+            def do_GET(self):
+                parsed = urllib.parse.urlparse(self.path)
+                parts = parsed.path.strip('/').split('/')
+
+                if parsed.path == '/searchresults.en-gb.html':
+                    self._search(urllib.parse.parse_qs(parsed.query))
+                elif parts[0] in ('static', 'analytics') and len(parts) > 1:
+                    kind = 'analytics' if parts[0] == 'analytics' else parts[1]
+                    if kind not in ASSET_SIZES:
+                        kind = 'js'
+                    server._roll(kind)
+                    self._send(200, CONTENT_TYPES[kind], b'\0' * ASSET_SIZES[kind])
+                else:
+                    self._send(404, 'text/plain', b'not found')
+
+            def _search(self, params):
+                outcome, delay = server._roll('page')
+                time.sleep(delay)
+                if outcome == 429:
+                    self._send(429, 'text/plain', b'Too Many Requests')
+                    return
+                if outcome == 'captcha':
+                    with open(CAPTCHA_FIXTURE, 'rb') as f:
+                        self._send(200, 'text/html; charset=utf-8', f.read())
+                    return
+
+                district = params.get('ss', [''])[0].split(',')[0].strip()
+                checkin = params.get('checkin', [pd.Timestamp.now().strftime('%Y-%m-%d')])[0]
+                checkout = params.get('checkout', [checkin])[0]
+                body = render_results(district, checkin, checkout).encode('utf-8')
+                self._send(200, 'text/html; charset=utf-8', body)
+
+            def _send(self, status, content_type, body):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                try:
+                    self.wfile.write(body)
+                    server._sent(len(body))
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # Client stopped reading (aborted route / early exit)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
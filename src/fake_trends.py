@@ -0,0 +1,278 @@
+"""
+Local stand-in for Google Trends, for tests and benchmarks (no network, no quota).
+FakeTrendsServer/FakeTrendsClient go over local HTTP; FakeTrendReq runs in-process.
+
+    server = FakeTrendsServer(latency=(0.05, 0.2), p429=0.05, max_rpm_per_egress=30).start()
+    forecaster = BaliDemandForecaster(client_factory=server.client_factory)
+    ...
+    server.stop()
+
+    python src/fake_trends.py --port 8765 --max-rpm 30   # standalone, for worker processes
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import zlib
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+ORIGIN = pd.Timestamp("2020-01-05")
+DAILY_WINDOWS = {"today 1-m": 30, "today 3-m": 90}
+
+
+def _daily_values(keyword, n_days):
+    """
+    Deterministic daily raw volume per keyword from a fixed origin: base level
+    + yearly trend + seasonality + noise. Raw (unscaled), like absolute search
+    counts, so daily and weekly windows of the same keyword agree.
+    """
+    rng = np.random.default_rng(zlib.crc32(keyword.encode("utf-8")))
+    years = np.arange(n_days) / 365.25
+
+    base = rng.lognormal(mean=2.0, sigma=1.2)
+    slope = rng.normal(0, 0.3)
+    phase = rng.uniform()
+    noise = rng.normal(0, 0.1, n_days)
+    level = 1 + slope * (years - years[-1]) + 0.3 * np.sin(2 * np.pi * (years + phase)) + noise
+    return base * np.clip(level, 0, None)
+
+
+def _daily_signal(keyword, end):
+    days = pd.date_range(ORIGIN, end, freq="D")
+    return pd.Series(_daily_values(keyword, len(days)), index=days)
+
+
+def synthetic_series(keyword, timeframe="today 12-m", end=None):
+    """Daily points for 1-m/3-m windows, weekly (Sunday-start) means otherwise, like Trends."""
+    end = pd.Timestamp(end or pd.Timestamp.now()).normalize()
+    if timeframe in DAILY_WINDOWS:
+        return _daily_signal(keyword, end).iloc[-DAILY_WINDOWS[timeframe]:]
+
+    # ORIGIN is a Sunday -> blocks of 7 days from it are the Sunday-start weeks
+    values = _daily_values(keyword, (end - ORIGIN).days + 1)
+    starts = np.arange(0, len(values), 7)
+    weekly = np.add.reduceat(values, starts) / np.diff(np.append(starts, len(values)))
+    index = pd.DatetimeIndex(ORIGIN.to_datetime64() + starts[-52:].astype("timedelta64[D]"))
+    return pd.Series(weekly[-52:], index=index)
+
+
+def trends_payload(keywords, timeframe="today 12-m", end=None, source=synthetic_series):
+    """
+    Scales a payload the way Trends does: 0-100 relative to the max of all its terms.
+    `source(keyword, timeframe, end)` gives the raw series (synthetic by default, or a recording).
+    """
+    raw = pd.DataFrame({kw: source(kw, timeframe, end) for kw in keywords})
+    peak = raw.to_numpy().max() if len(raw.columns) else 0
+    scaled = (raw / peak * 100).round() if peak > 0 else raw * 0
+    df = scaled.astype(int)
+    df["isPartial"] = False
+    df.index.name = "date"
+    return df
+
+
+class RateLimitError(Exception):
+    """Raised by the fake clients. Message contains 429 like pytrends' error."""
+
+    def __init__(self):
+        super().__init__("The request failed: Google returned a response with code 429")
+
+
+class FakeTrendsServer:
+    """
+    Threaded HTTP server on 127.0.0.1 with configurable latency and 429s.
+    429s come from two sources: a random probability, and a per-egress
+    budget (requests per minute per `X-Egress` header), so a pool of N
+    egress endpoints really gets ~N x the throughput of a single one.
+    """
+
+    def __init__(self, latency=(0.05, 0.2), p429=0.0, max_rpm_per_egress=None, seed=0, port=0):
+        self.latency = latency
+        self.p429 = p429
+        self.max_rpm_per_egress = max_rpm_per_egress
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.history = defaultdict(deque)
+
+        # Stats
+        self.requests = 0
+        self.rate_limited = 0
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def client_factory(self, proxy=None):
+        return FakeTrendsClient(self.url, egress=proxy or "direct")
+
+    def _should_429(self, egress):
+        with self.lock:
+            self.requests += 1
+            now = time.monotonic()
+            limited = self.rng.random() < self.p429
+
+            if self.max_rpm_per_egress:
+                window = self.history[egress]
+                while window and now - window[0] > 60:
+                    window.popleft()
+                if len(window) >= self.max_rpm_per_egress:
+                    limited = True
+                else:
+                    window.append(now)
+
+            if limited:
+                self.rate_limited += 1
+            delay = self.rng.uniform(*self.latency)
+        return limited, delay
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parsed = urllib.parse.urlparse(self.path)
+                if parsed.path != "/interest_over_time":
+                    self.send_error(404)
+                    return
+
+                limited, delay = server._should_429(self.headers.get("X-Egress", "direct"))
+                time.sleep(delay)
+                if limited:
+                    self.send_error(429, "Too Many Requests")
+                    return
+
+                params = urllib.parse.parse_qs(parsed.query)
+                timeframe = params.get("timeframe", ["today 12-m"])[0]
+                df = trends_payload(params.get("kw", []), timeframe)
+                body = json.dumps({
+                    "dates": [d.strftime("%Y-%m-%d") for d in df.index],
+                    "values": {kw: df[kw].tolist() for kw in params.get("kw", [])},
+                }).encode("utf-8")
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+class FakeTrendReq:
+    """
+    In-process TrendReq (no HTTP) for benchmarks: replays `recorded` series
+    ({keyword: raw Series}) or synthetic ones, with latency and 429s.
+    `sleep` is injectable so latency can run on a simulated clock.
+    """
+
+    def __init__(self, latency=(0.05, 0.2), p429=0.0, seed=0, sleep=time.sleep, recorded=None, end=None):
+        self.latency = latency
+        self.p429 = p429
+        self.rng = random.Random(seed)
+        self.sleep = sleep
+        self.recorded = recorded or {}
+        self.end = end
+        self.kw_list = []
+        self.timeframe = None
+
+        # Stats
+        self.requests = 0
+        self.rate_limited = 0
+
+    def build_payload(self, kw_list, cat=0, timeframe="today 5-y", geo="", gprop=""):
+        self.kw_list = list(kw_list)
+        self.timeframe = timeframe
+
+    def _series(self, keyword, timeframe, end):
+        if keyword in self.recorded:
+            return self.recorded[keyword]
+        return synthetic_series(keyword, timeframe, end)
+
+    def interest_over_time(self):
+        self.requests += 1
+        self.sleep(self.rng.uniform(*self.latency))
+        if self.rng.random() < self.p429:
+            self.rate_limited += 1
+            raise RateLimitError()
+        return trends_payload(self.kw_list, self.timeframe, self.end, source=self._series)
+
+
+class FakeTrendsClient:
+    """Same surface as pytrends' TrendReq (build_payload + interest_over_time), over HTTP."""
+
+    def __init__(self, base_url, egress="direct", timeout=10):
+        self.base_url = base_url
+        self.egress = egress
+        self.timeout = timeout
+        self.kw_list = []
+        self.timeframe = None
+        self.geo = None
+
+    def build_payload(self, kw_list, cat=0, timeframe="today 5-y", geo="", gprop=""):
+        self.kw_list = list(kw_list)
+        self.timeframe = timeframe
+        self.geo = geo
+
+    def interest_over_time(self):
+        query = urllib.parse.urlencode(
+            [("kw", kw) for kw in self.kw_list] + [("timeframe", self.timeframe), ("geo", self.geo)]
+        )
+        request = urllib.request.Request(
+            f"{self.base_url}/interest_over_time?{query}", headers={"X-Egress": self.egress}
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                payload = json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            if e.code == 429:
+                raise RateLimitError()
+            raise
+
+        index = pd.to_datetime(payload["dates"])
+        index.name = "date"
+        df = pd.DataFrame(payload["values"], index=index)
+        df["isPartial"] = False
+        return df
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local fake Google Trends server")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, nargs=2, default=(0.05, 0.2), metavar=("MIN", "MAX"))
+    parser.add_argument("--p429", type=float, default=0.0, help="Random 429 probability per request")
+    parser.add_argument("--max-rpm", type=int, default=None, help="Requests per minute per egress before 429s")
+    args = parser.parse_args()
+
+    server = FakeTrendsServer(latency=tuple(args.latency), p429=args.p429, max_rpm_per_egress=args.max_rpm,
+                              port=args.port).start()
+    print(f"🧪 Fake Trends on {server.url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(10)
+            print(f"   {server.requests} requests, {server.rate_limited} rate-limited")
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,180 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from src.rate_limiter import AdaptiveRateLimiter
+
+
+def default_client_factory(proxy, hl='en-US', tz=360):
+    """Real Google Trends client, pinned to one egress proxy (or direct)."""
+    from pytrends.request import TrendReq
+
+    if proxy:
+        return TrendReq(hl=hl, tz=tz, proxies=[proxy])
+    return TrendReq(hl=hl, tz=tz)
+
+
+class TrendsSession:
+    """
+    One Trends client with its own egress (proxy), rate limiter, health and cooldown.
+    The client is created on first use and rebuilt after an error.
+    """
+
+    UNHEALTHY_AFTER = 3        # Consecutive failures before the session is benched
+    UNHEALTHY_COOLDOWN = 600   # Seconds benched before it gets another try
+
+    def __init__(self, name, proxy, client_factory, limiter):
+        self.name = name
+        self.proxy = proxy
+        self.client_factory = client_factory
+        self.limiter = limiter
+        self.client = None
+
+        self.busy = False
+        self.failures = 0
+        self.benched_until = 0.0
+
+        # Stats
+        self.requests = 0
+        self.rate_limited = 0
+        self.errors = 0
+
+    @property
+    def healthy(self):
+        return self.limiter.clock() >= self.benched_until
+
+    def ready_at(self):
+        """When this session could send its next request (for picking the best free one)."""
+        return max(self.benched_until, self.limiter.cooldown_until, self.limiter.updated_at)
+
+    def fetch(self, keywords, timeframe, geo):
+        benched = self.benched_until - self.limiter.clock()
+        if benched > 0:
+            # Only picked while benched when every session is benched
+            self.limiter.sleep(benched)
+        self.limiter.acquire()
+        if self.client is None:
+            self.client = self.client_factory(self.proxy)
+        self.requests += 1
+        self.client.build_payload(keywords, timeframe=timeframe, geo=geo)
+        return self.client.interest_over_time()
+
+    def mark_success(self):
+        self.failures = 0
+        self.limiter.on_success()
+
+    def mark_failure(self, rate_limited):
+        """Returns the cooldown applied to this session (seconds)."""
+        self.failures += 1
+        self.client = None  # Fresh cookies / connection next time
+        if rate_limited:
+            self.rate_limited += 1
+            wait = self.limiter.on_rate_limited()
+        else:
+            self.errors += 1
+            wait = self.limiter.on_error()
+
+        if self.failures >= self.UNHEALTHY_AFTER:
+            self.benched_until = self.limiter.clock() + self.UNHEALTHY_COOLDOWN
+            self.failures = 0
+            wait = self.UNHEALTHY_COOLDOWN
+        return wait
+
+
+class TrendsFetchPool:
+    """
+    Runs independent Trends queries concurrently over a pool of sessions.
+    Each query goes to whichever healthy session is free and ready first;
+    a 429 only cools down the session that got it, the others keep going.
+    """
+
+    def __init__(self, sessions, max_retries=3):
+        if not sessions:
+            raise ValueError("TrendsFetchPool needs at least one session")
+        self.sessions = sessions
+        self.max_retries = max_retries
+        self.cond = threading.Condition()
+
+        # Stats
+        self.retries = 0   # Attempts after the first one of a query
+        self.failed = 0    # Queries that used up every attempt
+
+    @classmethod
+    def from_proxies(cls, proxies, client_factory=None, limiter_factory=None, max_retries=3):
+        """One session per egress proxy; no proxies -> a single direct session."""
+        client_factory = client_factory or default_client_factory
+        limiter_factory = limiter_factory or AdaptiveRateLimiter
+        egress = list(proxies) or [None]
+        sessions = [
+            TrendsSession(f"s{i}:{proxy or 'direct'}", proxy, client_factory, limiter_factory())
+            for i, proxy in enumerate(egress)
+        ]
+        return cls(sessions, max_retries=max_retries)
+
+    def _checkout(self):
+        with self.cond:
+            while True:
+                free = [s for s in self.sessions if not s.busy]
+                if free:
+                    healthy = [s for s in free if s.healthy] or free
+                    session = min(healthy, key=lambda s: s.ready_at())
+                    session.busy = True
+                    return session
+                self.cond.wait()
+
+    def _release(self, session):
+        with self.cond:
+            session.busy = False
+            self.cond.notify_all()
+
+    def fetch(self, keywords, timeframe, geo, context="Data", on_rate_limit=None):
+        """
+        One query with retries (each retry may land on another session).
+        Returns None when every attempt failed.
+        """
+        for attempt in range(self.max_retries):
+            if attempt:
+                self.retries += 1
+            session = self._checkout()
+            try:
+                data = session.fetch(keywords, timeframe, geo)
+                session.mark_success()
+                return data
+            except Exception as e:
+                rate_limited = '429' in str(e)
+                wait = session.mark_failure(rate_limited)
+                if rate_limited and on_rate_limit:
+                    on_rate_limit(session, context, wait)
+            finally:
+                self._release(session)
+        self.failed += 1
+        return None
+
+    def map(self, fn, items):
+        """Runs fn over items with one worker per session, results in input order."""
+        items = list(items)
+        if len(items) <= 1 or len(self.sessions) == 1:
+            return [fn(item) for item in items]
+        with ThreadPoolExecutor(max_workers=len(self.sessions)) as executor:
+            return list(executor.map(fn, items))
+
+    @property
+    def rate(self):
+        return sum(s.limiter.rate for s in self.sessions if s.healthy)
+
+    def totals(self):
+        """Counters summed over every session."""
+        return {
+            'requests': sum(s.requests for s in self.sessions),
+            'rate_limited': sum(s.rate_limited for s in self.sessions),
+            'fetch_errors': sum(s.errors for s in self.sessions),
+            'retries': self.retries,
+            'failed_queries': self.failed,
+            'sleep_seconds': sum(s.limiter.waited for s in self.sessions),
+        }
+
+    def summary(self):
+        healthy = sum(1 for s in self.sessions if s.healthy)
+        t = self.totals()
+        return (f"🚦 Sessions: {healthy}/{len(self.sessions)} healthy | Rate: {self.rate:.1f} req/min | "
+                f"Requests: {t['requests']} | 429s: {t['rate_limited']} | Errors: {t['fetch_errors']} | "
+                f"Retries: {t['retries']} | Waited: {t['sleep_seconds']:.0f}s")
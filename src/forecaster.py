@@ -1,275 +1,692 @@
 import pandas as pd
-import time
-import random
 import os
+import sys
+import time
 import warnings
-from pytrends.request import TrendReq
-from statsmodels.tsa.holtwinters import ExponentialSmoothing
 from datetime import datetime
 
+# Allow `python src/forecaster.py` as well as `python -m src.forecaster`
+if __package__ in (None, ""):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.backtest import apply_selection, run_backtest, summary as backtest_summary
+from src.batch_forecast import STATUS_LABELS, STATUS_NO_DATA, STATUS_OK, monthly_frame, reference_forecast
+from src.checkpoint import CheckpointLog, export_report
+from src.fetch_pool import TrendsFetchPool, default_client_factory
+from src.history_store import SeriesHistory
+from src.metrics import RunMetrics
+from src.model_state import ModelStateStore, month_codes
+from src.planner import QueryPlan
+from src.rate_limiter import AdaptiveRateLimiter
+from src.report_store import write_store
+from src.series_cube import DIRECT, HIGH_GROWTH, LOW_GROWTH, PROXY, SeriesCube
+from src.settings import ForecasterConfig
+from src.trends_cache import TrendsCache
+
 # Suppress warnings
 warnings.filterwarnings("ignore")
 
-class BaliDemandForecaster:
-    def __init__(self):
-        # --- CONFIGURATION ---
-        self.BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        self.DISTRICT_FILE = os.path.join(self.BASE_DIR, 'data', 'raw', 'District_rows.csv')
-        self.SERVICE_FILE = os.path.join(self.BASE_DIR, 'data', 'raw', 'ServiceSubCategory_rows.csv')
-        self.OUTPUT_FILE = os.path.join(self.BASE_DIR, 'data', 'output', 'Bali_Forecast_Report_EN.xlsx')
-        
-        # Thresholds
-        self.VOLUME_THRESHOLD = 2.0  # If specific volume < 2.0, switch to proxy
-        self.REGION_THRESHOLD = 5.0  # If region score < 5.0, skip entire region
-        
-        # Exclusions
-        self.EXCLUDE_KEYWORDS = [
-            'Strip', 'Summerlin', 'Henderson', 'Paradise', 
-            'Spring', 'Enterprise', 'Downtown', 'Winchester', 'Sunrise', 'Whitney'
-        ]
-
-        # --- SMART MAPPING ---
-        # Key (English) -> Value (Indonesian Search Query)
-        # We search in Indo (Accurate), Report in English (Professional)
-        self.KEYWORD_MAP = {
-            "Motorbike": "Sewa Motor",
-            "Car": "Sewa Mobil",
-            "Horse Riding": "Berkuda",
-            "Nightclub": "Club Malam",
-            "Club Crawl": "Party Bali",
-            "Fishing": "Mancing",
-            "Beauty": "Salon",
-            "Tattoo": "Tattoo",
-            "Tour": "Paket Wisata",
-            "Silver Class": "Silver Class",
-            "Diving": "Diving",
-            "Surfing": "Surfing",
-            "Jeep": "Sewa Jeep",
-            "Bottle Service": "Bar Bali",
-            "Trekking": "Trekking",
-            "Dayclub": "Beach Club",
-            "Zoo": "Kebun Binatang",
-            "Hair Color": "Salon Rambut",
-            "Rafting": "Rafting",
-            "Shows": "Tari Bali",
-            "Boat": "Tiket Boat",
-            "Laundry": "Laundry",
-            "ATV": "Main ATV",
-            "Spa": "Spa"
-        }
-        
-        # Initialize Google Trends
-        self.pytrends = TrendReq(hl='en-US', tz=360)
+class BaliDemandForecaster(ForecasterConfig):
+    def __init__(self, client_factory=None, limiter_factory=None, work_dir=None, overrides=None, job="forecast"):
+        super().__init__(work_dir, overrides)  # --- CONFIGURATION --- paths, thresholds, rates (src/settings.py)
 
-    def load_data(self):
-        if not os.path.exists(self.DISTRICT_FILE) or not os.path.exists(self.SERVICE_FILE):
-            raise FileNotFoundError("❌ Raw data not found in data/raw/")
-        
-        print("📂 Loading Data...")
-        df_dist = pd.read_csv(self.DISTRICT_FILE)
-        df_clean_dist = df_dist[~df_dist['district'].str.contains('|'.join(self.EXCLUDE_KEYWORDS), case=False, na=False)]
-        districts = df_clean_dist['district'].unique().tolist()
-        
-        df_serv = pd.read_csv(self.SERVICE_FILE)
-        services = df_serv['name'].dropna().unique().tolist()
-        clean_services = [s.split('/')[0].strip() for s in services]
-        
-        return districts, clean_services
+        # Google Trends session pool (clients are created on first use)
+        self.pool = TrendsFetchPool.from_proxies(
+            self.PROXIES,
+            client_factory=client_factory or (lambda proxy: default_client_factory(proxy, hl=self.HL, tz=self.TZ)),
+            limiter_factory=limiter_factory or (lambda: AdaptiveRateLimiter(
+                rate_per_min=self.RATE_START, min_rate=self.RATE_MIN, max_rate=self.RATE_MAX
+            )),
+        )
+        self.cache = TrendsCache(self.CACHE_FILE, ttl_hours=self.CACHE_TTL_HOURS, max_mb=self.CACHE_MAX_MB)
+        self.history = SeriesHistory(self.HISTORY_FILE)
+        self.models = ModelStateStore(self.MODEL_STATE_FILE, refit_days=self.REFIT_DAYS,
+                                      drift_threshold=self.DRIFT_THRESHOLD)
+        self.metrics = RunMetrics(job)  # run_metrics_<job>.json: "forecast" is the sweep, other jobs don't overwrite it
+        self.cube = None  # Opened per run (axes come from the data)
+        self.proxy_data = pd.DataFrame()
 
-    def fetch_safe(self, keywords, context="Data"):
+    def open_cube(self, districts, services):
+        """Series cube grown to the districts/services of this run (CSV ids as labels, name if unknown)."""
+        self.cube = SeriesCube.open(
+            self.CUBE_DIR,
+            [(str(self.district_ids.get(d, d)), d) for d in districts],
+            [(str(self.service_ids.get(s, s)), s) for s in services],
+        )
+        return self.cube
+
+    def fetch_safe(self, keywords, context="Data", timeframe=None):
         """
-        Fetches data with AGGRESSIVE BACKOFF to prevent 429.
+        Fetches data through the session pool (AIMD token bucket per session).
+        Served from the cache when possible; only real requests take a token.
         """
-        attempts = 0
-        max_retries = 3
-        while attempts < max_retries:
-            try:
-                self.pytrends.build_payload(keywords, timeframe='today 12-m', geo='ID')
-                data = self.pytrends.interest_over_time()
-                return data
-            except Exception as e:
-                # If 429, sleep exponentially (60s -> 120s -> 180s)
-                if '429' in str(e):
-                    wait = 60 + (attempts * 60) 
-                    print(f"\n🛑 Rate Limit (429) at {context}. Sleeping {wait}s...", end="")
-                    time.sleep(wait)
-                else:
-                    # Other errors
-                    time.sleep(10)
-                
-                attempts += 1
-                self.pytrends = TrendReq(hl='en-US', tz=360) 
-        
-        return pd.DataFrame()
+        with self.metrics.timer("fetch_safe"):
+            timeframe = timeframe or self.TIMEFRAME
+            cache_key = TrendsCache.make_key(keywords, timeframe, self.GEO, self.HL, self.TZ)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+            # Waits for a free session + token; 429 cools down only that session
+            with self.metrics.timer("trends_request"):
+                data = self.pool.fetch(keywords, timeframe, self.GEO, context=context,
+                                       on_rate_limit=self.report_rate_limit)
+            if data is None:
+                return pd.DataFrame()
+            self.cache.put(cache_key, data)
+            return data
+
+    def report_rate_limit(self, session, context, wait):
+        print(f"\n🛑 Rate Limit (429) at {context} [{session.name}]. Cooling down {wait}s, rate -> {session.limiter.rate:.1f}/min...", end="")
+
+    def fetch_batched(self, keywords, context="Batch", timeframe=None):
+        """
+        Packs up to BATCH_SIZE keywords + the anchor into one payload.
+        Each batch is rescaled so its anchor averages ANCHOR_LEVEL. A batch
+        whose anchor is too small to set a scale (a much bigger term next to
+        it) is refetched one keyword per payload; a keyword that still dwarfs
+        the anchor is scaled through a chained anchor (see bridge_scale).
+        Nothing is mixed in on Google's raw scale, and nothing is dropped for it.
+        Full-window results are also stored as history for delta refreshes.
+        """
+        anchor = self.ANCHOR_KEYWORD
+        fetch = lambda chunk: self.fetch_safe(chunk + [anchor], context=context, timeframe=timeframe)
+
+        # Batches are independent -> spread them over the session pool
+        chunks = self.make_batches(keywords)
+        frames, unusable = self.rescale_batches(chunks, self.pool.map(fetch, chunks))
+
+        retry = [[kw] for cols, _ in unusable if len(cols) > 1 for kw in cols]
+        dominant = [(cols[0], data) for cols, data in unusable if len(cols) == 1]
+        if retry:
+            self.metrics.inc("anchor_refetches", len(retry))
+            more, unusable = self.rescale_batches(retry, self.pool.map(fetch, retry))
+            frames += more
+            dominant += [(cols[0], data) for cols, data in unusable]
+        if dominant:
+            frames += self.bridge_scale(dominant, frames, context, timeframe)
+
+        if not frames:
+            return pd.DataFrame()
+        data = pd.concat(frames, axis=1)
+        if timeframe in (None, self.TIMEFRAME):
+            with self.metrics.timer("history_save"):
+                self.history.save_frame(data)
+        return data
+
+    def rescale_batches(self, chunks, results):
+        """
+        Anchor-scaled frames of the usable batches + (keywords, raw data) of
+        the batches whose anchor mean is below ANCHOR_MIN_LEVEL.
+        """
+        anchor = self.ANCHOR_KEYWORD
+        frames, unusable = [], []
+        for chunk, data in zip(chunks, results):
+            if data.empty or anchor not in data.columns:
+                continue
+            cols = [kw for kw in chunk if kw in data.columns]
+            anchor_level = data[anchor].mean()
+            if anchor_level < self.ANCHOR_MIN_LEVEL:
+                unusable.append((cols, data))
+                continue
+            frames.append(data[cols].astype(float) * (self.ANCHOR_LEVEL / anchor_level))
+        return frames, unusable
+
+    def bridge_scale(self, dominant, frames, context="Batch", timeframe=None):
+        """
+        Scales keywords that dwarf the anchor even in their own payload
+        ([(keyword, its [keyword, anchor] data)]) through a chained anchor:
+        the biggest series already on the anchor scale is fetched next to the
+        keyword and sets the scale in its place. Each scaled keyword becomes a
+        bridge for the next round, so even bigger terms chain up. What no
+        bridge can reach keeps the coarse ratio of its own payload, the anchor
+        floored at ANCHOR_FLOOR (a lower bound), instead of going missing.
+        """
+        scaled = [frame[col] for frame in frames for col in frame.columns]
+        bridged = []
+        pending = dict(dominant)
+        while pending:
+            bridge = max(scaled, key=lambda series: series.mean(), default=None)
+            if bridge is None:
+                break
+            found = []
+            for kw in pending:
+                data = self.fetch_safe([kw, bridge.name], context=context, timeframe=timeframe)
+                if data.empty or bridge.name not in data.columns or kw not in data.columns:
+                    continue
+                bridge_level = data[bridge.name].mean()
+                if bridge_level >= self.ANCHOR_MIN_LEVEL:
+                    found.append(data[kw].astype(float) * (bridge.mean() / bridge_level))
+            if not found:
+                break  # Bigger than every bridge there is
+            for series in found:
+                del pending[series.name]
+            scaled += found
+            bridged += found
+            self.metrics.inc("anchor_bridged", len(found))
+
+        anchor = self.ANCHOR_KEYWORD
+        coarse = [data[kw].astype(float) * (self.ANCHOR_LEVEL / max(data[anchor].mean(), self.ANCHOR_FLOOR))
+                  for kw, data in pending.items()]
+        if coarse:
+            self.metrics.inc("anchor_coarse", len(coarse))
+            print(f"\n   ⚠️ {context}: no bridge for {', '.join(pending)} -> coarse anchor scale (lower bound)")
+        return [series.to_frame() for series in bridged + coarse]
 
     def calculate_forecast(self, series):
-        try:
-            series_monthly = series.resample('MS').mean()
-            avg_vol = series_monthly.mean()
-            
-            if series_monthly.index[-1].day < 28:
-                series_clean = series_monthly[:-1] 
-            else:
-                series_clean = series_monthly
-                
-            if len(series_clean) < 3: return 0, 0, 0
-
-            model = ExponentialSmoothing(series_clean, trend='add', seasonal=None).fit()
-            forecast = model.forecast(2)
-            next_val = forecast.iloc[-1]
-            curr_val = series_clean.iloc[-1]
-            
-            if curr_val == 0:
-                growth = 100 if next_val > 0.1 else 0
-            else:
-                growth = ((next_val - curr_val) / curr_val) * 100
-                
-            return next_val, growth, avg_vol
-        except:
-            return 0, 0, 0
+        """
+        Single-series wrapper around the vectorized Holt engine.
+        Returns (next_val, growth, avg_vol, status); failures get an explicit
+        status code instead of silent zeros.
+        """
+        return self.forecast_columns(series.to_frame()).get(series.name, (0, 0, 0, STATUS_NO_DATA))
+
+    def calculate_forecast_reference(self, series):
+        """Original statsmodels fit, kept to check the batch engine against."""
+        return reference_forecast(series)
+
+    def forecast_columns(self, data):
+        """
+        Forecasts every column of a fetched frame in one vectorized pass,
+        advancing stored model states where possible instead of refitting.
+        Returns {keyword: (next_val, growth, avg_vol, status)}.
+        """
+        if data.empty:
+            return {}
+        with self.metrics.timer("forecast"):
+            data = data.drop(columns=['isPartial'], errors='ignore').astype(float)
+            monthly, avg_volume = monthly_frame(data)
+            result = self.models.forecast(data.columns, monthly.to_numpy().T, month_codes(monthly.index))
+        self.metrics.inc("series_forecast", len(data.columns))
+        self.metrics.inc("fit_failures", int((result.status != STATUS_OK).sum()))
+        return {
+            kw: (result.forecast[i], result.growth[i], avg_volume[i], int(result.status[i]))
+            for i, kw in enumerate(data.columns)
+        }
 
     def run(self):
         districts, services = self.load_data()
+        self.open_cube(districts, services)
         
-        # Smart Resume
-        existing_data = []
-        processed_keys = set()
-        if os.path.exists(self.OUTPUT_FILE):
-            print(f"🔄 Resuming from: {self.OUTPUT_FILE}")
+        # Smart Resume (only the key sidecar is read, never the rows)
+        checkpoint = self.open_checkpoint()
+        if not checkpoint.exists() and os.path.exists(self.OUTPUT_FILE):
+            # One-time migration from the old Excel-only progress
+            print(f"📥 Importing progress from: {self.OUTPUT_FILE}")
             try:
-                df_exist = pd.read_excel(self.OUTPUT_FILE)
-                existing_data = df_exist.to_dict('records')
-                # Key based on English Service Name + District
-                processed_keys = set([f"{row['Service Category']} {row['District']}" for row in existing_data])
-            except: pass
+                checkpoint.append(pd.read_excel(self.OUTPUT_FILE).to_dict('records'))
+            except Exception as e:
+                print(f"⚠️ Could not import old report: {e}")
+
+        processed_keys = checkpoint.read_keys()
+        if processed_keys:
+            print(f"🔄 Resuming from: {self.CHECKPOINT_FILE} ({len(processed_keys)} cells done)")
         else:
-            print(f"🆕 Creating new report: {self.OUTPUT_FILE}")
+            print(f"🆕 Creating new checkpoint: {self.CHECKPOINT_FILE}")
 
-        print(f"🚀 ENGINE STARTED (Ultra-Safe Mode) | Queue: {len(districts)} Districts")
+        plan = self.build_plan(districts, services, processed_keys)
+        checkpoint.start_run(len(processed_keys) + len(plan.cells), len(processed_keys))  # Live view: progress / ETA
+        print(f"🚀 ENGINE STARTED | Queue: {len(plan.districts)} Districts, {len(plan.cells)} cells")
         print("-" * 60)
 
+        proxies, region_scores = {}, {}
         try:
-            for district in districts:
-                # 1. Region Check
-                proxy_kw = f"{district} Bali"
-                if f"{services[0]} {district}" in processed_keys: continue 
+            if plan.cells:
+                # 1. Bali-wide proxies first: a handful of requests for the whole sweep
+                print("\n🌴 BALI-WIDE PROXIES...", end=" ")
+                proxies = self.fetch_proxies(plan)
+                pruned = plan.prune(self.proxy_volumes(proxies), self.VOLUME_THRESHOLD)
+                missing = sum(1 for p in proxies.values() if p[3] == STATUS_NO_DATA)
+                print(f"{len(plan.all_search_kws) - len(pruned)} alive | {len(pruned)} dead island-wide -> pruned"
+                      + (f" | {missing} without data (not pruned)" if missing else ""))
+
+                # 2. Region checks (batched)
+                print("🗺️  REGION CHECKS...", end=" ")
+                region_scores = self.check_regions(plan)
+                plan.ordered_districts(region_scores)
+                print(f"{len(plan.active_districts(self.REGION_THRESHOLD))}/{len(plan.districts)} active")
 
+            # 3. Specific queries, most active districts first
+            for district in plan.ordered_districts(region_scores):
                 print(f"\n🌍 {district.upper()}...", end=" ")
-                
-                # Jeda Awal Wilayah (5-8 detik)
-                time.sleep(random.uniform(5, 8))
-                
-                region_data = self.fetch_safe([proxy_kw], context="Region")
-                
-                is_dead_region = True
-                if not region_data.empty and proxy_kw in region_data.columns:
-                    score = region_data[proxy_kw].mean()
-                    if score >= self.REGION_THRESHOLD:
-                        is_dead_region = False
-                        print(f"✅ ACTIVE (Avg: {score:.1f})")
-                    else:
-                        print(f"❌ QUIET (Avg: {score:.1f}) -> SKIP.")
+
+                score = region_scores.get(district)
+                if score is None:
+                    # Region fetch failed: nothing is checkpointed, the next run retries the district
+                    print(f"⚠️ NO REGION DATA -> retried next run.")
+                    continue
+                is_dead_region = score < self.REGION_THRESHOLD
+                if is_dead_region:
+                    print(f"❌ QUIET (Avg: {score:.1f}) -> SKIP.")
                 else:
-                    print(f"❌ EMPTY -> SKIP.")
-
-                # 2. Service Processing
-                batch_data = []
-                for item in services:
-                    # Search in Indo, Report in English
-                    indo_search_kw = self.KEYWORD_MAP.get(item, item)
-                    specific_kw_indo = f"{indo_search_kw} {district}"
-                    proxy_kw_indo = f"{indo_search_kw} Bali"
-                    
-                    resume_key = f"{item} {district}"
-                    if resume_key in processed_keys: continue
-
-                    row = {
-                        'District': district, 
-                        'Service Category': item, # English Output
-                        'Search Keyword': specific_kw_indo, # Tracking only
-                        'Data Source': "❌ Niche", 
-                        'Forecast Index': 0, 
-                        'Growth %': 0, 
-                        'Avg Volume': 0,
-                        'Market Status': "UNKNOWN", 
-                        'Recommended Action': "Check"
-                    }
-
-                    if is_dead_region:
-                        row.update({'Data Source': "❌ Skipped", 'Market Status': "➡️ STABLE", 'Recommended Action': "Maintain"})
-                        print(".", end="")
-                    else:
-                        print(f"\n   🔍 {specific_kw_indo:<30}", end=" ")
-                        
-                        # --- ULTRA SAFE SLEEP ---
-                        # Kita perlambat jadi 10-15 detik per request. 
-                        # Ini satu-satunya cara menghindari 429 di IP yang "lelah".
-                        time.sleep(random.uniform(10, 15)) 
-                        
-                        # Try Specific
-                        data = self.fetch_safe([specific_kw_indo], context="Service")
-                        use_proxy = False
-                        
-                        if not data.empty and specific_kw_indo in data.columns:
-                            series = data[specific_kw_indo]
-                            pred, growth, vol = self.calculate_forecast(series)
-                            
-                            if vol >= self.VOLUME_THRESHOLD:
-                                row.update({
-                                    'Data Source': "✅ Direct Data",
-                                    'Forecast Index': round(pred, 1),
-                                    'Growth %': round(growth, 1),
-                                    'Avg Volume': round(vol, 1)
-                                })
-                                print(f"Growth: {int(growth)}% (Vol: {vol:.1f})", end="")
-                            else:
-                                use_proxy = True
-                                print(f"Low Vol ({vol:.1f}) -> Proxy...", end="")
-                        else:
-                            use_proxy = True
-                            print(f"No Data -> Proxy...", end="")
-                        
-                        # Fallback Proxy
-                        if use_proxy:
-                            time.sleep(random.uniform(5, 8)) # Extra sleep for proxy
-                            proxy_data = self.fetch_safe([proxy_kw_indo], context="Proxy")
-                            
-                            if not proxy_data.empty and proxy_kw_indo in proxy_data.columns:
-                                series = proxy_data[proxy_kw_indo]
-                                pred, growth, _ = self.calculate_forecast(series)
-                                row.update({
-                                    'Data Source': "🔄 Proxy (Bali Trend)",
-                                    'Forecast Index': round(pred, 1),
-                                    'Growth %': round(growth, 1)
-                                })
-                                print(f" [PROXY] Growth: {int(growth)}%", end="")
-                            else:
-                                print(" Empty.", end="")
-                        
-                        # English Status Logic
-                        g = row['Growth %']
-                        ds = row['Data Source']
-                        
-                        if "✅" in ds or "🔄" in ds:
-                            if g > 20: row['Market Status'], row['Recommended Action'] = "🔥 HIGH DEMAND", "Increase Inventory"
-                            elif g < -15: row['Market Status'], row['Recommended Action'] = "❄️ LOW DEMAND", "Discount / Bundle"
-                            else: row['Market Status'], row['Recommended Action'] = "➡️ STABLE", "Maintain Stock"
-                        elif "Niche" in ds:
-                             row['Market Status'], row['Recommended Action'] = "💤 LOW VOLUME", "Organic Only"
-
-                    batch_data.append(row)
-                    processed_keys.add(resume_key)
-
-                # Save Batch
-                if batch_data:
-                    existing_data.extend(batch_data)
-                    pd.DataFrame(existing_data).to_excel(self.OUTPUT_FILE, index=False)
+                    print(f"✅ ACTIVE (Avg: {score:.1f})")
+
+                batch_data, retry = self.process_district(plan, district, is_dead_region, proxies)
+                if retry:
+                    print(f"\n   ⚠️ {len(retry)} cells without proxy data -> retried next run", end="")
+
+                # Save Batch (append + fsync, earlier progress is never rewritten)
+                checkpoint.append([row for row in batch_data if row['Service Category'] not in retry])
         
         except KeyboardInterrupt:
             print("\n🛑 PAUSED BY USER. Data saved.")
 
-        print(f"\n✅ DONE. Output: {self.OUTPUT_FILE}")
+        self.finish()
+        self.export_report()
+
+    def finish(self):
+        """End-of-run summaries + model state / cube flush."""
+        print(f"\n{self.cache.summary()}")
+        print(self.pool.summary())
+        print(self.models.summary())
+        self.models.flush()
+        if self.cube is not None:
+            print(self.cube.summary())
+            self.cube.flush()
+
+    def write_metrics(self):
+        """Collects the component counters and writes the JSON + Prometheus run summary."""
+        self.metrics.update(
+            cache_hits=self.cache.hits,
+            cache_misses=self.cache.misses,
+            model_refits=self.models.refits,
+            model_drifted=self.models.drifted,
+            model_advanced=self.models.advanced,
+            model_reused=self.models.reused,
+            **self.pool.totals(),
+        )
+        print(self.metrics.summary())
+        json_path, prom_path = self.metrics.write(self.METRICS_DIR)
+        print(f"📈 Metrics: {json_path} (+ .prom)")
+        return json_path, prom_path
+
+    def build_plan(self, districts, services, processed_keys=()):
+        return QueryPlan(districts, services, self.KEYWORD_MAP, processed_keys)
+
+    def fetch_proxies(self, plan):
+        """Stage 1: {search keyword: (pred, growth, vol, status)} of its Bali-wide query."""
+        self.proxy_data = self.fetch_batched(plan.proxy_keywords(), context="Proxy")
+        forecasts = self.forecast_columns(self.proxy_data)
+        return {kw: forecasts.get(plan.proxy_kw(kw), (0, 0, 0, STATUS_NO_DATA)) for kw in plan.all_search_kws}
+
+    @staticmethod
+    def proxy_volumes(proxies):
+        """{search keyword: Bali-wide volume} for pruning; only proxies with a usable forecast."""
+        return {kw: p[2] for kw, p in proxies.items() if p[3] == STATUS_OK}
+
+    def check_regions(self, plan):
+        """Stage 2: {district: avg score}; districts without data are left out."""
+        data = self.fetch_batched(plan.region_keywords(), context="Region")
+        return {
+            district: data[plan.region_kw(district)].mean()
+            for district in plan.districts
+            if plan.region_kw(district) in data.columns
+        }
+
+    def process_district(self, plan, district, is_dead_region, proxies):
+        """
+        Stage 3 for one district: batched specific queries + proxy fallback.
+        Returns (report rows, services to retry): cells that needed the proxy
+        while its Bali-wide fetch returned no data are not final.
+        """
+        forecasts, data = {}, pd.DataFrame()
+        if not is_dead_region:
+            specific_kws = plan.specific_keywords(district)
+            if specific_kws:
+                print(f"   📦 {len(specific_kws)} queries -> {-(-len(specific_kws) // self.BATCH_SIZE)} batches", end="")
+                data = self.fetch_batched(specific_kws, context="Service")
+                forecasts = self.forecast_columns(data)
+
+        batch_data = []
+        retry = set()
+        cells = {}  # Series behind each reported cell -> cube
+        for item, search_kw in plan.cells_for(district):
+            # Search in Indo, Report in English
+            specific_kw_indo = plan.specific_kw(search_kw, district)
+            row = {
+                'District': district, 
+                'Service Category': item, # English Output
+                'Search Keyword': specific_kw_indo, # Tracking only
+                'Data Source': "❌ Niche", 
+                'Forecast Index': 0, 
+                'Growth %': 0, 
+                'Avg Volume': 0,
+                'Market Status': "UNKNOWN", 
+                'Recommended Action': "Check",
+                'Forecast Status': "-"
+            }
+            batch_data.append(row)
+
+            if is_dead_region:
+                row.update({'Data Source': "❌ Skipped", 'Market Status': "➡️ STABLE", 'Recommended Action': "Maintain"})
+                print(".", end="")
+                continue
+
+            print(f"\n   🔍 {specific_kw_indo:<30}", end=" ")
+            use_proxy = True
+            if search_kw in plan.pruned:
+                print("Dead island-wide (pruned) -> Proxy...", end="")
+            else:
+                pred, growth, vol, status = forecasts.get(specific_kw_indo, (0, 0, 0, STATUS_NO_DATA))
+                row['Forecast Status'] = STATUS_LABELS[status]
+                if status != STATUS_OK:
+                    print(f"{STATUS_LABELS[status]} -> Proxy...", end="")
+                elif vol < self.VOLUME_THRESHOLD:
+                    print(f"Low Vol ({vol:.1f}) -> Proxy...", end="")
+                else:
+                    use_proxy = False
+                    cells[item] = (data[specific_kw_indo], DIRECT)
+                    row.update({
+                        'Data Source': "✅ Direct Data",
+                        'Forecast Index': round(pred, 1),
+                        'Growth %': round(growth, 1),
+                        'Avg Volume': round(vol, 1)
+                    })
+                    print(f"Growth: {int(growth)}% (Vol: {vol:.1f})", end="")
+
+            # Fallback Proxy (already fetched once for the whole sweep)
+            if use_proxy:
+                pred, growth, _, status = proxies.get(search_kw, (0, 0, 0, STATUS_NO_DATA))
+                if status == STATUS_OK:
+                    cells[item] = (self.proxy_data[plan.proxy_kw(search_kw)], PROXY)
+                    row.update({
+                        'Data Source': "🔄 Proxy (Bali Trend)",
+                        'Forecast Index': round(pred, 1),
+                        'Growth %': round(growth, 1),
+                        'Forecast Status': STATUS_LABELS[status]
+                    })
+                    print(f" [PROXY] Growth: {int(growth)}%", end="")
+                else:
+                    if status == STATUS_NO_DATA:
+                        retry.add(item)  # Proxy fetch failed, not an empty market
+                    print(f" Empty ({STATUS_LABELS[status]}).", end="")
+
+            self.classify(row)
+
+        if cells and self.cube is not None:
+            with self.metrics.timer("cube_put"):
+                self.cube.put(district, cells)
+        return batch_data, retry
+
+    @staticmethod
+    def classify(row):
+        """English Status Logic"""
+        g = row['Growth %']
+        ds = row['Data Source']
+        
+        if "✅" in ds or "🔄" in ds:
+            if g > HIGH_GROWTH: row['Market Status'], row['Recommended Action'] = "🔥 HIGH DEMAND", "Increase Inventory"
+            elif g < LOW_GROWTH: row['Market Status'], row['Recommended Action'] = "❄️ LOW DEMAND", "Discount / Bundle"
+            else: row['Market Status'], row['Recommended Action'] = "➡️ STABLE", "Maintain Stock"
+        elif "Niche" in ds:
+             row['Market Status'], row['Recommended Action'] = "💤 LOW VOLUME", "Organic Only"
+
+    def forecast_cell(self, district, service):
+        """
+        On-demand report row for one (district, service) cell (src/serve.py):
+        the sweep's three stages for that cell only, each one cached batch.
+        """
+        plan = self.build_plan([district], [service])
+        proxies = self.fetch_proxies(plan)
+        plan.prune(self.proxy_volumes(proxies), self.VOLUME_THRESHOLD)
+        score = self.check_regions(plan).get(district)
+        if score is None:
+            raise RuntimeError(f"No region data for {district} (Trends fetch failed)")
+        rows, retry = self.process_district(plan, district, score < self.REGION_THRESHOLD, proxies)
+        if retry:
+            raise RuntimeError(f"No Bali-wide proxy data for {service} (Trends fetch failed)")
+        return rows[0]
+
+    def refresh(self):
+        """
+        Delta refresh: fetches only REFRESH_TIMEFRAME for every keyword behind
+        the report, splices it onto the stored weekly history (rescaled on the
+        overlapping weeks) and re-forecasts only cells whose input changed.
+        Keywords that can't be spliced fall back to a full-window fetch.
+        """
+        df = self.open_checkpoint().to_frame()
+        if df.empty:
+            print("⚠️ No previous run to refresh. Run the full sweep first.")
+            return
+
+        rows = df.to_dict('records')
+        cell_kws = {}
+        for row in rows:
+            if "Skipped" in str(row['Data Source']):
+                continue
+            search_kw = self.KEYWORD_MAP.get(row['Service Category'], row['Service Category'])
+            cell_kws[id(row)] = (row['Search Keyword'], QueryPlan.proxy_kw(search_kw))
+        keywords = list(dict.fromkeys(kw for pair in cell_kws.values() for kw in pair))
+
+        print(f"🔁 DELTA REFRESH | {len(keywords)} keywords | window: {self.REFRESH_TIMEFRAME}")
+        recent = self.fetch_batched(keywords, context="Refresh", timeframe=self.REFRESH_TIMEFRAME)
+
+        changed, series, full = set(), {}, []
+        for kw in keywords:
+            spliced, kw_changed = (None, False)
+            if kw in recent.columns:
+                spliced, kw_changed = self.history.splice(kw, recent[kw])
+            if spliced is None:
+                full.append(kw)
+                continue
+            series[kw] = spliced
+            if kw_changed:
+                changed.add(kw)
+
+        if full:
+            # No usable overlap (new keyword / history gone): full window for those only
+            print(f"   ↪️ {len(full)} keywords without usable history -> full fetch")
+            data = self.fetch_batched(full, context="Refresh (full)")
+            for kw in full:
+                if kw in data.columns:
+                    series[kw] = self.history.load(kw)
+                    changed.add(kw)
+
+        print(f"   ✅ {len(changed)} changed | {len(keywords) - len(changed)} unchanged -> not re-forecast")
+        if not changed:
+            self.finish()
+            return
+
+        # Changed keywords + proxies of cells whose specific query changed
+        # (volume may have dropped below the threshold -> proxy fallback)
+        affected = [kws for kws in cell_kws.values() if set(kws) & changed]
+        to_forecast = changed | {proxy_kw for specific_kw, proxy_kw in affected if specific_kw in changed}
+        frame = pd.concat([series[kw].iloc[-self.FORECAST_WEEKS:] for kw in to_forecast if kw in series], axis=1)
+        forecasts = self.forecast_columns(frame)
+
+        updated = []
+        cube_cells = {}
+        for row in rows:
+            kws = cell_kws.get(id(row))
+            if kws is None or not (set(kws) & changed):
+                continue
+            specific_kw, proxy_kw = kws
+            is_direct = "✅" in str(row['Data Source'])
+            if is_direct and specific_kw not in changed:
+                continue  # Only its proxy changed, which it doesn't use
+
+            row = dict(row)
+            pred, growth, vol, status = forecasts.get(specific_kw, (0, 0, 0, STATUS_NO_DATA))
+            if specific_kw in changed and status == STATUS_OK and vol >= self.VOLUME_THRESHOLD:
+                row.update({'Data Source': "✅ Direct Data", 'Avg Volume': round(vol, 1)})
+                cell = (series[specific_kw].iloc[-self.FORECAST_WEEKS:], DIRECT)
+            else:
+                pred, growth, _, status = forecasts.get(proxy_kw, (0, 0, 0, STATUS_NO_DATA))
+                if status != STATUS_OK:
+                    continue
+                row.update({'Data Source': "🔄 Proxy (Bali Trend)", 'Avg Volume': 0})
+                cell = (series[proxy_kw].iloc[-self.FORECAST_WEEKS:], PROXY)
+            cube_cells.setdefault(row['District'], {})[row['Service Category']] = cell
+
+            row.update({
+                'Forecast Index': round(pred, 1),
+                'Growth %': round(growth, 1),
+                'Forecast Status': STATUS_LABELS[status]
+            })
+            self.classify(row)
+            updated.append(row)
+
+        # Last write wins per key on export
+        self.open_checkpoint().append(updated)
+        if cube_cells:
+            self.open_cube(df['District'].unique(), df['Service Category'].unique())
+            for district, cells in cube_cells.items():
+                self.cube.put(district, cells)
+        print(f"   🔄 {len(updated)} cells re-forecast")
+        self.finish()
+        self.export_report()
+
+    def plan(self):
+        """
+        Dry run: builds the query plan and prints the estimated request count
+        and wall-clock time. Nothing is sent; cached stages are used to prune.
+        """
+        districts, services = self.load_data()
+        plan = self.build_plan(districts, services, self.open_checkpoint().read_keys())
+
+        cached = 0
+        active = None
+        proxy_keys = self.batch_cache_keys(plan.proxy_keywords())
+        if all(self.cache.contains(key) for key in proxy_keys):
+            proxies = self.fetch_proxies(plan)
+            plan.prune(self.proxy_volumes(proxies), self.VOLUME_THRESHOLD)
+            cached += len(proxy_keys)
+
+        region_keys = self.batch_cache_keys(plan.region_keywords())
+        if all(self.cache.contains(key) for key in region_keys):
+            plan.ordered_districts(self.check_regions(plan))
+            active = plan.active_districts(self.REGION_THRESHOLD)
+            cached += len(region_keys)
+
+        print(plan.describe(self.BATCH_SIZE, self.RATE_START, sessions=len(self.pool.sessions),
+                            cached=cached, active_districts=active))
+        if active is None:
+            print("   (Upper bound: region checks not cached yet, all districts counted as active)")
+        self.models.flush()
+        return plan
+
+    def enqueue(self, queue):
+        """
+        Work-queue planner: stages 1-2 (proxies, region checks) once, then one
+        task per (district, service) still to do, most active districts first.
+        """
+        districts, services = self.load_data()
+        plan = self.build_plan(districts, services, self.open_checkpoint().read_keys())
+        region_scores = {}
+        if plan.cells:
+            print("🌴 BALI-WIDE PROXIES + 🗺️ REGION CHECKS...")
+            self.fetch_proxies(plan)
+            region_scores = self.check_regions(plan)
+
+        tasks = [(district, item, kw, region_scores.get(district))
+                 for district in plan.ordered_districts(region_scores)
+                 for item, kw in plan.cells_for(district)]
+        added = queue.enqueue(tasks)
+        print(f"📬 {added} new tasks ({len(tasks) - added} already queued) -> {queue.path}")
+        print(queue.summary())
+        self.models.flush()
+        return added
+
+    def work(self, queue, worker):
+        """
+        Work-queue worker: leases the cells of one district at a time, keeps the
+        lease alive while fetching, commits the report rows to the queue.
+        Exits when nothing is pending or leased by anyone any more.
+        """
+        districts, services = self.load_data()
+        proxies = self.fetch_proxies(self.build_plan(districts, services))  # Same batches as the planner
+        volumes = self.proxy_volumes(proxies)
+        print(f"👷 WORKER {worker} | {queue.summary()}")
+
+        while True:
+            tasks = queue.lease(worker, self.QUEUE_BATCH, self.LEASE_SECONDS)
+            if not tasks:
+                if queue.counts()['leased']:
+                    time.sleep(self.QUEUE_POLL_SECONDS)  # Someone may still die -> their cells come back
+                    continue
+                break
+
+            district, score = tasks[0].district, tasks[0].region_score
+            plan = QueryPlan([district], [t.service for t in tasks], self.KEYWORD_MAP)
+            plan.prune(volumes, self.VOLUME_THRESHOLD)
+            print(f"\n🌍 {district.upper()} ({len(tasks)} cells)...", end=" ")
+
+            ids = [t.id for t in tasks]
+            try:
+                with queue.heartbeat(worker, ids, self.LEASE_SECONDS) as beat:
+                    if score is None:
+                        # The planner's region fetch failed for this district -> ask again
+                        score = self.check_regions(plan).get(district)
+                    if score is None:
+                        raise RuntimeError("No region data (Trends fetch failed)")
+                    rows, retry = self.process_district(plan, district, score < self.REGION_THRESHOLD, proxies)
+            except KeyboardInterrupt:
+                queue.release(worker, ids)
+                print("\n🛑 PAUSED BY USER. Lease released.")
+                break
+            except Exception as e:
+                print(f"\n⚠️ {district}: {e} -> back to the queue")
+                queue.fail(worker, ids, e)
+                self.metrics.inc("tasks_failed", len(ids))
+                continue
+
+            if retry:
+                # No proxy data: back to the queue (failed after MAX_ATTEMPTS) instead of a final row
+                queue.fail(worker, [t.id for t in tasks if t.service in retry], "No Bali-wide proxy data")
+                self.metrics.inc("tasks_failed", len(retry))
+            by_service = {row['Service Category']: row for row in rows}
+            accepted = queue.complete(worker, {t.id: by_service[t.service] for t in tasks if t.service not in retry})
+            self.metrics.inc("tasks_completed", accepted)
+            if beat.lost or accepted < len(tasks) - len(retry):
+                print(f"\n   ⚠️ Lease lost: {len(tasks) - len(retry) - accepted} cells already done by another worker")
+
+        self.metrics.update(tasks_leased=queue.leased, tasks_reclaimed=queue.reclaimed,
+                            tasks_rejected=queue.rejected)
+        print(f"\n👷 {worker} finished: {queue.completed} cells committed | {queue.summary()}")
+        self.finish()
+
+    def collect(self, queue):
+        """Coordinator: moves finished queue rows into the checkpoint (new keys only) and exports."""
+        checkpoint = self.open_checkpoint()
+        done = checkpoint.read_keys()
+        rows = [row for row in queue.results() if checkpoint.key_fn(row) not in done]
+        checkpoint.append(rows)
+        print(f"📥 {len(rows)} rows from the queue -> {self.CHECKPOINT_FILE}")
+        print(queue.summary())
+        return self.export_report()
+
+    def backtest(self):
+        """Rolling-origin backtest of every cube series, picks a model per cell, re-exports the report."""
+        if not os.path.exists(os.path.join(self.CUBE_DIR, 'index.json')):
+            print("⚠️ No stored series to backtest. Run the full sweep first.")
+            return []
+        with self.metrics.timer("backtest"):
+            df = run_backtest(self.CUBE_DIR, workers=self.BACKTEST_WORKERS)
+            export_report(df, self.BACKTEST_FILE, formats=("csv",))
+        self.metrics.inc("series_backtested", len(df))
+        print(backtest_summary(df))
+        return self.export_report()
+
+    def export_report(self):
+        """Writes the Excel (+ extra formats) report once from the checkpoint."""
+        df = self.open_checkpoint().to_frame()
+        if df.empty:
+            print("⚠️ Nothing to export yet.")
+            return []
+        if os.path.exists(self.BACKTEST_FILE):
+            if os.path.getmtime(self.BACKTEST_FILE) >= os.path.getmtime(self.CHECKPOINT_FILE):
+                df = apply_selection(df, pd.read_csv(self.BACKTEST_FILE))
+            else:
+                print("⚠️ Backtest is older than the checkpoint -> Holt forecasts only (rerun --backtest).")
+        with self.metrics.timer("export"):
+            written = export_report(df, self.OUTPUT_FILE, formats=self.EXPORT_FORMATS)
+        with self.metrics.timer("dashboard_store"):
+            written.append(write_store(df, self.DASHBOARD_DIR))
+        for path in written:
+            print(f"\n✅ DONE. Output: {path}")
+        return written
 
 if __name__ == "__main__":
-    forecaster = BaliDemandForecaster()
-    forecaster.run()
\ No newline at end of file
+    # One command line for everything (src/cli.py); without a command this runs the sweep
+    from src import cli
+    cli.main(sys.argv[1:] or ["fetch"])
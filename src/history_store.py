@@ -0,0 +1,184 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.batch_forecast import monthly_frame, to_monthly
+
+
+def to_weekly(series):
+    """Daily/weekly Trends series (or frame of them) -> weekly means indexed by week start (Sunday), like Trends' weekly data."""
+    series = series.dropna(how="all") if isinstance(series, pd.DataFrame) else series.dropna()
+    if series.empty:
+        return series
+    periods = series.index.to_period("W-SAT")
+    weekly = series.groupby(periods).mean()
+    weekly.index = weekly.index.start_time
+    return weekly
+
+
+def forecast_input(series):
+    """What the forecast actually sees: the complete monthly means."""
+    if series.empty:
+        return []
+    Y, _ = to_monthly(series.to_frame())
+    return [round(float(v), 2) for v in Y[0]]
+
+
+def input_changed(new, old, rtol=0.05, atol=0.5):
+    """
+    New/removed month, or a month that moved by more than the tolerance.
+    The tolerance absorbs Trends' integer rounding after rescaling a short window.
+    """
+    if old is None or len(new) != len(old):
+        return True
+    new, old = np.array(new, dtype=float), np.array(old, dtype=float)
+    return not np.allclose(new, old, rtol=rtol, atol=atol, equal_nan=True)
+
+
+class SeriesHistory:
+    """
+    Stored raw weekly series per keyword (anchor-relative scale) with the time
+    it was last fetched and the monthly values the forecast used.
+    Lets a refresh fetch only a short recent window and splice it on.
+    """
+
+    MIN_OVERLAP = 2  # Overlapping weeks needed to rescale a short window
+
+    def __init__(self, path, keep_weeks=156):
+        self.path = path
+        self.keep_weeks = keep_weeks
+        self.lock = threading.RLock()
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS points ("
+            " keyword TEXT NOT NULL, week TEXT NOT NULL, value REAL NOT NULL,"
+            " PRIMARY KEY (keyword, week))"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS meta ("
+            " keyword TEXT PRIMARY KEY, last_fetched REAL NOT NULL, digest TEXT NOT NULL)"
+        )
+        self.conn.commit()
+
+    def load(self, keyword):
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT week, value FROM points WHERE keyword = ? ORDER BY week", (keyword,)
+            ).fetchall()
+        if not rows:
+            return pd.Series(dtype=float, name=keyword)
+        weeks, values = zip(*rows)
+        return pd.Series(values, index=pd.to_datetime(weeks), name=keyword, dtype=float)
+
+    def last_fetched(self, keyword):
+        with self.lock:
+            row = self.conn.execute("SELECT last_fetched FROM meta WHERE keyword = ?", (keyword,)).fetchone()
+        return row[0] if row else None
+
+    def digest(self, keyword):
+        """Monthly forecast input stored with the series (None if unknown)."""
+        with self.lock:
+            row = self.conn.execute("SELECT digest FROM meta WHERE keyword = ?", (keyword,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def newest_weeks(self, keywords):
+        """Newest stored week per keyword (keywords without a stored series are left out)."""
+        placeholders = ",".join("?" * len(keywords))
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT keyword, MAX(week) FROM points WHERE keyword IN ({placeholders}) GROUP BY keyword",
+                list(keywords),
+            ).fetchall()
+        return {keyword: pd.Timestamp(week) for keyword, week in rows}
+
+    def _write(self, keyword, weeks, values, digest):
+        self.conn.execute("DELETE FROM points WHERE keyword = ?", (keyword,))
+        self.conn.executemany(
+            "INSERT INTO points (keyword, week, value) VALUES (?, ?, ?)",
+            [(keyword, week, float(value)) for week, value in zip(weeks, values)],
+        )
+        self.conn.execute(
+            "INSERT OR REPLACE INTO meta (keyword, last_fetched, digest) VALUES (?, ?, ?)",
+            (keyword, time.time(), digest),
+        )
+
+    def save(self, keyword, series):
+        """Replaces the stored series of `keyword`. Returns True if the forecast input changed."""
+        series = to_weekly(series.astype(float)).iloc[-self.keep_weeks:]
+        months = forecast_input(series)
+        changed = input_changed(months, self.digest(keyword))
+
+        with self.lock:
+            self._write(keyword, series.index.strftime("%Y-%m-%d"), series.to_numpy(), json.dumps(months))
+            self.conn.commit()
+        return changed
+
+    def save_frame(self, frame):
+        """
+        Stores every column of a full-window fetch, unless a refresh already stored newer weeks.
+        Columns without gaps share the index, so they are resampled together and written in one transaction.
+        """
+        frame = frame.drop(columns=["isPartial"], errors="ignore").astype(float)
+        newest = self.newest_weeks(list(frame.columns)) if len(frame.columns) else {}
+        complete = frame.columns[frame.notna().all().to_numpy()].tolist()
+
+        for keyword in frame.columns:
+            if keyword in complete:
+                continue
+            series = frame[keyword].dropna()
+            if series.empty or (keyword in newest and to_weekly(series).index[-1] < newest[keyword]):
+                continue
+            self.save(keyword, series)
+
+        if not complete or frame.empty:
+            return
+        weekly = to_weekly(frame[complete]).iloc[-self.keep_weeks:]
+        complete = [kw for kw in complete if kw not in newest or weekly.index[-1] >= newest[kw]]
+        if not complete:
+            return
+        monthly, _ = monthly_frame(weekly[complete])
+        weeks = weekly.index.strftime("%Y-%m-%d")
+
+        with self.lock:
+            for keyword in complete:
+                months = [round(float(v), 2) for v in monthly[keyword]]
+                self._write(keyword, weeks, weekly[keyword].to_numpy(), json.dumps(months))
+            self.conn.commit()
+
+    def splice(self, keyword, recent):
+        """
+        Rescales a short recent window onto the stored series using the
+        overlapping weeks, then overwrites/extends the stored weeks with it.
+        Returns (spliced series or None if it can't be spliced, changed).
+        """
+        stored = self.load(keyword)
+        weekly = to_weekly(recent.astype(float))
+        if stored.empty or weekly.empty:
+            return None, False
+
+        # First/last week of the window and newest stored week may be partial
+        # -> not a fair reference for the scale
+        overlap = stored.index.intersection(weekly.index[1:-1])
+        overlap = overlap[overlap < stored.index[-1]]
+        ratios = stored[overlap] / weekly[overlap]
+        ratios = ratios[np.isfinite(ratios) & (ratios > 0)]
+
+        if len(ratios) < self.MIN_OVERLAP:
+            if (stored[overlap] == 0).all() and (weekly[overlap] == 0).all() and len(overlap) >= self.MIN_OVERLAP:
+                scale = 1.0  # Flat zero on both sides, nothing to rescale
+            else:
+                return None, False
+        else:
+            scale = float(np.median(ratios))
+
+        cutover = weekly.index[1] if len(weekly) > 1 else weekly.index[0]
+        merged = pd.concat([stored[stored.index < cutover], weekly[weekly.index >= cutover] * scale])
+        changed = self.save(keyword, merged)
+        return self.load(keyword), changed
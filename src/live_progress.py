@@ -0,0 +1,146 @@
+"""
+Live progress of a running sweep, read from its checkpoint log.
+
+    live = LiveProgress(FORECAST)          # or OTA
+    new_rows = live.refresh()              # only parses what was appended
+    live.done, live.total, live.rate(), live.eta()
+
+Every aggregate is kept up to date row by row (last write wins per key, like
+CheckpointLog.to_frame), so a refresh costs time in the new rows only.
+"""
+import heapq
+import os
+import time
+from collections import Counter, deque, namedtuple
+
+from src.checkpoint import CheckpointTail, read_run
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+OUTPUT_DIR = os.path.join(BASE_DIR, 'data', 'output')
+
+# How to read the rows of one checkpoint: resume key, status column, numeric value column
+Source = namedtuple("Source", ["name", "path", "key_fn", "status_col", "value_col", "label_cols"])
+
+FORECAST = Source(
+    "Forecaster", os.path.join(OUTPUT_DIR, 'forecast_checkpoint.jsonl'),
+    lambda row: f"{row['Service Category']} {row['District']}",
+    'Market Status', 'Growth %', ('District', 'Service Category'),
+)
+OTA = Source(
+    "OTA Scraper", os.path.join(OUTPUT_DIR, 'ota_checkpoint.jsonl'),
+    lambda row: row['District'],
+    'Supply Status', 'Available Properties', ('District',),
+)
+SOURCES = {source.name: source for source in (FORECAST, OTA)}
+
+RATE_WINDOW = 300  # Seconds of samples behind the live rows/min
+
+
+class LiveProgress:
+    """
+    Running aggregates of one checkpoint: rows per status, value sum, top N
+    by value, the last rows and (time, rows) samples for throughput / ETA.
+    """
+
+    TOP_N = 10
+    RECENT_ROWS = 20
+    MAX_SAMPLES = 10_000
+
+    def __init__(self, source, path=None):
+        self.source = source
+        self.tail = CheckpointTail(path or source.path)
+        self._reset()
+
+    def _reset(self):
+        self.latest = {}            # key -> (status, value, labels)
+        self.status_counts = Counter()
+        self.value_sum = 0.0
+        self.top = []               # min-heap of (value, key); entries go stale when a key is rewritten
+        self.recent = deque(maxlen=self.RECENT_ROWS)
+        self.samples = deque(maxlen=self.MAX_SAMPLES)
+        self.rows_read = 0
+
+    @property
+    def done(self):
+        return len(self.latest)
+
+    @property
+    def total(self):
+        run = read_run(self.tail.path)
+        return max(run["total"], self.done) if run else None
+
+    def refresh(self, now=None):
+        """Folds the rows appended since the last refresh into the aggregates, returns how many."""
+        rows, reset = self.tail.read_new()
+        if reset:
+            self._reset()
+        for row in rows:
+            self._add(row)
+        self.rows_read += len(rows)
+        self.samples.append((now if now is not None else time.time(), self.done))
+        return len(rows)
+
+    def _add(self, row):
+        key = self.source.key_fn(row)
+        status = str(row.get(self.source.status_col, "UNKNOWN"))
+        try:
+            value = float(row.get(self.source.value_col) or 0)
+        except (TypeError, ValueError):
+            value = 0.0
+
+        old = self.latest.get(key)
+        if old is not None:
+            self.status_counts[old[0]] -= 1
+            if not self.status_counts[old[0]]:
+                del self.status_counts[old[0]]
+            self.value_sum -= old[1]
+        self.latest[key] = (status, value, tuple(row.get(col) for col in self.source.label_cols))
+        self.status_counts[status] += 1
+        self.value_sum += value
+        self.recent.append(row)
+
+        if len(self.top) < self.TOP_N:
+            heapq.heappush(self.top, (value, key))
+        elif value > self.top[0][0]:
+            heapq.heapreplace(self.top, (value, key))
+
+    def average(self):
+        return self.value_sum / self.done if self.done else 0.0
+
+    def top_rows(self):
+        """Top N rows by value, highest first, as {label cols, status, value} dicts."""
+        valid = {key: value for value, key in self.top if self.latest[key][1] == value}
+        if len(valid) < min(self.TOP_N, self.done):
+            # Rare: a top key was rewritten with a lower value -> one full pass
+            self.top = heapq.nlargest(self.TOP_N, ((v, k) for k, (_, v, _) in self.latest.items()))
+            heapq.heapify(self.top)
+            valid = {key: value for value, key in self.top}
+
+        rows = []
+        for key, value in sorted(valid.items(), key=lambda item: -item[1]):
+            status, _, labels = self.latest[key]
+            rows.append({**dict(zip(self.source.label_cols, labels)),
+                         self.source.status_col: status, self.source.value_col: value})
+        return rows
+
+    def rate(self, window=RATE_WINDOW):
+        """Rows per second: over the last `window` seconds of samples, else the run average from the .run sidecar."""
+        if len(self.samples) >= 2:
+            t_end, n_end = self.samples[-1]
+            t_start, n_start = next(((t, n) for t, n in self.samples if t >= t_end - window), self.samples[0])
+            if t_end > t_start and n_end > n_start:
+                return (n_end - n_start) / (t_end - t_start)
+
+        run = read_run(self.tail.path)
+        if run:
+            elapsed = time.time() - run["started_at"]
+            if elapsed > 0:
+                return max(self.done - run.get("done_at_start", 0), 0) / elapsed
+        return 0.0
+
+    def eta(self):
+        """Seconds left (None while the rate or the total is unknown)."""
+        total, rate = self.total, self.rate()
+        if total is None or rate <= 0:
+            return None
+        return max(total - self.done, 0) / rate
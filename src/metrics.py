@@ -0,0 +1,157 @@
+"""
+Run metrics: counters and per-stage timers, written at the end of a run as a
+JSON summary and a Prometheus textfile (node_exporter textfile collector).
+
+    metrics = RunMetrics("forecast")
+    with metrics.timer("fetch"):
+        ...
+    metrics.inc("cache_hits")
+    metrics.write(output_dir)   # -> run_metrics_forecast.json / .prom
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+PREFIX = "bali"
+
+
+def _write_atomic(path, text):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+class StageTimer:
+    """Call count, total and max seconds of one stage."""
+
+    __slots__ = ("calls", "seconds", "max_seconds")
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+
+    def add(self, seconds):
+        self.calls += 1
+        self.seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+    def to_dict(self):
+        return {
+            "calls": self.calls,
+            "seconds": round(self.seconds, 4),
+            "mean_seconds": round(self.seconds / self.calls, 4) if self.calls else 0.0,
+            "max_seconds": round(self.max_seconds, 4),
+        }
+
+
+class RunMetrics:
+    """
+    Counters + stage timers of one run (thread-safe: the fetch pool and the
+    OTA tasks update it concurrently). Counters only go up; `update` sets
+    totals that another component already counts (limiter, pool, model store).
+    """
+
+    def __init__(self, job):
+        self.job = job
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+        self.counters = defaultdict(float)
+        self.timers = defaultdict(StageTimer)
+        self.lock = threading.Lock()
+
+    def inc(self, name, value=1):
+        with self.lock:
+            self.counters[name] += value
+
+    def update(self, **totals):
+        with self.lock:
+            self.counters.update(totals)
+
+    def observe(self, stage, seconds):
+        with self.lock:
+            self.timers[stage].add(seconds)
+
+    @contextmanager
+    def timer(self, stage):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "job": self.job,
+                "started_at": self.started_at,
+                "duration_seconds": round(time.perf_counter() - self.started, 3),
+                "counters": {k: round(v, 3) if isinstance(v, float) and not v.is_integer() else int(v)
+                             for k, v in sorted(self.counters.items())},
+                "stages": {k: t.to_dict() for k, t in sorted(self.timers.items())},
+            }
+
+    def to_prometheus(self):
+        snap = self.snapshot()
+        job = f'job="{self.job}"'
+        lines = [
+            f"# TYPE {PREFIX}_run_duration_seconds gauge",
+            f"{PREFIX}_run_duration_seconds{{{job}}} {snap['duration_seconds']}",
+            f"# TYPE {PREFIX}_run_finished_timestamp_seconds gauge",
+            f"{PREFIX}_run_finished_timestamp_seconds{{{job}}} {time.time():.0f}",
+        ]
+        for name, value in snap["counters"].items():
+            lines += [f"# TYPE {PREFIX}_{name}_total counter", f"{PREFIX}_{name}_total{{{job}}} {value}"]
+        if snap["stages"]:
+            for metric, field in (("stage_calls_total", "calls"), ("stage_seconds_total", "seconds"),
+                                  ("stage_seconds_max", "max_seconds")):
+                kind = "gauge" if metric.endswith("max") else "counter"
+                lines.append(f"# TYPE {PREFIX}_{metric} {kind}")
+                lines += [f'{PREFIX}_{metric}{{{job},stage="{stage}"}} {stats[field]}'
+                          for stage, stats in snap["stages"].items()]
+        return "\n".join(lines) + "\n"
+
+    def write(self, directory):
+        """Writes run_metrics_<job>.json + .prom into directory, returns both paths."""
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, f"run_metrics_{self.job}")
+        _write_atomic(f"{base}.json", json.dumps(self.snapshot(), indent=2))
+        _write_atomic(f"{base}.prom", self.to_prometheus())
+        return f"{base}.json", f"{base}.prom"
+
+    def summary(self):
+        stages = sorted(self.timers.items(), key=lambda item: -item[1].seconds)
+        parts = [f"{time.perf_counter() - self.started:.1f}s total"]
+        parts += [f"{name} {t.seconds:.1f}s ({t.calls}x)" for name, t in stages]
+        return "⏱️  " + " | ".join(parts)
+
+
+@contextmanager
+def profiled(path=None, top=25):
+    """
+    cProfile around the block when `path` is set: stats are dumped to `path`
+    (open with snakeviz / pstats) and the top entries by cumulative time printed.
+    """
+    if not path:
+        yield
+        return
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        profiler.dump_stats(path)
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(top)
+        print(out.getvalue())
+        print(f"🔬 Profile: {path}")
@@ -0,0 +1,253 @@
+import os
+import time
+
+import numpy as np
+
+from src.batch_forecast import HoltResult, STATUS_NO_DATA, STATUS_OK, growth_pct, holt_forecast_batch
+
+KEY_WIDTH = 64  # Minimum width of the key field; widened to fit longer keys
+
+# One row per series (Trends keyword = district x service, or a Bali-wide proxy)
+STATE_FIELDS = [
+    ("alpha", "f8"),
+    ("beta", "f8"),
+    ("level", "f8"),
+    ("trend", "f8"),
+    ("last_month", "i4"),   # Month code (year * 12 + month - 1) of the last absorbed month
+    ("last_value", "f8"),   # Value of that month (growth reference + revision check)
+    ("n_obs", "i4"),
+    ("error", "f8"),        # Smoothed one-step abs. percentage error since the last fit
+    ("fitted_at", "f8"),    # Unix time of the last full fit (0 = refit next time)
+]
+
+
+def state_dtype(key_width=KEY_WIDTH):
+    """
+    Row layout with a key field of key_width characters. The field is always
+    wider than the longest key, so a key that fills it was truncated.
+    """
+    return np.dtype([("key", f"U{key_width}")] + STATE_FIELDS)
+
+
+STATE_DTYPE = state_dtype()
+
+
+def month_codes(index):
+    """Monthly DatetimeIndex -> int month codes (comparable across runs)."""
+    return np.asarray(index.year * 12 + index.month - 1, dtype=np.int32)
+
+
+class ModelStateStore:
+    """
+    Fitted Holt state per series in one structured NumPy array, memory-mapped
+    from a .npy file. Months newer than the stored state only advance it
+    (O(new points)); a series is refit from its full history when its fit is
+    older than refit_days, its one-step error drifted past drift_threshold, or
+    the month it was fitted on has been revised.
+    """
+
+    ERROR_SMOOTHING = 0.3   # Weight of the newest one-step error
+    REVISION_RTOL = 0.05    # Same tolerance as the history digest
+    REVISION_ATOL = 0.5
+
+    def __init__(self, path, refit_days=28, drift_threshold=0.25):
+        self.path = path
+        self.refit_seconds = refit_days * 86400
+        self.drift_threshold = drift_threshold
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self.grown = False  # New keys (or a wider key field) -> file is rewritten on flush
+        self.states = self._load()
+        self.size = len(self.states)  # Rows in use (in memory, capacity grows by doubling)
+        self.index = {key: i for i, key in enumerate(self.states["key"])}
+
+        # Counters (reported at the end of the run)
+        self.refits = 0
+        self.drifted = 0
+        self.advanced = 0
+        self.reused = 0
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return np.zeros(0, dtype=STATE_DTYPE)
+        try:
+            states = np.load(self.path, mmap_mode="r+")
+        except ValueError:
+            states = np.load(self.path)  # Empty array can't be mapped
+        width = self._key_width(states)
+        if states.dtype != state_dtype(width):
+            # Older layout -> start over, everything gets refit once
+            return np.zeros(0, dtype=STATE_DTYPE)
+        truncated = np.char.str_len(states["key"]) >= width
+        if truncated.any():
+            # Keys cut off by a too narrow field never match again -> drop, they get refit once
+            self.grown = True
+            return np.asarray(states[~truncated])
+        return states
+
+    @staticmethod
+    def _key_width(states):
+        """Characters the key field holds (0 = no key field)."""
+        return states.dtype["key"].itemsize // 4 if "key" in (states.dtype.names or ()) else 0
+
+    def flush(self):
+        """Persists the states (call once at the end of a run; in-place updates are already mapped)."""
+        if self.grown:
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "wb") as f:
+                np.save(f, np.asarray(self.states[:self.size]))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+            self.states = self._load()
+            self.grown = False
+        elif isinstance(self.states, np.memmap):
+            self.states.flush()
+
+    def _row(self, key):
+        row = self.index.get(key)
+        if row is None:
+            width = self._key_width(self.states)
+            if len(key) >= width:
+                width = max(2 * width, len(key) + 1)
+            if self.size == len(self.states) or width != self._key_width(self.states):
+                grown = np.zeros(max(64, 2 * self.size), dtype=state_dtype(width))
+                for name in grown.dtype.names:
+                    grown[name][:self.size] = self.states[name][:self.size]
+                self.states = grown
+            row = self.index[key] = self.size
+            self.states["key"][row] = key
+            assert self.states["key"][row] == key, f"Model state key truncated: {key!r}"
+            self.size += 1
+            self.grown = True
+        return row
+
+    def _plan(self, keys, Y, months, now):
+        """Splits series into (refit, [(series, state row, position of its last month)])."""
+        rows = np.array([self.index.get(key, -1) for key in keys])
+        known = np.flatnonzero(rows >= 0)
+        state = self.states[rows[known]]
+
+        pos = np.minimum(np.searchsorted(months, state["last_month"]), len(months) - 1)
+        with np.errstate(invalid="ignore"):
+            usable = (
+                (now - state["fitted_at"] <= self.refit_seconds)
+                & (months[pos] == state["last_month"])
+                # Fitted on a window/scale this data doesn't match -> refit
+                & np.isclose(Y[known, pos], state["last_value"], rtol=self.REVISION_RTOL, atol=self.REVISION_ATOL)
+            )
+
+        refit = sorted(set(range(len(keys))) - set(known[usable].tolist()))
+        advance = list(zip(known[usable].tolist(), rows[known][usable].tolist(), pos[usable].tolist()))
+        return refit, advance
+
+    def _advance(self, Y, advance):
+        """One Holt step per new month for all advanced series at once (NaN = no new point)."""
+        idx = np.array([i for i, _, _ in advance])
+        rows = np.array([row for _, row, _ in advance])
+        pos = np.array([p for _, _, p in advance])
+
+        n_new = Y.shape[1] - 1 - pos
+        width = int(n_new.max()) if len(n_new) else 0
+        new = np.full((len(advance), width), np.nan)
+        for k, (i, p) in enumerate(zip(idx, pos)):
+            new[k, :n_new[k]] = Y[i, p + 1:]
+
+        state = self.states[rows]
+        alpha, beta = state["alpha"], state["beta"]
+        level, trend = state["level"], state["trend"]
+        last_value, error = state["last_value"], state["error"]
+        n_obs = state["n_obs"].astype(np.int64)
+
+        for t in range(width):
+            y = new[:, t]
+            seen = ~np.isnan(y)
+            pred = level + trend
+            with np.errstate(divide="ignore", invalid="ignore"):
+                step_error = np.abs(y - pred) / np.maximum(np.abs(y), 1.0)
+            new_level = alpha * y + (1 - alpha) * pred
+            new_trend = beta * (new_level - level) + (1 - beta) * trend
+
+            error = np.where(seen, (1 - self.ERROR_SMOOTHING) * error + self.ERROR_SMOOTHING * step_error, error)
+            level = np.where(seen, new_level, level)
+            trend = np.where(seen, new_trend, trend)
+            last_value = np.where(seen, y, last_value)
+            n_obs = n_obs + seen
+
+        for name, values in (("level", level), ("trend", trend), ("last_value", last_value),
+                             ("error", error), ("n_obs", n_obs)):
+            self.states[name][rows] = values
+        # Gaps count as absorbed, like the forward-fill of a full fit
+        self.states["last_month"][rows] = self.states["last_month"][rows] + n_new
+
+        moved = n_new > 0
+        self.advanced += int(moved.sum())
+        self.reused += int((~moved).sum())
+        return idx, rows
+
+    def _refit(self, keys, Y, months, refit, horizon, now):
+        idx = np.array(refit)
+        result = holt_forecast_batch(Y[idx], horizon=horizon)
+        self.refits += len(idx)
+
+        # Last value the fit saw (forward-filled, like holt_forecast_batch)
+        last_value = np.full(len(idx), np.nan)
+        for t in range(Y.shape[1]):
+            y = Y[idx, t]
+            last_value = np.where(np.isnan(y), last_value, y)
+
+        for k, i in enumerate(idx):
+            row = self._row(keys[i])
+            if result.status[k] != STATUS_OK:
+                self.states["fitted_at"][row] = 0.0  # Nothing usable to advance
+                continue
+            self.states[row] = (
+                keys[i], result.alpha[k], result.beta[k], result.level[k], result.trend[k],
+                months[-1], last_value[k], int((~np.isnan(Y[i])).sum()), 0.0, now,
+            )
+        return idx, result
+
+    def forecast(self, keys, Y, months, horizon=2):
+        """
+        Forecasts (series x months) Y, whose columns are the complete months
+        `months`, from the stored states where possible.
+        Returns a HoltResult in the order of keys (avg_volume left at 0).
+        """
+        keys = [str(k) for k in keys]
+        Y = np.array(Y, dtype=np.float64, ndmin=2)
+        months = np.asarray(months, dtype=np.int32)
+        n = len(keys)
+        out = HoltResult(*(np.zeros(n) for _ in HoltResult._fields))
+        out = out._replace(status=np.zeros(n, dtype=np.int8))
+        if not len(months):
+            out.status[:] = STATUS_NO_DATA
+            return out
+
+        now = time.time()
+        refit, advance = self._plan(keys, Y, months, now)
+
+        if advance:
+            idx, rows = self._advance(Y, advance)
+            state = self.states[rows]
+            drifted = state["error"] > self.drift_threshold
+            if drifted.any():
+                self.drifted += int(drifted.sum())
+                refit += [int(i) for i in idx[drifted]]
+                idx, state = idx[~drifted], state[~drifted]
+
+            forecast = state["level"] + horizon * state["trend"]
+            out.forecast[idx] = forecast
+            out.growth[idx] = growth_pct(forecast, state["last_value"])
+            for name in ("alpha", "beta", "level", "trend"):
+                getattr(out, name)[idx] = state[name]
+            out.sse[idx] = np.nan  # Not tracked between fits
+
+        if refit:
+            idx, result = self._refit(keys, Y, months, sorted(refit), horizon, now)
+            for name in HoltResult._fields:
+                getattr(out, name)[idx] = getattr(result, name)
+        return out
+
+    def summary(self):
+        return (f"🧠 Models: {self.size} stored | {self.refits} refit ({self.drifted} drifted) | "
+                f"{self.advanced} advanced | {self.reused} unchanged")
@@ -0,0 +1,156 @@
+import codecs
+import re
+import time
+from html.parser import HTMLParser
+
+# Hasil satu fetch
+OUTCOME_OK = "ok"
+OUTCOME_RATE_LIMITED = "rate_limited"
+OUTCOME_CAPTCHA = "captcha"
+OUTCOME_LAYOUT = "layout"     # Tidak ada H1 / H1 tanpa angka -> layout berubah
+OUTCOME_ERROR = "error"
+
+COUNT_PATTERN = re.compile(r'\d+')
+CAPTCHA_PATTERN = re.compile(r'captcha|challenge|verify you are a human|are you a robot', re.IGNORECASE)
+# Teks tantangan yang tampil di halaman (bukan class/script) -> pasti halaman captcha, boleh berhenti baca
+CHALLENGE_PATTERN = re.compile(r'verify you are a human|are you a robot', re.IGNORECASE)
+SKIP_TAGS = ('script', 'style')  # Isinya kode, bukan teks halaman -> tidak dicek captcha
+
+
+def parse_count(text):
+    """Angka terbesar di teks H1 (hindari angka kecil seperti "2 adults"), None kalau tidak ada."""
+    numbers = COUNT_PATTERN.findall(text.replace(',', ''))
+    return max(int(n) for n in numbers) if numbers else None
+
+
+class CountHeadingParser(HTMLParser):
+    """
+    Streaming parser: kumpulkan teks H1 pertama dan tandai captcha.
+    `done` jadi True begitu H1 ditutup, atau begitu teks tantangan captcha
+    tampil sebelum H1 -> sisa HTML tidak perlu dibaca. Class / id "captcha"
+    saja tidak cukup untuk berhenti (badge di halaman hasil yang valid).
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.in_h1 = False
+        self.heading = None
+        self.parts = []
+        self.captcha = False
+        self.challenge = False
+        self.skipping = False
+
+    @property
+    def done(self):
+        return self.heading is not None or self.challenge
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self.skipping = True
+        elif tag == 'h1' and self.heading is None:
+            self.in_h1 = True
+        elif any(name in ('id', 'class') and value and CAPTCHA_PATTERN.search(value) for name, value in attrs):
+            self.captcha = True
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            self.skipping = False
+        elif tag == 'h1' and self.in_h1:
+            self.in_h1 = False
+            self.heading = " ".join(" ".join(self.parts).split())
+
+    def handle_data(self, data):
+        if self.skipping:
+            return
+        if self.in_h1:
+            self.parts.append(data)
+        elif CAPTCHA_PATTERN.search(data):
+            self.captcha = True
+            self.challenge = self.challenge or bool(CHALLENGE_PATTERN.search(data))
+
+
+class HttpCountClient:
+    """
+    Jalur cepat tanpa browser: satu aiohttp session (keep-alive, max `limit`
+    koneksi) + parser streaming yang berhenti baca setelah H1 (atau teks
+    captcha) ketemu.
+
+        async with HttpCountClient(limit=8) as client:
+            count, text, outcome, seconds = await client.fetch_count(url)
+    """
+
+    CHUNK_SIZE = 8192
+    DRAIN_LIMIT = 64 * 1024  # Sisa body sekecil ini tetap dibaca supaya koneksi bisa dipakai ulang
+
+    def __init__(self, limit=8, timeout=30, user_agent=None):
+        self.limit = limit
+        self.timeout = timeout
+        self.user_agent = user_agent
+        self.session = None
+
+        # Stats
+        self.requests = 0
+        self.bytes_read = 0
+        self.early_stops = 0
+
+    async def __aenter__(self):
+        import aiohttp
+
+        headers = {'Accept-Language': 'en-GB,en;q=0.9'}
+        if self.user_agent:
+            headers['User-Agent'] = self.user_agent
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.limit, keepalive_timeout=30),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers=headers,
+        )
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.session.close()
+
+    async def fetch_count(self, url):
+        """Return (count, raw_text, outcome, detik)."""
+        started = time.perf_counter()
+        self.requests += 1
+        try:
+            async with self.session.get(url) as response:
+                if response.status == 429:
+                    return 0, "Rate Limited (429)", OUTCOME_RATE_LIMITED, time.perf_counter() - started
+                if response.status >= 400:
+                    return 0, f"Error Load: HTTP {response.status}", OUTCOME_ERROR, time.perf_counter() - started
+
+                parser = CountHeadingParser()
+                decoder = codecs.getincrementaldecoder(response.charset or 'utf-8')(errors='replace')
+                read = 0
+                async for chunk in response.content.iter_chunked(self.CHUNK_SIZE):
+                    read += len(chunk)
+                    parser.feed(decoder.decode(chunk))
+                    if parser.done:
+                        break
+
+                if parser.done and not response.content.at_eof():
+                    remaining = (response.content_length or 0) - read
+                    if 0 <= remaining <= self.DRAIN_LIMIT:
+                        read += len(await response.read())
+                    else:
+                        self.early_stops += 1  # Koneksi ditutup, sisa body tidak diunduh
+                self.bytes_read += read
+        except Exception as e:
+            return 0, f"Error Load: {str(e)}", OUTCOME_ERROR, time.perf_counter() - started
+
+        elapsed = time.perf_counter() - started
+        # H1 dengan angka = halaman hasil yang valid, walaupun ada kata "captcha" di tempat lain
+        count = parse_count(parser.heading) if parser.heading is not None else None
+        if count is not None:
+            return count, parser.heading, OUTCOME_OK, elapsed
+        if parser.captcha:
+            return 0, "Captcha", OUTCOME_CAPTCHA, elapsed
+        if parser.heading is None:
+            return 0, "Layout Changed (no H1)", OUTCOME_LAYOUT, elapsed
+        return 0, "Layout Changed (no number in H1)", OUTCOME_LAYOUT, elapsed
+
+    def summary(self):
+        per_page = self.bytes_read / self.requests / 1024 if self.requests else 0
+        return (f"⚡ HTTP: {self.requests} requests | {self.bytes_read / 1e6:.2f} MB read "
+                f"({per_page:.1f} KB/page) | {self.early_stops} stopped early")
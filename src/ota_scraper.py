@@ -1,15 +1,31 @@
 import asyncio
-from playwright.async_api import async_playwright
 import pandas as pd
-import random
 import os
+import sys
+import time
+import urllib.parse
 from datetime import datetime, timedelta
 
+if __package__ in (None, ""):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.checkpoint import CheckpointLog, export_report
+from src.ota_http import (OUTCOME_CAPTCHA, OUTCOME_ERROR, OUTCOME_LAYOUT, OUTCOME_OK, OUTCOME_RATE_LIMITED,
+                          HttpCountClient, parse_count)
+from src.metrics import RunMetrics
+from src.page_pool import PagePool
+from src.rate_limiter import AdaptiveRateLimiter
+from src.supply_store import SupplyStore, checkin_grid
+
 # --- KONFIGURASI PATH DINAMIS ---
 # Ini akan mencari folder 'data' relatif terhadap lokasi script ini
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DISTRICT_FILE = os.path.join(BASE_DIR, 'data', 'raw', 'District_rows.csv')
 OUTPUT_FILE = os.path.join(BASE_DIR, 'data', 'output', 'Bali_OTA_Supply_Data.xlsx')
+CHECKPOINT_FILE = os.path.join(BASE_DIR, 'data', 'output', 'ota_checkpoint.jsonl')
+SUPPLY_DIR = os.path.join(BASE_DIR, 'data', 'output', 'ota_supply')  # Sweep: district x tanggal, per hari scrape
+METRICS_DIR = os.path.join(BASE_DIR, 'data', 'output')  # run_metrics_ota.json / .prom
+EXPORT_FORMATS = ['xlsx', 'csv']
 
 # Filter Wilayah Non-Bali
 EXCLUDE_KEYWORDS = [
@@ -21,108 +37,325 @@ EXCLUDE_KEYWORDS = [
 CHECKIN_DATE = (datetime.now() + timedelta(days=30)).strftime("%Y-%m-%d")
 CHECKOUT_DATE = (datetime.now() + timedelta(days=31)).strftime("%Y-%m-%d")
 
-async def get_booking_count(page, district):
+# SWEEP: banyak tanggal check-in sekaligus (1 malam per tanggal), mulai besok
+SWEEP_NIGHTS = 90
+SWEEP_START_OFFSET = 1
+
+# Target OTA (bisa diarahkan ke server fixture lokal untuk testing, lihat src/fake_ota.py)
+BASE_URL = os.environ.get('OTA_BASE_URL', 'https://www.booking.com')
+
+# Mode fetch: 'auto' = HTTP biasa dulu, browser hanya kalau captcha/layout berubah;
+# 'http' = tanpa browser sama sekali; 'browser' = selalu Playwright
+FETCH_MODE = 'auto'
+
+# Browser: jumlah page (dan koneksi HTTP) yang jalan bersamaan + mode headless
+CONCURRENCY = 4
+HEADLESS = False  # False = terlihat seperti manusia; --headless untuk server/CI
+USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+PAGE_TIMEOUT_MS = 60000
+H1_TIMEOUT_MS = 10000
+
+# Rate limiter adaptif (AIMD): mulai ~10 req/menit (dulu sleep 4-7 detik),
+# naik pelan-pelan kalau lancar, turun setengah kalau kena blok/captcha.
+LIMITER = AdaptiveRateLimiter(rate_per_min=10, min_rate=2, max_rate=30, cooldown_seconds=60)
+
+# Counter + timer per tahap (page HTTP/browser, simpan, export), ditulis di akhir run
+METRICS = RunMetrics("ota")
+
+def search_url(district, base_url=None, checkin=None):
+    if checkin is None:
+        checkin, checkout = CHECKIN_DATE, CHECKOUT_DATE
+    else:
+        checkout = (datetime.strptime(checkin, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
+    query = urllib.parse.urlencode({
+        'ss': f"{district}, Bali, Indonesia",
+        'checkin': checkin,
+        'checkout': checkout,
+        'group_adults': 2,
+        'no_rooms': 1,
+        'group_children': 0,
+    })
+    return f"{base_url or BASE_URL}/searchresults.en-gb.html?{query}"
+
+
+def supply_status(count):
+    if count is None: return "❌ ERROR/BLOCKED"
+    elif count > 1000: return "🟢 HIGH SUPPLY"
+    elif count > 200: return "🟡 MEDIUM SUPPLY"
+    elif count > 0: return "🔴 LOW SUPPLY (SCARCITY)"
+    return "⚫ SOLD OUT"
+
+
+async def get_booking_count(page, district, base_url=None, checkin=None):
     """
     Scrape jumlah properti tersedia di Booking.com
+    Return (count, raw_text, detik load page); count None kalau gagal (bukan 0 properti)
     """
-    # URL Search Langsung
-    url = f"https://www.booking.com/searchresults.en-gb.html?ss={district}, Bali, Indonesia&checkin={CHECKIN_DATE}&checkout={CHECKOUT_DATE}&group_adults=2&no_rooms=1&group_children=0"
-    
+    await LIMITER.acquire_async()
+    started = time.perf_counter()
     try:
-        await page.goto(url, timeout=60000) # 60s timeout
+        # Cukup sampai DOM siap: gambar/font/analytics sudah diblok oleh PagePool
+        url = search_url(district, base_url, checkin)
+        response = await page.goto(url, timeout=PAGE_TIMEOUT_MS, wait_until="domcontentloaded")
+        if response is not None and response.status == 429:
+            LIMITER.on_rate_limited()
+            METRICS.inc(f"pages_{OUTCOME_RATE_LIMITED}")
+            return None, "Rate Limited (429)", time.perf_counter() - started
         
         # Tunggu elemen H1 (biasanya berisi count)
         try:
             # Selector H1 di Booking.com berisi text seperti "Ubud: 1,230 properties found"
-            h1_element = await page.wait_for_selector('h1', timeout=10000)
+            h1_element = await page.wait_for_selector('h1', timeout=H1_TIMEOUT_MS)
             text = await h1_element.inner_text()
-            
-            # Ambil angka dari teks
-            import re
-            numbers = re.findall(r'\d+', text.replace(',', ''))
-            
-            if numbers:
-                # Ambil angka terbesar (untuk menghindari angka kecil seperti "2 adults")
-                count = max([int(n) for n in numbers])
-                return count, text
-            else:
-                return 0, "No Number Found"
-                
         except Exception:
-            return 0, "Layout Changed/Captcha"
+            # Captcha = tanda kita terlalu cepat
+            LIMITER.on_rate_limited()
+            METRICS.inc(f"pages_{OUTCOME_CAPTCHA}")
+            return None, "Layout Changed/Captcha", time.perf_counter() - started
+
+        count = parse_count(text)
+        if count is None:
+            METRICS.inc(f"pages_{OUTCOME_LAYOUT}")
+            return None, "No Number Found", time.perf_counter() - started
+        LIMITER.on_success()
+        METRICS.inc(f"pages_{OUTCOME_OK}")
+        return count, text, time.perf_counter() - started
 
     except Exception as e:
-        return 0, f"Error Load: {str(e)}"
+        LIMITER.on_error()
+        METRICS.inc(f"pages_{OUTCOME_ERROR}")
+        return None, f"Error Load: {str(e)}", time.perf_counter() - started
+
+
+# Satu job = (district, tanggal check-in); save(job, count, raw_text, detik, mode) menyimpan hasilnya.
+# count None = gagal (captcha/429/error), 0 = memang tidak ada properti tersedia
+
+async def scrape_district(pool, job, save, base_url=None):
+    district, checkin = job
+    async with pool.page() as page:
+        count, raw_text, elapsed = await get_booking_count(page, district, base_url, checkin)
+    METRICS.observe("browser_page", elapsed)
+    save(job, count, raw_text, elapsed, "Browser")
+
+
+async def scrape_http(jobs, save, base_url=None, concurrency=CONCURRENCY, fallback=True):
+    """
+    Jalur cepat: HTTP biasa + parser streaming, tanpa browser.
+    Return job yang perlu dicek ulang pakai browser (captcha/layout berubah/error).
+    """
+    need_browser = []
+    slots = asyncio.Semaphore(concurrency)
+
+    async def check(client, job):
+        district, checkin = job
+        async with slots:
+            await LIMITER.acquire_async()
+            count, raw_text, outcome, elapsed = await client.fetch_count(search_url(district, base_url, checkin))
+        METRICS.observe("http_page", elapsed)
+        METRICS.inc(f"pages_{outcome}")
+        if outcome == OUTCOME_OK:
+            LIMITER.on_success()
+        elif outcome in (OUTCOME_RATE_LIMITED, OUTCOME_CAPTCHA):
+            # Captcha = tanda kita terlalu cepat
+            LIMITER.on_rate_limited()
+        elif outcome == OUTCOME_ERROR:
+            LIMITER.on_error()
+
+        if fallback and outcome in (OUTCOME_CAPTCHA, OUTCOME_LAYOUT, OUTCOME_ERROR):
+            need_browser.append(job)
+            return
+        save(job, count if outcome == OUTCOME_OK else None, raw_text, elapsed, "HTTP")
+
+    # Satu client (keep-alive) untuk semua job, termasuk semua tanggal sweep
+    async with HttpCountClient(limit=concurrency, user_agent=USER_AGENT) as client:
+        await asyncio.gather(*(check(client, job) for job in jobs))
+    print(client.summary())
+    return need_browser
+
+
+async def scrape_browser(jobs, save, base_url=None, concurrency=CONCURRENCY, headless=HEADLESS):
+    """Playwright: satu browser untuk semua job, dibatasi jumlah page di pool + rate limiter."""
+    from playwright.async_api import async_playwright
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=headless)
+        context = await browser.new_context(user_agent=USER_AGENT)
+        pool = await PagePool(context, size=concurrency).start()
+        try:
+            await asyncio.gather(*(scrape_district(pool, job, save, base_url) for job in jobs))
+        finally:
+            await pool.close()
+            await browser.close()
+        print(pool.summary())
+
+
+async def scrape_jobs(jobs, save, base_url=None, concurrency=CONCURRENCY, headless=HEADLESS, mode=FETCH_MODE):
+    """HTTP dulu (mode auto/http), sisanya lewat browser (mode auto/browser)."""
+    if mode in ('auto', 'http'):
+        jobs = await scrape_http(jobs, save, base_url, concurrency, fallback=(mode == 'auto'))
+        if jobs:
+            METRICS.inc("browser_fallbacks", len(jobs))
+            print(f"🧭 {len(jobs)} page captcha/layout berubah -> fallback ke browser")
+    if jobs and mode != 'http':
+        # Browser hanya di-launch kalau memang ada yang perlu
+        await scrape_browser(jobs, save, base_url, concurrency, headless)
+
+
+def checkpoint_writer(checkpoint, timings):
+    def save(job, count, raw_text, elapsed, mode):
+        district, checkin = job
+        timings.append(elapsed)
+        result = raw_text if count is None else f"{count} Properties"
+        print(f"🌍 {district.upper():<28} -> {result} ({elapsed:.1f}s, {mode})")
+
+        # Save Real-time (append + fsync, progress lama tidak ditulis ulang)
+        with METRICS.timer("checkpoint_append"):
+            checkpoint.append([{
+                'District': district,
+                'Checkin Date': checkin,
+                'Available Properties': 0 if count is None else count,
+                'Raw Text': raw_text,
+                'Supply Status': supply_status(count),
+                'Fetch Mode': mode,
+                'Scraped At': datetime.now().strftime("%Y-%m-%d %H:%M")
+            }])
+    return save
 
-async def main():
+
+def supply_writer(matrix, timings):
+    def save(job, count, raw_text, elapsed, mode):
+        district, checkin = job
+        timings.append(elapsed)
+        if count is not None:
+            matrix.set(district, checkin, count)  # Langsung ke file (memmap); 0 juga disimpan, tidak di-scrape ulang
+        else:
+            print(f"⚠️ {district} @ {checkin}: {raw_text} -> dicoba lagi run berikutnya")
+    return save
+
+
+def load_districts():
+    df_dist = pd.read_csv(DISTRICT_FILE)
+    df_clean = df_dist[~df_dist['district'].str.contains('|'.join(EXCLUDE_KEYWORDS), case=False, na=False)]
+    return df_clean['district'].unique().tolist()
+
+
+def write_metrics():
+    """Counter limiter + timer per tahap -> METRICS_DIR/run_metrics_ota.json (+ .prom)."""
+    METRICS.update(requests=LIMITER.requests, rate_limited=LIMITER.rate_limited,
+                   fetch_errors=LIMITER.errors, sleep_seconds=LIMITER.waited)
+    print(METRICS.summary())
+    json_path, prom_path = METRICS.write(METRICS_DIR)
+    print(f"📈 Metrics: {json_path} (+ .prom)")
+    return json_path, prom_path
+
+
+def timing_summary(timings, wall):
+    if not timings:
+        return "⏱️  Tidak ada page yang di-load."
+    ordered = sorted(timings)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    per_min = len(timings) / wall * 60 if wall > 0 else 0
+    return (f"⏱️  {len(timings)} pages in {wall:.1f}s ({per_min:.1f}/min) | "
+            f"Page avg {sum(timings) / len(timings):.2f}s, p95 {p95:.2f}s")
+
+
+async def main(concurrency=CONCURRENCY, headless=HEADLESS, base_url=None, mode=FETCH_MODE):
     # 1. Load Data
     if not os.path.exists(DISTRICT_FILE):
         print(f"❌ File District tidak ditemukan di: {DISTRICT_FILE}")
         print("👉 Pastikan Anda sudah membuat folder 'data/raw' dan menaruh CSV di sana.")
         return
 
-    df_dist = pd.read_csv(DISTRICT_FILE)
-    df_clean = df_dist[~df_dist['district'].str.contains('|'.join(EXCLUDE_KEYWORDS), case=False, na=False)]
-    districts = df_clean['district'].unique().tolist()
+    districts = load_districts()
     
-    print(f"🚀 OTA SCRAPER STARTED | Target: {len(districts)} Districts")
+    print(f"🚀 OTA SCRAPER STARTED | Target: {len(districts)} Districts | Mode: {mode} | Concurrency: {concurrency}")
     print(f"📂 Reading from: {DISTRICT_FILE}")
     print(f"📅 Check-in Date: {CHECKIN_DATE}")
     print("-" * 60)
 
-    results = []
-    processed_districts = []
-
-    # Smart Resume
-    if os.path.exists(OUTPUT_FILE):
-        print(f"🔄 Resuming from {OUTPUT_FILE}...")
+    # Smart Resume: cukup baca file key, bukan seluruh data
+    checkpoint = open_checkpoint()
+    if not checkpoint.exists() and os.path.exists(OUTPUT_FILE):
+        print(f"📥 Import progress lama dari {OUTPUT_FILE}...")
         try:
-            df_exist = pd.read_excel(OUTPUT_FILE)
-            results = df_exist.to_dict('records')
-            processed_districts = [r['District'] for r in results]
-        except: pass
-    
-    # Jalankan Browser (Headless=False agar terlihat seperti manusia)
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=False)
-        context = await browser.new_context(
-            user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        )
-        page = await context.new_page()
-
-        for district in districts:
-            if district in processed_districts:
-                continue
-
-            print(f"🌍 Checking Supply: {district.upper()}...", end=" ")
-            
-            # Random sleep wajib untuk OTA
-            await asyncio.sleep(random.uniform(4, 7))
-            
-            count, raw_text = await get_booking_count(page, district)
-            
-            status = "UNKNOWN"
-            if count > 1000: status = "🟢 HIGH SUPPLY"
-            elif count > 200: status = "🟡 MEDIUM SUPPLY"
-            elif count > 0: status = "🔴 LOW SUPPLY (SCARCITY)"
-            else: status = "❌ ERROR/BLOCKED"
-
-            print(f"-> {count} Properties.")
-
-            results.append({
-                'District': district,
-                'Checkin Date': CHECKIN_DATE,
-                'Available Properties': count,
-                'Raw Text': raw_text,
-                'Supply Status': status,
-                'Scraped At': datetime.now().strftime("%Y-%m-%d %H:%M")
-            })
+            checkpoint.append(pd.read_excel(OUTPUT_FILE).to_dict('records'))
+        except Exception as e:
+            print(f"⚠️ Gagal import: {e}")
 
-            # Save Real-time
-            pd.DataFrame(results).to_excel(OUTPUT_FILE, index=False)
+    processed_districts = checkpoint.read_keys()
+    if processed_districts:
+        print(f"🔄 Resuming dari {CHECKPOINT_FILE} ({len(processed_districts)} district selesai)...")
+    todo = [d for d in districts if d not in processed_districts]
+    checkpoint.start_run(len(districts), len(districts) - len(todo))  # Untuk live view dashboard (progress/ETA)
 
-        await browser.close()
-        print(f"\n✅ Selesai! Data tersimpan di {OUTPUT_FILE}")
+    timings = []
+    started = time.perf_counter()
+    jobs = [(d, CHECKIN_DATE) for d in todo]
+    await scrape_jobs(jobs, checkpoint_writer(checkpoint, timings), base_url, concurrency, headless, mode)
+
+    print(timing_summary(timings, time.perf_counter() - started))
+    print(LIMITER.summary())
+
+    export_results()
+
+
+async def sweep(nights=SWEEP_NIGHTS, start_offset=SWEEP_START_OFFSET, concurrency=CONCURRENCY,
+                headless=HEADLESS, base_url=None, mode=FETCH_MODE):
+    """
+    Supply curve: setiap district x setiap tanggal check-in di grid.
+    Hasil ke matrix district x tanggal (SUPPLY_DIR/<hari scrape>/), run ulang di hari yang sama = resume.
+    """
+    districts = load_districts()
+    dates = checkin_grid(nights, start_offset)
+    matrix = SupplyStore(SUPPLY_DIR).sweep(districts, dates)
+    jobs = matrix.pending(districts, dates)
+
+    print(f"🗓️  OTA SWEEP | {len(districts)} districts x {len(dates)} dates ({dates[0]} .. {dates[-1]})")
+    print(f"   {len(districts) * len(dates) - len(jobs)} cells done, {len(jobs)} to go | Mode: {mode} | Concurrency: {concurrency}")
+    print("-" * 60)
+
+    timings = []
+    started = time.perf_counter()
+    try:
+        await scrape_jobs(jobs, supply_writer(matrix, timings), base_url, concurrency, headless, mode)
+    finally:
+        matrix.flush()
+
+    print(timing_summary(timings, time.perf_counter() - started))
+    print(LIMITER.summary())
+    print(matrix.summary())
+
+
+def print_weekends(district, weeks=8):
+    """Contoh query: supply Ubud untuk 8 weekend ke depan (dari sweep terbaru)."""
+    supply = SupplyStore(SUPPLY_DIR).weekends(district, weeks)
+    if supply.empty:
+        print(f"⚠️ Belum ada sweep untuk {district}. Jalankan --sweep dulu.")
+        return supply
+    print(f"🏨 {district} | next {weeks} weekends (Saturday check-in)")
+    for date, count in supply.items():
+        value = "-" if pd.isna(count) else f"{int(count):,}"
+        status = "" if pd.isna(count) else supply_status(int(count))
+        print(f"   {date:%a %Y-%m-%d}  {value:>7}  {status}")
+    return supply
+
+
+def open_checkpoint():
+    return CheckpointLog(CHECKPOINT_FILE, key_fn=lambda row: row['District'])
+
+
+def export_results():
+    """Tulis report Excel/CSV sekali saja, dari checkpoint."""
+    df = open_checkpoint().to_frame()
+    if df.empty:
+        print("⚠️ Belum ada data untuk di-export.")
+        return
+    with METRICS.timer("export"):
+        written = export_report(df, OUTPUT_FILE, formats=EXPORT_FORMATS)
+    for path in written:
+        print(f"\n✅ Selesai! Data tersimpan di {path}")
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    # Satu command line untuk semua (src/cli.py): sama dengan `python src/cli.py scrape-ota ...`
+    from src import cli
+    cli.main(["scrape-ota", *sys.argv[1:]])
@@ -0,0 +1,63 @@
+import asyncio
+import re
+from contextlib import asynccontextmanager
+
+# Only the h1 text is read -> none of these are needed to get it
+BLOCKED_RESOURCE_TYPES = frozenset({'image', 'media', 'font'})
+BLOCKED_URL_PATTERN = re.compile(
+    r'google-analytics|googletagmanager|doubleclick|facebook\.(net|com)/tr|hotjar|'
+    r'bat\.bing|criteo|/analytics/|/collect\b',
+    re.IGNORECASE,
+)
+
+
+class PagePool:
+    """
+    Fixed number of browser pages in one context, shared by concurrent scrape tasks.
+    A task borrows a page with `async with pool.page() as page:`; when every page
+    is busy it waits, so at most `size` pages are loading at once.
+    Requests for images, media, fonts and analytics are aborted for the whole context.
+    """
+
+    def __init__(self, context, size=4, blocked_types=BLOCKED_RESOURCE_TYPES, blocked_urls=BLOCKED_URL_PATTERN):
+        self.context = context
+        self.size = size
+        self.blocked_types = blocked_types
+        self.blocked_urls = blocked_urls
+        self.pages = asyncio.Queue()
+
+        # Stats
+        self.allowed = 0
+        self.blocked = 0
+
+    async def start(self):
+        await self.context.route("**/*", self._route)
+        for _ in range(self.size):
+            self.pages.put_nowait(await self.context.new_page())
+        return self
+
+    async def _route(self, route):
+        request = route.request
+        if request.resource_type in self.blocked_types or self.blocked_urls.search(request.url):
+            self.blocked += 1
+            await route.abort()
+        else:
+            self.allowed += 1
+            await route.continue_()
+
+    @asynccontextmanager
+    async def page(self):
+        page = await self.pages.get()
+        try:
+            yield page
+        finally:
+            self.pages.put_nowait(page)
+
+    async def close(self):
+        while not self.pages.empty():
+            await self.pages.get_nowait().close()
+
+    def summary(self):
+        total = self.allowed + self.blocked
+        share = (self.blocked / total * 100) if total else 0
+        return f"🧱 Pages: {self.size} | Requests: {self.allowed} loaded, {self.blocked} blocked ({share:.0f}%)"
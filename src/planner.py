@@ -0,0 +1,128 @@
+import math
+from collections import OrderedDict
+
+
+class QueryPlan:
+    """
+    Full request graph of one sweep, built before anything is sent.
+
+    Stage 1: Bali-level proxy per unique search keyword ("<indo> Bali")
+    Stage 2: region check per district ("<district> Bali")
+    Stage 3: specific query per (district, unique search keyword), only for
+             active districts and keywords whose island-wide proxy is alive.
+    Services that translate to the same search keyword share one query.
+    """
+
+    def __init__(self, districts, services, keyword_map, processed_keys=()):
+        processed = set(processed_keys)
+
+        # (district, service) cells still to do, with their search keyword
+        self.cells = OrderedDict()
+        self.by_district = OrderedDict()
+        for district in districts:
+            for item in services:
+                if f"{item} {district}" in processed:
+                    continue
+                kw = keyword_map.get(item, item)
+                self.cells[(district, item)] = kw
+                self.by_district.setdefault(district, []).append((item, kw))
+
+        self.districts = list(self.by_district)
+        self.search_kws = list(OrderedDict.fromkeys(self.cells.values()))
+        self.all_search_kws = list(OrderedDict.fromkeys(keyword_map.get(item, item) for item in services))
+
+        self.pruned = set()         # Search keywords dead island-wide
+        self.region_scores = {}
+        self.proxy_volume = {}
+
+    # --- Query keywords per stage ---
+    @staticmethod
+    def proxy_kw(search_kw):
+        return f"{search_kw} Bali"
+
+    @staticmethod
+    def region_kw(district):
+        return f"{district} Bali"
+
+    @staticmethod
+    def specific_kw(search_kw, district):
+        return f"{search_kw} {district}"
+
+    def proxy_keywords(self):
+        # Full list in a fixed order -> same batches every run (cache friendly)
+        return [self.proxy_kw(kw) for kw in self.all_search_kws]
+
+    def region_keywords(self):
+        return [self.region_kw(d) for d in self.districts]
+
+    def cells_for(self, district):
+        return self.by_district.get(district, [])
+
+    def specific_keywords(self, district):
+        kws = OrderedDict.fromkeys(kw for _, kw in self.cells_for(district) if kw not in self.pruned)
+        # Most promising first: highest island-wide volume
+        ordered = sorted(kws, key=lambda kw: -self.proxy_volume.get(kw, 0))
+        return [self.specific_kw(kw, district) for kw in ordered]
+
+    # --- Pruning & ordering ---
+    def prune(self, proxy_volume, threshold):
+        """
+        Drops specific queries for keywords whose Bali-wide proxy is below
+        threshold. proxy_volume only holds proxies with a usable forecast: a
+        keyword without one (failed fetch) is kept, never pruned as volume 0.
+        """
+        self.proxy_volume = dict(proxy_volume)
+        self.pruned = {kw for kw in self.search_kws
+                       if kw in self.proxy_volume and self.proxy_volume[kw] < threshold}
+        return self.pruned
+
+    def ordered_districts(self, region_scores):
+        """Most active districts first (most direct data per request)."""
+        self.region_scores = dict(region_scores)
+        return sorted(self.districts, key=lambda d: -self.region_scores.get(d, 0))
+
+    def active_districts(self, threshold):
+        return [d for d in self.districts if self.region_scores.get(d, 0) >= threshold]
+
+    # --- Estimates ---
+    def request_counts(self, batch_size, active_districts=None):
+        """Requests per stage. Without region scores, all districts count as active (upper bound)."""
+        def batches(n):
+            return math.ceil(n / batch_size)
+
+        districts = self.districts if active_districts is None else active_districts
+        specific = 0
+        for district in districts:
+            kws = {kw for _, kw in self.cells_for(district) if kw not in self.pruned}
+            specific += batches(len(kws))
+
+        return OrderedDict([
+            ("Proxy (Bali)", batches(len(self.all_search_kws))),
+            ("Region", batches(len(self.districts))),
+            ("Specific", specific),
+        ])
+
+    def naive_request_count(self):
+        """What the old cell-by-cell flow would send (1 region + 1 specific + 1 proxy per cell, worst case)."""
+        return len(self.districts) + 2 * len(self.cells)
+
+    def describe(self, batch_size, rate_per_min, sessions=1, cached=0, active_districts=None):
+        counts = self.request_counts(batch_size, active_districts)
+        total = sum(counts.values())
+        network = max(total - cached, 0)
+        minutes = network / max(rate_per_min * sessions, 1e-9)
+        dedup = len(self.cells) - sum(len({kw for _, kw in self.cells_for(d)}) for d in self.districts)
+
+        lines = [
+            f"🗺️  PLAN | {len(self.districts)} districts x {len(self.search_kws)} search keywords = {len(self.cells)} cells",
+            f"   Deduplicated cells (shared keyword): {dedup}",
+            f"   Pruned keywords (dead island-wide): {len(self.pruned)}"
+            + (f" -> {', '.join(sorted(self.pruned))}" if self.pruned else ""),
+        ]
+        for stage, n in counts.items():
+            lines.append(f"   {stage:<14} {n:>5} requests")
+        lines += [
+            f"   {'TOTAL':<14} {total:>5} requests ({cached} cached) vs ~{self.naive_request_count()} cell-by-cell",
+            f"⏱️  Estimated wall-clock: {minutes:.1f} min @ {rate_per_min:.1f} req/min x {sessions} session(s)",
+        ]
+        return "\n".join(lines)
@@ -0,0 +1,118 @@
+import asyncio
+import random
+import threading
+import time
+
+NORMAL = "NORMAL"
+COOLDOWN = "COOLDOWN"
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket whose refill rate adapts by AIMD:
+    - every `success_window` successes in a row -> rate += increase_step
+    - every 429 -> rate *= 0.5 and an explicit cooldown (grows with repeated 429s)
+    Shared by the Trends fetch path (sync) and the OTA scraper (async).
+    """
+
+    def __init__(self, rate_per_min=5.0, min_rate=1.0, max_rate=20.0, burst=1,
+                 increase_step=0.5, success_window=5, cooldown_seconds=60,
+                 error_cooldown_seconds=10, jitter=0.2,
+                 clock=time.monotonic, sleep=time.sleep, async_sleep=asyncio.sleep):
+        self.rate = float(rate_per_min)  # Requests per minute
+        self.min_rate = float(min_rate)
+        self.max_rate = float(max_rate)
+        self.burst = burst
+        self.increase_step = increase_step
+        self.success_window = success_window
+        self.cooldown_seconds = cooldown_seconds
+        self.error_cooldown_seconds = error_cooldown_seconds
+        self.jitter = jitter  # Extra random wait, fraction of one interval
+        self.clock = clock
+        self.sleep = sleep
+        self.async_sleep = async_sleep
+
+        self.tokens = float(burst)
+        self.updated_at = clock()
+        self.cooldown_until = 0.0
+        self.success_streak = 0
+        self.consecutive_429 = 0
+
+        # Stats
+        self.requests = 0
+        self.rate_limited = 0
+        self.errors = 0
+        self.waited = 0.0
+
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        return COOLDOWN if self.clock() < self.cooldown_until else NORMAL
+
+    def _reserve(self):
+        """Takes one token and returns how long the caller has to wait for it."""
+        with self.lock:
+            now = self.clock()
+            ref = max(now, self.cooldown_until, self.updated_at)
+
+            # Refill up to `burst` tokens for the time that passed
+            per_sec = self.rate / 60.0
+            self.tokens = min(self.burst, self.tokens + (ref - self.updated_at) * per_sec)
+            self.updated_at = ref
+            self.tokens -= 1
+
+            wait = ref - now
+            if self.tokens < 0:
+                wait += -self.tokens / per_sec
+            if self.jitter:
+                wait += random.uniform(0, self.jitter / per_sec)
+
+            self.requests += 1
+            self.waited += wait
+            return wait
+
+    def acquire(self):
+        wait = self._reserve()
+        if wait > 0:
+            self.sleep(wait)
+        return wait
+
+    async def acquire_async(self):
+        wait = self._reserve()
+        if wait > 0:
+            await self.async_sleep(wait)
+        return wait
+
+    def on_success(self):
+        with self.lock:
+            self.consecutive_429 = 0
+            self.success_streak += 1
+            if self.success_streak >= self.success_window:
+                self.rate = min(self.max_rate, self.rate + self.increase_step)
+                self.success_streak = 0
+
+    def on_rate_limited(self, retry_after=None):
+        """429 -> halve the rate and cool down (60s -> 120s -> 180s on repeats)."""
+        with self.lock:
+            self.rate_limited += 1
+            self.consecutive_429 += 1
+            self.success_streak = 0
+            self.rate = max(self.min_rate, self.rate * 0.5)
+
+            cooldown = retry_after or self.cooldown_seconds * self.consecutive_429
+            self.cooldown_until = max(self.cooldown_until, self.clock() + cooldown)
+            self.tokens = min(self.tokens, 0.0)
+            return cooldown
+
+    def on_error(self):
+        """Other errors: short pause, rate unchanged."""
+        with self.lock:
+            self.errors += 1
+            self.success_streak = 0
+            self.cooldown_until = max(self.cooldown_until, self.clock() + self.error_cooldown_seconds)
+            return self.error_cooldown_seconds
+
+    def summary(self):
+        return (f"🚦 Rate: {self.rate:.1f} req/min | Requests: {self.requests} | "
+                f"429s: {self.rate_limited} | Errors: {self.errors} | Waited: {self.waited:.0f}s")
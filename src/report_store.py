@@ -0,0 +1,185 @@
+"""
+Dashboard store: the report as a columnar file (Parquet with pyarrow, pickle
+otherwise) with categorical columns, rows pre-sorted by growth, plus the
+per-status / per-district / per-service aggregates, all written at export time.
+The dashboard then filters by positions and reads KPIs from the aggregates
+instead of recomputing them from the rows on every interaction.
+
+Every export writes its rows to a new `report-<version>.<ext>` file, then
+swaps in `store.json` (version, data file name and aggregates) in one
+os.replace. Readers go through the manifest, so rows and KPIs always come
+from the same export. The previous data file is kept for readers that
+opened the old manifest just before the swap.
+"""
+import glob
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.series_cube import MARKET_STATUS
+
+CATEGORY_COLUMNS = ['District', 'Service Category', 'Data Source', 'Market Status',
+                    'Recommended Action', 'Forecast Status', 'Model']
+NUMERIC_COLUMNS = ['Forecast Index', 'Growth %', 'Avg Volume']
+FILTER_COLUMNS = ['District', 'Service Category', 'Market Status']
+HIGH_DEMAND = MARKET_STATUS[2]
+
+MANIFEST_FILE = 'store.json'
+DATA_PATTERN = 'report-*'
+LEGACY_FILES = ('report.parquet', 'report.pkl', 'aggregates.json')  # Unversioned store (before the manifest)
+
+
+def _parquet_available():
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def prepare(df):
+    """Categoricals + numeric columns, rows ordered by growth (highest first)."""
+    df = df.copy()
+    for col in NUMERIC_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype('float32')
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype(str).astype('category')
+    return df.sort_values('Growth %', ascending=False, kind='stable').reset_index(drop=True)
+
+
+def aggregates(df):
+    """Row count + growth sum per status, per (district, status) and per (service, status)."""
+    def table(keys):
+        grouped = df.groupby(keys, observed=True)['Growth %'].agg(['size', 'sum']).reset_index()
+        return [[*(str(v) for v in row[:-2]), int(row[-2]), float(row[-1])]
+                for row in grouped.itertuples(index=False)]
+
+    return {
+        'rows': len(df),
+        'by_status': table(['Market Status']),
+        'by_district_status': table(['District', 'Market Status']),
+        'by_service_status': table(['Service Category', 'Market Status']),
+    }
+
+
+def write_store(df, directory):
+    """Writes a new data file, then swaps in the manifest pointing at it. Returns the data file path."""
+    os.makedirs(directory, exist_ok=True)
+    df = prepare(df)
+    if _parquet_available():
+        ext = 'parquet'
+    else:
+        ext = 'pkl'
+        print("⚠️ pyarrow is not installed -> dashboard store written as pickle (pip install pyarrow).")
+
+    version = f"{time.time_ns()}"
+    name = f"report-{version}.{ext}"
+    target = os.path.join(directory, name)
+    tmp = f"{target}.tmp"
+    if ext == 'parquet':
+        df.to_parquet(tmp, index=False)
+    else:
+        df.to_pickle(tmp)
+    os.replace(tmp, target)
+
+    manifest = os.path.join(directory, MANIFEST_FILE)
+    previous = _read_manifest(manifest)
+    with open(f"{manifest}.tmp", 'w', encoding='utf-8') as f:
+        json.dump({'version': version, 'data': name, 'aggregates': aggregates(df)}, f, ensure_ascii=False)
+    os.replace(f"{manifest}.tmp", manifest)  # The single switch between two exports
+
+    keep = {name, previous['data'] if previous else None}
+    for path in glob.glob(os.path.join(directory, DATA_PATTERN)):
+        if os.path.basename(path) not in keep:
+            os.remove(path)
+    for legacy in LEGACY_FILES:
+        if os.path.exists(os.path.join(directory, legacy)):
+            os.remove(os.path.join(directory, legacy))
+    return target
+
+
+def _read_manifest(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def store_file(directory):
+    """Manifest of the store (replaced once per export, so its mtime is the export's); None if nothing was exported."""
+    path = os.path.join(directory, MANIFEST_FILE)
+    return path if os.path.exists(path) else None
+
+
+def read_store(directory):
+    """(rows, aggregates) of one export, (None, None) if nothing was exported yet."""
+    for _ in range(3):
+        manifest = _read_manifest(os.path.join(directory, MANIFEST_FILE))
+        if manifest is None:
+            return None, None
+        path = os.path.join(directory, manifest['data'])
+        try:
+            df = pd.read_parquet(path) if path.endswith('.parquet') else pd.read_pickle(path)
+        except FileNotFoundError:
+            continue  # Two exports landed while reading: take the newest manifest
+        return df, manifest['aggregates']
+    raise RuntimeError(f"Dashboard store in {directory} keeps changing while reading, try again")
+
+
+class ReportIndex:
+    """
+    Row positions per value of each filter column. Rows are sorted by growth,
+    so the positions of any selection are already in growth order: its top N
+    are the first N positions.
+    """
+
+    def __init__(self, df):
+        self.n_rows = len(df)
+        self.positions = {
+            col: {str(k): np.asarray(v) for k, v in df.groupby(col, observed=True).indices.items()}
+            for col in FILTER_COLUMNS
+        }
+
+    def values(self, col):
+        return sorted(self.positions[col])
+
+    def select(self, **filters):
+        """filters: {column: value or None}. Returns sorted row positions."""
+        selected = None
+        for col, value in filters.items():
+            if value is None:
+                continue
+            pos = self.positions[col].get(value, np.empty(0, dtype=np.intp))
+            selected = pos if selected is None else np.intersect1d(selected, pos, assume_unique=True)
+        return np.arange(self.n_rows) if selected is None else selected
+
+
+def kpis(aggs, df, positions, district=None, service=None, status=None):
+    """
+    (rows, avg growth, high-demand rows, {status: rows}) of a selection.
+    Read from the aggregates unless both district and service are chosen
+    (then the selection is a handful of rows anyway).
+    """
+    if district is not None and service is not None:
+        statuses = df['Market Status'].to_numpy()[positions].astype(str)
+        growth = df['Growth %'].to_numpy()[positions]
+        table = [(s, int((statuses == s).sum()), float(growth[statuses == s].sum())) for s in set(statuses)]
+    elif district is not None:
+        table = [(s, n, g) for d, s, n, g in aggs['by_district_status'] if d == district]
+    elif service is not None:
+        table = [(s, n, g) for d, s, n, g in aggs['by_service_status'] if d == service]
+    else:
+        table = [tuple(row) for row in aggs['by_status']]
+
+    if status is not None:
+        table = [row for row in table if row[0] == status]
+    counts = {s: n for s, n, _ in table}
+    rows = sum(counts.values())
+    growth_sum = sum(g for _, _, g in table)
+    return rows, (growth_sum / rows if rows else 0.0), counts.get(HIGH_DEMAND, 0), counts
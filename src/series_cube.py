@@ -0,0 +1,255 @@
+"""
+Dense store of every fetched series: district x service x week float32 cube.
+
+    cube = SeriesCube.open("data/cache/series_cube", districts, services)
+    cube.put("Ubud", {"Motorbike": (weekly_series, DIRECT)})
+    result = cube.forecast()          # districts x services arrays
+    report = cube.report(result)      # one row per stored cell
+
+    python src/series_cube.py [--report out.csv]
+"""
+import argparse
+import json
+import os
+import sys
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+if __package__ in (None, ""):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.batch_forecast import STATUS_LABELS, STATUS_NO_DATA, STATUS_OK, STATUS_TOO_SHORT, holt_forecast_batch
+from src.model_state import month_codes
+
+# Cell source (mask.npy)
+MISSING = 0   # Nothing stored
+DIRECT = 1    # The district's own series
+PROXY = 2     # Bali-wide series filled in for the district
+
+SOURCE_LABELS = {MISSING: "❌ Niche", DIRECT: "✅ Direct Data", PROXY: "🔄 Proxy (Bali Trend)"}
+
+# Market status by growth % (same thresholds as the report rows)
+HIGH_GROWTH = 20
+LOW_GROWTH = -15
+MARKET_STATUS = np.array(["❄️ LOW DEMAND", "➡️ STABLE", "🔥 HIGH DEMAND"])
+ACTIONS = np.array(["Discount / Bundle", "Maintain Stock", "Increase Inventory"])
+
+CubeForecast = namedtuple("CubeForecast", ["forecast", "growth", "avg_volume", "status"])
+
+
+def classify(growth):
+    """Market status index per growth %: 0 = low, 1 = stable, 2 = high demand."""
+    return np.where(growth > HIGH_GROWTH, 2, np.where(growth < LOW_GROWTH, 0, 1))
+
+
+def monthly_means(values, weeks):
+    """
+    (series x weeks) -> (series x months) means of the weeks starting in each month,
+    plus the average over all months. Same rule as batch_forecast.monthly_frame.
+    """
+    codes = month_codes(pd.DatetimeIndex(weeks))
+    starts = np.flatnonzero(np.r_[True, np.diff(codes) != 0])
+    present = ~np.isnan(values)
+    sums = np.add.reduceat(np.where(present, values, 0.0), starts, axis=1)
+    counts = np.add.reduceat(present, starts, axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        monthly = np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+        avg_volume = np.nanmean(np.where(counts > 0, monthly, np.nan), axis=1)
+    return monthly, np.nan_to_num(avg_volume)
+
+
+def _labels(items):
+    """[(id, name)] or [name] -> [(id, name)] (name doubles as id when there is none)."""
+    return [tuple(item) if isinstance(item, (list, tuple)) else (item, item) for item in items]
+
+
+class SeriesCube:
+    """
+    values.npy: float32 districts x services x weeks (NaN = no point), memory-mapped
+    mask.npy:   uint8 districts x services, MISSING / DIRECT / PROXY
+    index.json: district and service (id, name) per integer code + the week axis
+
+    Codes are positions and never change: new districts/services/weeks are
+    appended (the files are rebuilt once, block by block). Reads and the
+    vectorized forecast go BLOCK districts at a time, so memory stays flat
+    as districts are added.
+    """
+
+    BLOCK = 256  # Districts per block (bounds the Holt grid search memory, ~50 MB with 24 services)
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "index.json"), encoding="utf-8") as f:
+            index = json.load(f)
+        self.districts = [tuple(d) for d in index["districts"]]
+        self.services = [tuple(s) for s in index["services"]]
+        self.weeks = index["weeks"]
+        self.rows = {name: i for i, (_, name) in enumerate(self.districts)}
+        self.cols = {name: i for i, (_, name) in enumerate(self.services)}
+        self.week_pos = {w: i for i, w in enumerate(self.weeks)}
+        self.values = np.load(os.path.join(path, "values.npy"), mmap_mode="r+")
+        self.mask = np.load(os.path.join(path, "mask.npy"), mmap_mode="r+")
+
+    @classmethod
+    def create(cls, path, districts, services, weeks, base=None):
+        """New cube for the given axes (weeks sorted), copying what `base` already has."""
+        os.makedirs(path, exist_ok=True)
+        districts, services, weeks = _labels(districts), _labels(services), sorted(weeks)
+        shape = (len(districts), len(services), len(weeks))
+
+        tmp_values, tmp_mask = os.path.join(path, "values.npy.tmp"), os.path.join(path, "mask.npy.tmp")
+        values = np.lib.format.open_memmap(tmp_values, mode="w+", dtype=np.float32, shape=shape)
+        mask = np.lib.format.open_memmap(tmp_mask, mode="w+", dtype=np.uint8, shape=shape[:2])
+        values[:] = np.nan
+        if base is not None and base.values.size:
+            # Base codes keep their position; only the week axis can shift
+            position = {w: i for i, w in enumerate(weeks)}
+            cols = np.array([position[w] for w in base.weeks], dtype=np.intp)
+            n_services = len(base.services)
+            for lo in range(0, len(base.districts), cls.BLOCK):
+                hi = min(len(base.districts), lo + cls.BLOCK)
+                values[lo:hi, :n_services, cols] = base.values[lo:hi]
+                mask[lo:hi, :n_services] = base.mask[lo:hi]
+        values.flush()
+        mask.flush()
+        del values, mask
+
+        os.replace(tmp_values, os.path.join(path, "values.npy"))
+        os.replace(tmp_mask, os.path.join(path, "mask.npy"))
+        index = {"districts": districts, "services": services, "weeks": weeks}
+        tmp_index = os.path.join(path, "index.json.tmp")
+        with open(tmp_index, "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False)
+        os.replace(tmp_index, os.path.join(path, "index.json"))
+        return cls(path)
+
+    @classmethod
+    def open(cls, path, districts=(), services=(), weeks=()):
+        """Opens (or creates) the cube at path, grown to cover the given axes."""
+        if not os.path.exists(os.path.join(path, "index.json")):
+            return cls.create(path, districts, services, weeks)
+        cube = cls(path)
+        cube.grow(districts, services, weeks)
+        return cube
+
+    def grow(self, districts=(), services=(), weeks=()):
+        """Appends unknown districts/services/weeks (rebuilds the files in place)."""
+        new_districts = [d for d in _labels(districts) if d[1] not in self.rows]
+        new_services = [s for s in _labels(services) if s[1] not in self.cols]
+        new_weeks = sorted(set(weeks) - set(self.weeks))
+        if not (new_districts or new_services or new_weeks):
+            return self
+        grown = SeriesCube.create(self.path, self.districts + new_districts, self.services + new_services,
+                                  self.weeks + new_weeks, base=self)
+        self.__dict__.update(grown.__dict__)
+        return self
+
+    def put(self, district, cells):
+        """
+        Stores weekly series (indexed by week start) of one district:
+        cells = {service: (series, DIRECT or PROXY)}. Replaces what the cells held.
+        """
+        weeks = {w for series, _ in cells.values() for w in series.index.strftime("%Y-%m-%d")}
+        self.grow([district] if district not in self.rows else (), [s for s in cells if s not in self.cols], weeks)
+
+        row = self.rows[district]
+        for service, (series, source) in cells.items():
+            col = self.cols[service]
+            positions = [self.week_pos[w] for w in series.index.strftime("%Y-%m-%d")]
+            self.values[row, col, :] = np.nan
+            self.values[row, col, positions] = series.to_numpy(dtype=np.float32)
+            self.mask[row, col] = source
+
+    def get(self, district, service):
+        """Stored weekly series of one cell (empty if nothing stored)."""
+        row, col = self.rows.get(district), self.cols.get(service)
+        if row is None or col is None or self.mask[row, col] == MISSING:
+            return pd.Series(dtype=float, name=service)
+        series = pd.Series(self.values[row, col].astype(float), index=pd.to_datetime(self.weeks), name=service)
+        return series.dropna()
+
+    def forecast(self, weeks=52, horizon=2):
+        """
+        Vectorized Holt forecast of every stored cell over the last `weeks` weeks.
+        Returns CubeForecast of districts x services arrays (NO_DATA where nothing is stored).
+        """
+        n_districts, n_services = self.mask.shape
+        forecast = np.zeros((n_districts, n_services))
+        growth = np.zeros((n_districts, n_services))
+        avg_volume = np.zeros((n_districts, n_services))
+        status = np.full((n_districts, n_services), STATUS_NO_DATA, dtype=np.int8)
+
+        window = slice(max(0, len(self.weeks) - weeks), len(self.weeks))
+        for lo in range(0, n_districts, self.BLOCK):
+            hi = min(n_districts, lo + self.BLOCK)
+            rows, cols = np.nonzero(np.asarray(self.mask[lo:hi]))
+            if not len(rows):
+                continue
+            values = np.asarray(self.values[lo:hi, :, window], dtype=np.float64)[rows, cols]
+            monthly, volume = monthly_means(values, self.weeks[window])
+            avg_volume[lo + rows, cols] = volume
+            if monthly.shape[1] < 2:
+                status[lo + rows, cols] = STATUS_TOO_SHORT
+                continue
+
+            # Drop the incomplete current month, like monthly_frame
+            result = holt_forecast_batch(monthly[:, :-1], horizon=horizon)
+            forecast[lo + rows, cols] = result.forecast
+            growth[lo + rows, cols] = result.growth
+            status[lo + rows, cols] = result.status
+        return CubeForecast(forecast, growth, avg_volume, status)
+
+    def report(self, result=None):
+        """Report rows (same columns as the checkpoint report) for every stored cell."""
+        result = result or self.forecast()
+        mask = np.asarray(self.mask)
+        rows, cols = np.nonzero(mask)
+        source = mask[rows, cols]
+        status = result.status[rows, cols]
+        growth = result.growth[rows, cols]
+        ok = status == STATUS_OK
+        market = classify(growth)
+
+        return pd.DataFrame({
+            'District': np.array([name for _, name in self.districts], dtype=object)[rows],
+            'Service Category': np.array([name for _, name in self.services], dtype=object)[cols],
+            'Data Source': [SOURCE_LABELS[s] for s in source],
+            'Forecast Index': np.where(ok, np.round(result.forecast[rows, cols], 1), 0),
+            'Growth %': np.where(ok, np.round(growth, 1), 0),
+            'Avg Volume': np.where(source == DIRECT, np.round(result.avg_volume[rows, cols], 1), 0),
+            'Market Status': np.where(ok, MARKET_STATUS[market], "UNKNOWN"),
+            'Recommended Action': np.where(ok, ACTIONS[market], "Check"),
+            'Forecast Status': [STATUS_LABELS[s] for s in status],
+        })
+
+    def flush(self):
+        self.values.flush()
+        self.mask.flush()
+
+    def summary(self):
+        mask = np.asarray(self.mask)
+        size_mb = (self.values.nbytes + mask.nbytes) / 1e6
+        return (f"🧊 Cube: {len(self.districts)} districts x {len(self.services)} services x "
+                f"{len(self.weeks)} weeks | {(mask == DIRECT).sum()} direct, {(mask == PROXY).sum()} proxy "
+                f"| {size_mb:.1f} MB on disk")
+
+
+if __name__ == "__main__":
+    BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description="Forecast every stored cell of the series cube")
+    parser.add_argument("--path", default=os.path.join(BASE_DIR, 'data', 'cache', 'series_cube'))
+    parser.add_argument("--report", metavar="CSV", help="Write the vectorized report to CSV")
+    args = parser.parse_args()
+
+    if not os.path.exists(os.path.join(args.path, "index.json")):
+        print(f"⚠️ No cube at {args.path}. Run the forecaster first.")
+        sys.exit(1)
+    cube = SeriesCube(args.path)
+    print(cube.summary())
+    report = cube.report()
+    print(report['Market Status'].value_counts().to_string())
+    if args.report:
+        report.to_csv(args.report, index=False)
+        print(f"✅ Report: {args.report}")
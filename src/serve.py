@@ -0,0 +1,309 @@
+"""
+Local forecast API over the latest export (the dashboard store).
+
+    python src/serve.py [--port 8080] [--trends-url http://127.0.0.1:8765]
+
+    GET /forecast/{district}/{service}          one cell (?refresh=1 forces an on-demand forecast)
+    GET /forecasts?status=HIGH&district=Ubud&limit=20
+                                                top N by growth of a selection
+    GET /statuses                               rows + average growth per Market Status
+    GET /health                                 export age, rows, in-flight forecasts
+    GET /metrics                                Prometheus text
+
+The rows sit in an in-memory index keyed by (district, service), plus the
+store's row positions per district / service / status (ReportIndex). A new
+export is picked up from the store's mtime and swapped in whole. A cell that
+is missing from the export, or older than STALE_HOURS, is forecast on demand
+through the forecaster's fetch_safe / forecast_columns path. Concurrent
+requests for the same cell share one in-flight forecast. On-demand rows
+answer point queries only; lists stay on the export until the next sweep.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from aiohttp import web
+
+# Allow `python src/serve.py` as well as `python -m src.serve`
+if __package__ in (None, ""):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.metrics import RunMetrics
+from src.report_store import NUMERIC_COLUMNS, ReportIndex, read_store, store_file
+from src.settings import ForecasterConfig
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORK_DIR = os.path.join(BASE_DIR, 'data', 'serve')  # Own cache / model state (a sweep may be running next to it)
+HOST = '127.0.0.1'
+PORT = 8080
+RELOAD_SECONDS = 2.0      # How often the store's mtime is checked
+STALE_HOURS = 24 * 7      # Export rows older than this are re-forecast on demand (Trends data is weekly)
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 1000
+
+# One loaded export: rows in growth order, row position per (district, service) key
+Snapshot = namedtuple("Snapshot", ["rows", "by_key", "index", "aggregates", "mtime"])
+EMPTY = Snapshot([], {}, None, {}, 0.0)
+
+
+def cell_key(district, service):
+    return district.strip().casefold(), service.strip().casefold()
+
+
+def load_snapshot(directory):
+    """Reads the dashboard store into a Snapshot (EMPTY if nothing was exported yet)."""
+    path = store_file(directory)
+    if path is None:
+        return EMPTY
+    mtime = os.path.getmtime(path)
+    df, aggs = read_store(directory)
+    index = ReportIndex(df)
+    df = df.astype({col: 'float64' for col in NUMERIC_COLUMNS if col in df.columns}).round(2)
+    rows = df.astype(object).where(df.notna(), None).to_dict('records')
+    by_key = {cell_key(row['District'], row['Service Category']): pos for pos, row in enumerate(rows)}
+    return Snapshot(rows, by_key, index, aggs, mtime)
+
+
+class Coalescer:
+    """One in-flight task per key: concurrent callers await the same result."""
+
+    def __init__(self):
+        self.inflight = {}
+        self.started = 0
+        self.joined = 0
+
+    async def run(self, key, make_coro):
+        task = self.inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(make_coro())
+            self.inflight[key] = task
+            task.add_done_callback(lambda _: self.inflight.pop(key, None))
+            self.started += 1
+        else:
+            self.joined += 1
+        # Shielded: a client hanging up does not cancel the forecast for the others
+        return await asyncio.shield(task)
+
+
+class ForecastService:
+    def __init__(self, config=None, client_factory=None, work_dir=WORK_DIR, stale_hours=STALE_HOURS, overrides=None):
+        self.config = config or ForecasterConfig(overrides=overrides)
+        self.overrides = overrides  # Settings of the on-demand forecaster (rates, thresholds...)
+        self.store_dir = self.config.DASHBOARD_DIR
+        self.client_factory = client_factory
+        self.work_dir = work_dir
+        self.stale_seconds = stale_hours * 3600
+        self.snapshot = EMPTY
+        self.on_demand = {}  # key -> (row, forecast at)
+        self.coalescer = Coalescer()
+        self.metrics = RunMetrics("serve")
+
+        # Known cells: on-demand forecasts only for districts / services of the input CSVs
+        districts, services = self.config.load_data()
+        self.districts = {d.casefold(): d for d in districts}
+        self.services = {s.casefold(): s for s in services}
+
+        # The forecaster lives on a single thread of its own (SQLite handles, model
+        # state); different cells queue up there, the same cell is coalesced
+        self.forecaster = None
+        self.executor = ThreadPoolExecutor(max_workers=1, initializer=self._start_forecaster)
+        self.reload_task = None
+
+    def _start_forecaster(self):
+        from src.forecaster import BaliDemandForecaster
+        self.forecaster = BaliDemandForecaster(client_factory=self.client_factory, work_dir=self.work_dir,
+                                               overrides=self.overrides)
+
+    # --- Export index ---
+    def changed(self):
+        path = store_file(self.store_dir)
+        return path is not None and os.path.getmtime(path) != self.snapshot.mtime
+
+    async def reload(self):
+        """Loads the store (off the event loop) if it changed. True if a new export was swapped in."""
+        if not self.changed():
+            return False
+        with self.metrics.timer("reload"):
+            snapshot = await asyncio.get_running_loop().run_in_executor(None, load_snapshot, self.store_dir)
+        # Swapped on the event loop: requests see the old or the new export, never a mix
+        self.snapshot = snapshot
+        # On-demand rows older than the new export are superseded by it
+        self.on_demand = {key: value for key, value in self.on_demand.items() if value[1] > snapshot.mtime}
+        self.metrics.inc("reloads")
+        print(f"📥 Export loaded: {len(snapshot.rows)} rows ({self.store_dir})")
+        return True
+
+    async def watch(self):
+        while True:
+            try:
+                await self.reload()
+            except Exception as e:  # Half-written store from another process: next round
+                print(f"⚠️ Reload failed: {e}")
+            await asyncio.sleep(RELOAD_SECONDS)
+
+    # --- Queries ---
+    async def cell(self, district, service, refresh=False):
+        """(row, source) for one cell; source is 'export', 'on_demand' or 'stale' (forecast failed)."""
+        key = cell_key(district, service)
+        self.metrics.inc("point_queries")
+        snapshot = self.snapshot
+        exported = snapshot.rows[snapshot.by_key[key]] if key in snapshot.by_key else None
+
+        if not refresh:
+            # Newest of the export row and an on-demand forecast (e.g. a ?refresh=1 after the export)
+            candidates = [(snapshot.mtime, exported, 'export')] if exported is not None else []
+            if key in self.on_demand:
+                row, at = self.on_demand[key]
+                candidates.append((at, row, 'on_demand'))
+            if candidates:
+                at, row, source = max(candidates, key=lambda candidate: candidate[0])
+                if time.time() - at <= self.stale_seconds:
+                    return row, source
+
+        if key[0] not in self.districts or key[1] not in self.services:
+            if exported is not None:
+                return exported, 'stale'
+            raise KeyError(f"Unknown cell: {district} / {service}")
+        try:
+            row = await self.coalescer.run(key, lambda: self._forecast(key))
+        except Exception as e:
+            if exported is None:
+                raise
+            print(f"⚠️ On-demand forecast failed for {district} / {service}: {e}")
+            return exported, 'stale'
+        return row, 'on_demand'
+
+    async def _forecast(self, key):
+        loop = asyncio.get_running_loop()
+        district, service = self.districts[key[0]], self.services[key[1]]
+        with self.metrics.timer("on_demand"):
+            row = await loop.run_in_executor(self.executor, self._forecast_cell, district, service)
+        self.on_demand[key] = (row, time.time())
+        self.metrics.inc("on_demand_forecasts")
+        return row
+
+    def _forecast_cell(self, district, service):
+        row = self.forecaster.forecast_cell(district, service)
+        self.forecaster.models.flush()
+        return row
+
+    def resolve_status(self, value):
+        """Exact Market Status, or the one status containing `value` (e.g. 'high' -> '🔥 HIGH DEMAND')."""
+        if value is None or self.snapshot.index is None:
+            return value
+        statuses = self.snapshot.index.values('Market Status')
+        if value in statuses:
+            return value
+        matches = [s for s in statuses if value.casefold() in s.casefold()]
+        return matches[0] if len(matches) == 1 else value
+
+    def query(self, district=None, service=None, status=None, limit=DEFAULT_LIMIT):
+        """Top `limit` rows by growth of the selection (the store is already in growth order)."""
+        self.metrics.inc("list_queries")
+        snapshot = self.snapshot
+        if snapshot.index is None:
+            return 0, []
+        positions = snapshot.index.select(**{'District': district, 'Service Category': service,
+                                             'Market Status': self.resolve_status(status)})
+        return len(positions), [snapshot.rows[pos] for pos in positions[:limit]]
+
+    def statuses(self):
+        return [{'Market Status': status, 'rows': n, 'Avg Growth %': round(total / n, 2) if n else 0.0}
+                for status, n, total in self.snapshot.aggregates.get('by_status', [])]
+
+    def health(self):
+        snapshot = self.snapshot
+        return {
+            'rows': len(snapshot.rows),
+            'export_mtime': snapshot.mtime or None,
+            'export_age_seconds': round(time.time() - snapshot.mtime, 1) if snapshot.mtime else None,
+            'stale': bool(snapshot.mtime) and time.time() - snapshot.mtime > self.stale_seconds,
+            'on_demand_rows': len(self.on_demand),
+            'in_flight': len(self.coalescer.inflight),
+            'forecasts_started': self.coalescer.started,
+            'requests_coalesced': self.coalescer.joined,
+        }
+
+    # --- HTTP ---
+    async def handle_cell(self, request):
+        try:
+            row, source = await self.cell(request.match_info['district'], request.match_info['service'],
+                                          refresh=request.query.get('refresh') in ('1', 'true'))
+        except KeyError as e:
+            raise web.HTTPNotFound(text=str(e).strip("'\""))
+        except Exception as e:
+            raise web.HTTPBadGateway(text=f"On-demand forecast failed: {e}")
+        return web.json_response({**row, 'source': source})
+
+    async def handle_list(self, request):
+        try:
+            limit = min(int(request.query.get('limit', DEFAULT_LIMIT)), MAX_LIMIT)
+        except ValueError:
+            raise web.HTTPBadRequest(text="limit must be an integer")
+        total, rows = self.query(request.query.get('district'), request.query.get('service'),
+                                 request.query.get('status'), limit)
+        return web.json_response({'total': total, 'rows': rows})
+
+    async def handle_statuses(self, request):
+        return web.json_response(self.statuses())
+
+    async def handle_health(self, request):
+        return web.json_response(self.health())
+
+    async def handle_metrics(self, request):
+        health = self.health()
+        self.metrics.update(**{name: health[name] for name in
+                               ('rows', 'on_demand_rows', 'in_flight', 'forecasts_started', 'requests_coalesced')})
+        return web.Response(text=self.metrics.to_prometheus(), content_type='text/plain')
+
+    async def _on_startup(self, app):
+        await self.reload()  # First export before the first request
+        self.reload_task = asyncio.ensure_future(self.watch())
+
+    async def _on_cleanup(self, app):
+        self.reload_task.cancel()
+        self.executor.shutdown(wait=True)
+
+    def app(self):
+        app = web.Application()
+        app.add_routes([
+            web.get('/forecast/{district}/{service}', self.handle_cell),
+            web.get('/forecasts', self.handle_list),
+            web.get('/statuses', self.handle_statuses),
+            web.get('/health', self.handle_health),
+            web.get('/metrics', self.handle_metrics),
+        ])
+        app.on_startup.append(self._on_startup)
+        app.on_cleanup.append(self._on_cleanup)
+        return app
+
+
+def trends_client_factory(url):
+    """FakeTrendsClient per egress for a local Trends backend (src/fake_trends.py), None = Google."""
+    if not url:
+        return None
+    from src.fake_trends import FakeTrendsClient
+    return lambda proxy: FakeTrendsClient(url, egress=proxy or "serve")
+
+
+def serve(host=HOST, port=PORT, trends_url=None, stale_hours=STALE_HOURS, config=None, overrides=None):
+    service = ForecastService(config, client_factory=trends_client_factory(trends_url), stale_hours=stale_hours,
+                              overrides=overrides)
+    print(f"🛰️  Forecast API on http://{host}:{port} (export: {service.store_dir})")
+    web.run_app(service.app(), host=host, port=port, print=None)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local forecast API over the latest export")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--trends-url", metavar="URL",
+                        help="Trends backend for on-demand forecasts (e.g. `python src/fake_trends.py`)")
+    parser.add_argument("--stale-hours", type=float, default=STALE_HOURS,
+                        help=f"Re-forecast export rows older than this on demand (default {STALE_HOURS})")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.trends_url, args.stale_hours)
@@ -0,0 +1,189 @@
+"""
+Forecaster configuration and the stdlib-only parts of the forecaster: input
+CSVs, batch cache keys and the checkpoint. Light CLI commands (`status`,
+`plan`) use this without importing pandas / NumPy / the Trends client.
+
+    config = ForecasterConfig(work_dir=None, overrides={"RATE_START": 8.0})
+    districts, services = config.load_data()
+"""
+import csv
+import os
+import re
+
+from src.checkpoint import CheckpointLog, read_keys
+from src.trends_cache import TrendsCache
+
+
+class ForecasterConfig:
+    def __init__(self, work_dir=None, overrides=None):
+        # --- CONFIGURATION ---
+        self.BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self.WORK_DIR = work_dir or os.path.join(self.BASE_DIR, 'data')  # output/ + cache/ (e.g. a temp dir for benchmarks)
+        self.DISTRICT_FILE = os.path.join(self.BASE_DIR, 'data', 'raw', 'District_rows.csv')
+        self.SERVICE_FILE = os.path.join(self.BASE_DIR, 'data', 'raw', 'ServiceSubCategory_rows.csv')
+        self.OUTPUT_FILE = os.path.join(self.WORK_DIR, 'output', 'Bali_Forecast_Report_EN.xlsx')
+        self.CHECKPOINT_FILE = os.path.join(self.WORK_DIR, 'output', 'forecast_checkpoint.jsonl')
+        self.EXPORT_FORMATS = ['xlsx', 'csv']
+        self.DASHBOARD_DIR = os.path.join(self.WORK_DIR, 'output', 'dashboard')  # Columnar store + aggregates for dashboard.py
+        self.CACHE_FILE = os.path.join(self.WORK_DIR, 'cache', 'trends_cache.sqlite')
+        self.HISTORY_FILE = os.path.join(self.WORK_DIR, 'cache', 'series_history.sqlite')
+        self.MODEL_STATE_FILE = os.path.join(self.WORK_DIR, 'cache', 'model_state.npy')
+        self.METRICS_DIR = os.path.join(self.WORK_DIR, 'output')  # run_metrics_forecast.json / .prom
+        self.CUBE_DIR = os.path.join(self.WORK_DIR, 'cache', 'series_cube')  # district x service x week store
+        self.BACKTEST_FILE = os.path.join(self.WORK_DIR, 'output', 'backtest.csv')  # Selected model + errors per cell
+        self.BACKTEST_WORKERS = None  # Processes for --backtest (None = all cores)
+
+        # Work queue (--enqueue / --worker / --collect): shared by every worker, so not under WORK_DIR
+        self.QUEUE_FILE = os.path.join(self.BASE_DIR, 'data', 'queue', 'work_queue.sqlite')
+        self.QUEUE_BATCH = 24          # Cells per lease (all from one district -> shared batched queries)
+        self.LEASE_SECONDS = 300       # Lease expires unless heartbeated -> reclaimed by another worker
+        self.QUEUE_POLL_SECONDS = 5    # Idle worker re-checks while others still hold leases
+
+        # Trends query settings (also part of the cache key)
+        self.TIMEFRAME = 'today 12-m'
+        self.REFRESH_TIMEFRAME = 'today 3-m'  # Delta refresh window (spliced onto stored history)
+        self.FORECAST_WEEKS = 52  # History window the forecast sees (same as a full 12-m fetch)
+        self.GEO = 'ID'
+        self.HL = 'en-US'
+        self.TZ = 360
+
+        # Egress endpoints: one Trends session per proxy, queried concurrently.
+        # e.g. TRENDS_PROXIES="https://1.2.3.4:8080,https://5.6.7.8:8080"
+        self.PROXIES = [p.strip() for p in os.environ.get('TRENDS_PROXIES', '').split(',') if p.strip()]
+
+        # Rate limiting per session (requests / minute). Starts around the old
+        # 10-15s pace, speeds up while Google accepts, halves on every 429.
+        self.RATE_START = 5.0
+        self.RATE_MIN = 1.0
+        self.RATE_MAX = 20.0
+
+        # Cache
+        self.CACHE_TTL_HOURS = 24 * 7  # Trends weekly data only changes once a week
+        self.CACHE_MAX_MB = 256
+
+        # Model state: new months advance the stored Holt state; full refit
+        # when the fit is older than REFIT_DAYS or the one-step error drifts
+        self.REFIT_DAYS = 28
+        self.DRIFT_THRESHOLD = 0.25  # Smoothed abs. % error (0.25 = 25%)
+        
+        # Batching
+        # Trends accepts max 5 terms per payload: 4 services + 1 shared anchor.
+        # Every batch is rescaled so the anchor's mean is ANCHOR_LEVEL: indices
+        # are comparable across batches and across runs (stored history/states).
+        self.BATCH_SIZE = 4
+        self.ANCHOR_KEYWORD = "Wisata Bali"
+        self.ANCHOR_LEVEL = 50.0
+        # Below this mean (raw 0-100 of its payload) the anchor is mostly rounding
+        # noise: the batch is refetched one keyword per payload, then scaled
+        # through a chained anchor (a bigger, already scaled keyword)
+        self.ANCHOR_MIN_LEVEL = 2.0
+        self.ANCHOR_FLOOR = 0.5  # Anchor Trends rounds to 0 is at most ~0.5 -> scale is a lower bound
+
+        # Thresholds, in anchor units (ANCHOR_LEVEL = the anchor's average volume)
+        self.VOLUME_THRESHOLD = 0.04 * self.ANCHOR_LEVEL  # Avg volume < 4% of the anchor's -> proxy
+        self.REGION_THRESHOLD = 0.10 * self.ANCHOR_LEVEL  # Region score < 10% of the anchor's -> skip region
+        
+        # Exclusions
+        self.EXCLUDE_KEYWORDS = [
+            'Strip', 'Summerlin', 'Henderson', 'Paradise', 
+            'Spring', 'Enterprise', 'Downtown', 'Winchester', 'Sunrise', 'Whitney'
+        ]
+
+        # --- SMART MAPPING ---
+        # Key (English) -> Value (Indonesian Search Query)
+        # We search in Indo (Accurate), Report in English (Professional)
+        self.KEYWORD_MAP = {
+            "Motorbike": "Sewa Motor",
+            "Car": "Sewa Mobil",
+            "Horse Riding": "Berkuda",
+            "Nightclub": "Club Malam",
+            "Club Crawl": "Party Bali",
+            "Fishing": "Mancing",
+            "Beauty": "Salon",
+            "Tattoo": "Tattoo",
+            "Tour": "Paket Wisata",
+            "Silver Class": "Silver Class",
+            "Diving": "Diving",
+            "Surfing": "Surfing",
+            "Jeep": "Sewa Jeep",
+            "Bottle Service": "Bar Bali",
+            "Trekking": "Trekking",
+            "Dayclub": "Beach Club",
+            "Zoo": "Kebun Binatang",
+            "Hair Color": "Salon Rambut",
+            "Rafting": "Rafting",
+            "Shows": "Tari Bali",
+            "Boat": "Tiket Boat",
+            "Laundry": "Laundry",
+            "ATV": "Main ATV",
+            "Spa": "Spa"
+        }
+
+        # CSV ids per name -> stable integer codes in the cube
+        self.district_ids = {}
+        self.service_ids = {}
+
+        self.override(overrides or {})
+
+    def override(self, values):
+        """{NAME: value} on top of the defaults (paths, thresholds, rates...). Unknown names are an error."""
+        for name, value in values.items():
+            if not name.isupper() or not hasattr(self, name):
+                raise KeyError(f"Unknown setting: {name}")
+            setattr(self, name, value)
+
+    def load_data(self):
+        if not os.path.exists(self.DISTRICT_FILE) or not os.path.exists(self.SERVICE_FILE):
+            raise FileNotFoundError("❌ Raw data not found in data/raw/")
+
+        print("📂 Loading Data...")
+        excluded = re.compile('|'.join(self.EXCLUDE_KEYWORDS), re.IGNORECASE)
+        districts = []
+        for row in _read_rows(self.DISTRICT_FILE):
+            name = row['district']
+            if not name or excluded.search(name):
+                continue
+            if name not in self.district_ids:  # First id per name
+                self.district_ids[name] = row['id']
+                districts.append(name)
+
+        clean_services = []
+        seen = set()
+        for row in _read_rows(self.SERVICE_FILE):
+            name = row['name']
+            if not name or name in seen:
+                continue
+            seen.add(name)
+            clean = name.split('/')[0].strip()
+            clean_services.append(clean)
+            self.service_ids.setdefault(clean, row['id'])
+
+        return districts, clean_services
+
+    def make_batches(self, keywords):
+        """Unique keywords (anchor excluded) in chunks of BATCH_SIZE."""
+        unique_kws = [kw for kw in dict.fromkeys(keywords) if kw != self.ANCHOR_KEYWORD]
+        return [unique_kws[i:i + self.BATCH_SIZE] for i in range(0, len(unique_kws), self.BATCH_SIZE)]
+
+    def batch_cache_keys(self, keywords):
+        return [
+            TrendsCache.make_key(chunk + [self.ANCHOR_KEYWORD], self.TIMEFRAME, self.GEO, self.HL, self.TZ)
+            for chunk in self.make_batches(keywords)
+        ]
+
+    @staticmethod
+    def checkpoint_key(row):
+        # Key based on English Service Name + District
+        return f"{row['Service Category']} {row['District']}"
+
+    def open_checkpoint(self):
+        return CheckpointLog(self.CHECKPOINT_FILE, key_fn=self.checkpoint_key)
+
+    def checkpoint_keys(self):
+        """Done cells, read-only (for `status` / `plan` next to a running sweep)."""
+        return read_keys(self.CHECKPOINT_FILE, self.checkpoint_key)
+
+
+def _read_rows(path):
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        yield from csv.DictReader(f)
@@ -0,0 +1,142 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+MISSING = -1  # Not scraped yet (or failed -> retried on the next run); 0 = scraped, nothing available
+
+
+def checkin_grid(nights, start_offset=1, today=None):
+    """Check-in dates (YYYY-MM-DD) for `nights` consecutive nights from today + start_offset."""
+    start = pd.Timestamp(today or pd.Timestamp.now()).normalize() + pd.Timedelta(days=start_offset)
+    return [d.strftime("%Y-%m-%d") for d in pd.date_range(start, periods=nights, freq="D")]
+
+
+def upcoming_weekends(weeks=8, today=None):
+    """Saturday check-ins of the next `weeks` weekends."""
+    start = pd.Timestamp(today or pd.Timestamp.now()).normalize() + pd.Timedelta(days=1)
+    return [d.strftime("%Y-%m-%d") for d in pd.date_range(start, periods=weeks, freq="W-SAT")]
+
+
+def _write_atomic(path, write):
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class SupplyMatrix:
+    """
+    Available properties of one sweep: district x check-in date int32 matrix
+    (counts.npy, memory-mapped) + index.json with the row/column labels.
+    Reading a district or a set of dates only touches those cells.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "index.json"), encoding="utf-8") as f:
+            index = json.load(f)
+        self.districts = index["districts"]
+        self.dates = index["dates"]
+        self.rows = {d: i for i, d in enumerate(self.districts)}
+        self.cols = {d: i for i, d in enumerate(self.dates)}
+        self.counts = np.load(os.path.join(path, "counts.npy"), mmap_mode="r+")
+
+    @classmethod
+    def create(cls, path, districts, dates, base=None):
+        """New matrix for districts x dates (dates sorted), copying the cells `base` already has."""
+        os.makedirs(path, exist_ok=True)
+        dates = sorted(dates)
+        counts = np.full((len(districts), len(dates)), MISSING, dtype=np.int32)
+        if base is not None:
+            rows = [i for i, d in enumerate(districts) if d in base.rows]
+            cols = [j for j, d in enumerate(dates) if d in base.cols]
+            old_rows = [base.rows[districts[i]] for i in rows]
+            old_cols = [base.cols[dates[j]] for j in cols]
+            counts[np.ix_(rows, cols)] = base.counts[np.ix_(old_rows, old_cols)]
+
+        index = json.dumps({"districts": list(districts), "dates": dates}, ensure_ascii=False)
+        _write_atomic(os.path.join(path, "counts.npy"), lambda f: np.save(f, counts))
+        _write_atomic(os.path.join(path, "index.json"), lambda f: f.write(index.encode("utf-8")))
+        return cls(path)
+
+    @classmethod
+    def open(cls, path, districts=(), dates=()):
+        """Opens (or creates) the sweep at path, grown to cover districts x dates."""
+        if not os.path.exists(os.path.join(path, "index.json")):
+            return cls.create(path, list(districts), list(dates))
+        matrix = cls(path)
+        new_districts = [d for d in districts if d not in matrix.rows]
+        new_dates = [d for d in dates if d not in matrix.cols]
+        if not new_districts and not new_dates:
+            return matrix
+        return cls.create(path, matrix.districts + new_districts, matrix.dates + new_dates, base=matrix)
+
+    def set(self, district, date, count):
+        self.counts[self.rows[district], self.cols[date]] = count
+
+    def pending(self, districts, dates):
+        """(district, date) cells not scraped yet."""
+        rows = [self.rows[d] for d in districts]
+        cols = [self.cols[d] for d in dates]
+        block = self.counts[np.ix_(rows, cols)]
+        return [(districts[i], dates[j]) for i, j in zip(*np.nonzero(block == MISSING))]
+
+    def get(self, district, dates=None):
+        """Supply of one district per check-in date (NaN = not scraped)."""
+        if district not in self.rows:
+            return pd.Series(dtype=float, name=district)
+        dates = self.dates if dates is None else [d for d in dates if d in self.cols]
+        values = self.counts[self.rows[district], [self.cols[d] for d in dates]].astype(float)
+        values[values == MISSING] = np.nan
+        return pd.Series(values, index=pd.to_datetime(dates), name=district)
+
+    def to_frame(self):
+        frame = pd.DataFrame(np.asarray(self.counts), index=self.districts, columns=self.dates)
+        return frame.where(frame != MISSING)
+
+    def flush(self):
+        self.counts.flush()
+
+    def summary(self):
+        done = int((np.asarray(self.counts) != MISSING).sum())
+        return (f"🗓️  Supply: {len(self.districts)} districts x {len(self.dates)} dates | "
+                f"{done}/{self.counts.size} cells | {self.path}")
+
+
+class SupplyStore:
+    """
+    Sweeps partitioned by the day they were scraped: <root>/<YYYY-MM-DD>/.
+    A rerun on the same day resumes that sweep; queries read the newest one.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def partitions(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(p for p in os.listdir(self.root)
+                      if os.path.exists(os.path.join(self.root, p, "index.json")))
+
+    def sweep(self, districts, dates, scraped_on=None):
+        scraped_on = scraped_on or pd.Timestamp.now().strftime("%Y-%m-%d")
+        return SupplyMatrix.open(os.path.join(self.root, scraped_on), districts, dates)
+
+    def latest(self):
+        partitions = self.partitions()
+        return SupplyMatrix(os.path.join(self.root, partitions[-1])) if partitions else None
+
+    def supply(self, district, dates):
+        """Newest known supply of a district for the given check-in dates."""
+        matrix = self.latest()
+        if matrix is None:
+            return pd.Series(dtype=float, name=district)
+        return matrix.get(district, dates)
+
+    def weekends(self, district, weeks=8, today=None):
+        """e.g. supply for Ubud over the next 8 weekends (Saturday check-ins)."""
+        return self.supply(district, upcoming_weekends(weeks, today))
@@ -0,0 +1,129 @@
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+
+class TrendsCache:
+    """
+    Persistent cache for Google Trends responses.
+    SQLite file under data/cache/ + in-process memo in front of it.
+    Key = (keywords, timeframe, geo, hl, tz).
+    """
+
+    def __init__(self, path, ttl_hours=24 * 7, max_mb=256):
+        self.path = path
+        self.ttl = ttl_hours * 3600
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.memo = {}
+        self.lock = threading.RLock()  # Shared by the fetch pool's worker threads
+
+        # Counters (reported at the end of the run)
+        self.hits = 0
+        self.memo_hits = 0
+        self.misses = 0
+        self.stale = 0
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " payload BLOB NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " fetched_at REAL NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self.conn.commit()
+
+    @staticmethod
+    def make_key(keywords, timeframe, geo, hl, tz):
+        # Keyword order matters: Trends scales a payload relative to its own terms
+        return json.dumps([list(keywords), timeframe, geo, hl, tz], ensure_ascii=False)
+
+    def contains(self, key):
+        """Fresh entry present? (does not touch the counters)"""
+        with self.lock:
+            entry = self.memo.get(key)
+            if entry is not None and time.time() - entry[0] <= self.ttl:
+                return True
+            row = self.conn.execute("SELECT fetched_at FROM responses WHERE key = ?", (key,)).fetchone()
+            return row is not None and time.time() - row[0] <= self.ttl
+
+    def get(self, key):
+        """Returns the cached DataFrame, or None if missing/stale."""
+        with self.lock:
+            return self._get(key)
+
+    def _get(self, key):
+        now = time.time()
+
+        entry = self.memo.get(key)
+        if entry is not None:
+            fetched_at, df = entry
+            if now - fetched_at <= self.ttl:
+                self.memo_hits += 1
+                self.hits += 1
+                return df
+            del self.memo[key]
+
+        row = self.conn.execute(
+            "SELECT payload, fetched_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+
+        payload, fetched_at = row
+        if now - fetched_at > self.ttl:
+            self.stale += 1
+            self.misses += 1
+            return None
+
+        try:
+            df = pickle.loads(payload)
+        except Exception:
+            # Written by an incompatible pandas version -> treat as miss
+            self.misses += 1
+            return None
+
+        self.conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+        self.conn.commit()
+        self.memo[key] = (fetched_at, df)
+        self.hits += 1
+        return df
+
+    def put(self, key, df):
+        now = time.time()
+        payload = pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL)
+        with self.lock:
+            self.memo[key] = (now, df)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (key, payload, size, fetched_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, payload, len(payload), now, now),
+            )
+            self.conn.commit()
+            self.evict()
+
+    def evict(self):
+        """Drops least-recently-used entries until the store fits in max_mb."""
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        rows = self.conn.execute("SELECT key, size FROM responses ORDER BY last_access ASC").fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self.memo.pop(key, None)
+            total -= size
+        self.conn.commit()
+
+    def summary(self):
+        lookups = self.hits + self.misses
+        rate = (self.hits / lookups * 100) if lookups else 0
+        return (f"💾 Cache: {self.hits} hits ({self.memo_hits} memo) | "
+                f"{self.misses} misses ({self.stale} stale) | Hit rate: {rate:.0f}%")
@@ -0,0 +1,286 @@
+"""
+Leased work queue in SQLite: one task per (district, service), shared by any
+number of worker processes (one egress / rate-limit budget each).
+
+    queue = WorkQueue("data/queue/work_queue.sqlite")
+    queue.enqueue([(district, service, search_kw, region_score), ...])   # planner
+    tasks = queue.lease("worker-1", limit=24, lease_seconds=300)         # worker
+    with queue.heartbeat("worker-1", [t.id for t in tasks], 300):
+        rows = ...
+    queue.complete("worker-1", {task.id: row for ...})
+
+A lease that is not extended by a heartbeat expires and its tasks go back to
+pending (reclaimed on the next lease call), so a crashed worker only delays
+its cells; after MAX_ATTEMPTS leases, errors or expiries, a task is
+failed. Results of a lost lease are still accepted while nobody else
+holds the tasks; each task keeps exactly one result.
+
+    python src/work_queue.py [--path ...]    # status
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import namedtuple
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+STATES = (PENDING, LEASED, DONE, FAILED)
+
+MAX_ATTEMPTS = 3  # Leases that ended in an error or expired before a task is marked failed
+
+Task = namedtuple("Task", ["id", "district", "service", "search_kw", "region_score"])
+
+
+def _extend(conn, worker, ids, lease_seconds):
+    now = time.time()
+    cursor = conn.executemany(
+        "UPDATE tasks SET lease_until = ?, updated_at = ? WHERE id = ? AND worker = ? AND state = ?",
+        [(now + lease_seconds, now, task_id, worker, LEASED) for task_id in ids],
+    )
+    return cursor.rowcount
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, timeout=60, isolation_level=None)  # Autocommit, explicit BEGIN
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class WorkQueue:
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = _connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS tasks ("
+            " id INTEGER PRIMARY KEY,"
+            " district TEXT NOT NULL,"
+            " service TEXT NOT NULL,"
+            " search_kw TEXT NOT NULL,"
+            " region_score REAL,"
+            " state TEXT NOT NULL DEFAULT 'pending',"
+            " worker TEXT,"
+            " lease_until REAL,"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " error TEXT,"
+            " result TEXT,"
+            " updated_at REAL NOT NULL,"
+            " UNIQUE (district, service))"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS tasks_state ON tasks (state, id)")
+
+        # Counters of this process (reported by the worker)
+        self.leased = 0
+        self.reclaimed = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _transaction(self):
+        """BEGIN IMMEDIATE: takes the write lock up front, so two leases never pick the same task."""
+        conn = self.conn
+
+        class Transaction:
+            def __enter__(self):
+                conn.execute("BEGIN IMMEDIATE")
+                return conn
+
+            def __exit__(self, exc_type, exc, tb):
+                conn.execute("ROLLBACK" if exc_type else "COMMIT")
+
+        return Transaction()
+
+    # --- Planner ---
+    def enqueue(self, tasks):
+        """(district, service, search_kw, region_score) per task; known cells are left alone. Returns new count."""
+        now = time.time()
+        with self._transaction() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO tasks (district, service, search_kw, region_score, updated_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                [(d, s, kw, score, now) for d, s, kw, score in tasks],
+            )
+            return conn.total_changes - before
+
+    # --- Worker ---
+    def reclaim(self, conn=None):
+        """
+        Expired leases -> pending, or failed after MAX_ATTEMPTS leases (a task
+        that crashes its worker every time). Returns how many went back to pending.
+        """
+        conn = conn or self.conn
+        now = time.time()
+        conn.execute(
+            "UPDATE tasks SET state = ?, worker = NULL, lease_until = NULL,"
+            " error = 'Lease expired ' || attempts || ' times', updated_at = ?"
+            " WHERE state = ? AND lease_until < ? AND attempts >= ?",
+            (FAILED, now, LEASED, now, MAX_ATTEMPTS),
+        )
+        cursor = conn.execute(
+            "UPDATE tasks SET state = ?, worker = NULL, lease_until = NULL, updated_at = ?"
+            " WHERE state = ? AND lease_until < ?",
+            (PENDING, now, LEASED, now),
+        )
+        self.reclaimed += cursor.rowcount
+        return cursor.rowcount
+
+    def lease(self, worker, limit, lease_seconds):
+        """
+        Up to `limit` pending tasks of one district (its cells share batched
+        queries), leased to `worker` for `lease_seconds`. [] when nothing is pending.
+        """
+        with self._transaction() as conn:
+            self.reclaim(conn)
+            first = conn.execute(
+                "SELECT district FROM tasks WHERE state = ? ORDER BY id LIMIT 1", (PENDING,)
+            ).fetchone()
+            if first is None:
+                return []
+            rows = conn.execute(
+                "SELECT id, district, service, search_kw, region_score FROM tasks"
+                " WHERE state = ? AND district = ? ORDER BY id LIMIT ?",
+                (PENDING, first[0], limit),
+            ).fetchall()
+            now = time.time()
+            conn.executemany(
+                "UPDATE tasks SET state = ?, worker = ?, lease_until = ?, attempts = attempts + 1, updated_at = ?"
+                " WHERE id = ?",
+                [(LEASED, worker, now + lease_seconds, now, row[0]) for row in rows],
+            )
+        self.leased += len(rows)
+        return [Task(*row) for row in rows]
+
+    def extend(self, worker, ids, lease_seconds):
+        """Pushes the lease of `worker`'s tasks forward. Returns how many it still holds."""
+        return _extend(self.conn, worker, ids, lease_seconds)
+
+    def heartbeat(self, worker, ids, lease_seconds, interval=None):
+        """Context manager: extends the lease every `interval` seconds (default a third of it) from a thread."""
+        return Heartbeat(self.path, worker, ids, lease_seconds, interval or lease_seconds / 3)
+
+    def complete(self, worker, results):
+        """
+        {task id: result row}. Accepted while the task is leased by `worker`
+        or back to pending (lease expired, nobody took it yet). Returns accepted count.
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            accepted = 0
+            for task_id, row in results.items():
+                cursor = conn.execute(
+                    "UPDATE tasks SET state = ?, worker = ?, lease_until = NULL, result = ?, error = NULL,"
+                    " updated_at = ? WHERE id = ? AND ((state = ? AND worker = ?) OR state = ?)",
+                    (DONE, worker, json.dumps(row, ensure_ascii=False, default=str), now,
+                     task_id, LEASED, worker, PENDING),
+                )
+                accepted += cursor.rowcount
+        self.completed += accepted
+        self.rejected += len(results) - accepted
+        return accepted
+
+    def fail(self, worker, ids, error):
+        """Back to pending, or failed after MAX_ATTEMPTS leases."""
+        now = time.time()
+        with self._transaction() as conn:
+            conn.executemany(
+                "UPDATE tasks SET state = CASE WHEN attempts >= ? THEN ? ELSE ? END,"
+                " worker = NULL, lease_until = NULL, error = ?, updated_at = ?"
+                " WHERE id = ? AND worker = ? AND state = ?",
+                [(MAX_ATTEMPTS, FAILED, PENDING, str(error)[:500], now, task_id, worker, LEASED) for task_id in ids],
+            )
+
+    def release(self, worker, ids):
+        """Gives unfinished tasks back without counting the attempt (clean shutdown)."""
+        with self._transaction() as conn:
+            conn.executemany(
+                "UPDATE tasks SET state = ?, worker = NULL, lease_until = NULL, attempts = attempts - 1,"
+                " updated_at = ? WHERE id = ? AND worker = ? AND state = ?",
+                [(PENDING, time.time(), task_id, worker, LEASED) for task_id in ids],
+            )
+
+    # --- Coordinator ---
+    def counts(self):
+        counts = dict.fromkeys(STATES, 0)
+        counts.update(self.conn.execute("SELECT state, COUNT(*) FROM tasks GROUP BY state").fetchall())
+        return counts
+
+    def results(self):
+        """Result rows of every done task, in plan order."""
+        for (result,) in self.conn.execute("SELECT result FROM tasks WHERE state = ? ORDER BY id", (DONE,)):
+            yield json.loads(result)
+
+    def workers(self):
+        """{worker: (done, leased)} over the whole queue."""
+        stats = {}
+        for worker, state, n in self.conn.execute(
+            "SELECT worker, state, COUNT(*) FROM tasks WHERE worker IS NOT NULL GROUP BY worker, state"
+        ):
+            done, leased = stats.get(worker, (0, 0))
+            stats[worker] = (done + n, leased) if state == DONE else (done, leased + n)
+        return stats
+
+    def summary(self):
+        counts = self.counts()
+        total = sum(counts.values())
+        if not total:
+            return "📬 Queue: empty"
+        states = " | ".join(f"{state} {counts[state]}" for state in STATES)
+        return f"📬 Queue: {total} tasks | {states} ({counts[DONE] / total:.0%} done)"
+
+    def close(self):
+        self.conn.close()
+
+
+class Heartbeat:
+    """Extends a lease from a background thread (own connection) until the block ends."""
+
+    def __init__(self, path, worker, ids, lease_seconds, interval):
+        self.path = path
+        self.worker = worker
+        self.ids = list(ids)
+        self.lease_seconds = lease_seconds
+        self.interval = interval
+        self.stop = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.beats = 0
+        self.lost = False  # Another worker reclaimed part of the lease
+
+    def _run(self):
+        conn = _connect(self.path)
+        try:
+            while not self.stop.wait(self.interval):
+                held = _extend(conn, self.worker, self.ids, self.lease_seconds)
+                self.beats += 1
+                self.lost = self.lost or held < len(self.ids)
+        finally:
+            conn.close()
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop.set()
+        self.thread.join()
+
+
+if __name__ == "__main__":
+    BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description="Status of the forecaster's work queue")
+    parser.add_argument("--path", default=os.path.join(BASE_DIR, 'data', 'queue', 'work_queue.sqlite'))
+    args = parser.parse_args()
+
+    if not os.path.exists(args.path):
+        print(f"⚠️ No queue at {args.path}. Run `python src/cli.py fetch --enqueue` first.")
+        sys.exit(1)
+    queue = WorkQueue(args.path)
+    print(queue.summary())
+    for worker, (done, leased) in sorted(queue.workers().items()):
+        print(f"   👷 {worker:<20} {done:>6} done  {leased:>4} leased")
@@ -0,0 +1,74 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from src.batch_forecast import (
+    STATUS_NO_DATA, STATUS_OK, STATUS_TOO_SHORT, compare_with_reference, forecast_frame,
+    holt_forecast_batch, reference_forecast,
+)
+
+WEEKS = pd.date_range("2024-01-07", periods=53, freq="W")  # 'today 12-m' shape, last month complete
+
+
+def random_frame(n, seed=0):
+    """Trends-like weekly series: 0-100 ints, random level / slope / noise."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(len(WEEKS))
+    data = {}
+    for i in range(n):
+        level, slope, noise = rng.uniform(5, 80), rng.uniform(-0.5, 0.5), rng.uniform(0, 10)
+        data[f"s{i}"] = np.clip(np.round(level + slope * t + rng.normal(0, noise, len(t))), 0, 100)
+    return pd.DataFrame(data, index=WEEKS)
+
+
+def test_batch_matches_statsmodels():
+    frame = random_frame(200)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")  # statsmodels convergence warnings
+        compared = compare_with_reference(frame)
+
+    assert (compared["Batch Status"] == "OK").all()
+    assert (compared["Batch Status"] == compared["Reference Status"]).all()
+
+    # Same fit for almost every series; the grid search may settle on a
+    # nearby optimum where statsmodels' optimizer does not
+    error = (compared["Batch Forecast"] - compared["Reference Forecast"]).abs().to_numpy()
+    error = error / frame.max().to_numpy()
+    assert np.mean(error < 0.01) >= 0.95
+    assert error.max() < 0.25
+
+
+def test_status_codes():
+    Y = np.array([
+        [np.nan, np.nan, np.nan, np.nan, np.nan, np.nan],  # No data
+        [np.nan, np.nan, np.nan, np.nan, 40.0, 42.0],      # Two usable months
+        [30.0, 30.0, 30.0, 30.0, 30.0, 30.0],              # Flat
+        [0.0, 0.0, 0.0, 0.0, 0.0, 0.0],                    # Flat at zero
+        [10.0, 12.0, np.nan, 16.0, 18.0, 20.0],            # Internal gap is filled
+    ])
+    result = holt_forecast_batch(Y)
+
+    assert list(result.status) == [STATUS_NO_DATA, STATUS_TOO_SHORT, STATUS_OK, STATUS_OK, STATUS_OK]
+    assert result.forecast[0] == result.forecast[1] == 0.0
+    assert result.growth[0] == result.growth[1] == 0.0
+    assert result.avg_volume[0] == 0.0 and result.avg_volume[1] == 41.0
+
+    assert np.isclose(result.forecast[2], 30.0) and np.isclose(result.growth[2], 0.0, atol=1e-6)
+    assert np.isclose(result.forecast[3], 0.0) and result.growth[3] == 0.0
+    assert np.isclose(result.forecast[4], 24.0, atol=0.5)
+
+
+def test_status_codes_from_weekly_frame():
+    frame = pd.DataFrame(index=WEEKS)
+    frame["empty"] = np.nan
+    frame["flat"] = 30.0
+    frame["zero"] = 0.0
+    frame["isPartial"] = False
+
+    batch = forecast_frame(frame.iloc[-9:])  # Nov, Dec and an incomplete Jan (dropped)
+    assert list(batch.status) == [STATUS_NO_DATA, STATUS_TOO_SHORT, STATUS_TOO_SHORT]
+
+    batch = forecast_frame(frame)
+    assert list(batch.status) == [STATUS_NO_DATA, STATUS_OK, STATUS_OK]
+    assert reference_forecast(frame["empty"])[3] == STATUS_NO_DATA
@@ -0,0 +1,7 @@
+from src.benchmark import bench_ota
+
+
+def test_ota_benchmark_survives_captchas():
+    result = bench_ota(1, p_captcha=0.2)
+    assert result['captchas'] > 0
+    assert 0 < result['ok'] < result['requests']
@@ -0,0 +1,57 @@
+import json
+
+from src import cli
+
+
+def test_export_keeps_the_sweep_metrics(tmp_path, capsys):
+    output = tmp_path / 'output'
+    output.mkdir()
+    (output / 'run_metrics_forecast.json').write_text(json.dumps({"counters": {"requests": 42}}))
+
+    cli.main(["--work-dir", str(tmp_path), "export"])
+    assert (output / 'run_metrics_export.json').exists()
+    assert json.loads((output / 'run_metrics_forecast.json').read_text())["counters"]["requests"] == 42
+
+    capsys.readouterr()
+    cli.main(["--work-dir", str(tmp_path), "status"])
+    out = capsys.readouterr().out
+    assert "Requests: 42" in out
+    assert "Other runs: export" in out
+
+
+def test_scrape_ota_weekends(monkeypatch):
+    from src import ota_scraper
+
+    calls = []
+    monkeypatch.setattr(ota_scraper, 'print_weekends', lambda district, weeks: calls.append((district, weeks)))
+    cli.main(["scrape-ota", "--weekends", "Ubud", "--weeks", "3"])
+    cli.main(["scrape-ota", "--weekends", "Kuta"])
+    assert calls == [("Ubud", 3), ("Kuta", 8)]
+
+
+def test_status_and_plan_are_read_only(tmp_path, capsys):
+    cli.main(["--work-dir", str(tmp_path), "status"])
+    cli.main(["--work-dir", str(tmp_path), "plan"])
+    assert list(tmp_path.iterdir()) == []
+
+    # A sweep is mid-append: the partial line stays as it is and no `.keys` sidecar is rebuilt
+    output = tmp_path / 'output'
+    output.mkdir()
+    checkpoint = output / 'forecast_checkpoint.jsonl'
+    row = {"Service Category": "Surf Lessons", "District": "Kuta"}
+    data = (json.dumps(row) + "\n" + '{"Service Category": "Yo').encode()
+    checkpoint.write_bytes(data)
+
+    capsys.readouterr()
+    cli.main(["--work-dir", str(tmp_path), "status"])
+    cli.main(["--work-dir", str(tmp_path), "plan"])
+    assert "Forecast: 1/" in capsys.readouterr().out
+    assert checkpoint.read_bytes() == data
+    assert sorted(p.name for p in output.iterdir()) == ['forecast_checkpoint.jsonl']
+
+
+def test_plan_prune_writes_metrics(tmp_path, capsys):
+    cli.main(["--work-dir", str(tmp_path), "plan", "--prune"])
+    assert (tmp_path / 'output' / 'run_metrics_plan.json').exists()
+    cli.main(["--work-dir", str(tmp_path), "status"])
+    assert "Other runs: plan" in capsys.readouterr().out
@@ -0,0 +1,103 @@
+from src.fetch_pool import TrendsFetchPool, TrendsSession
+from src.rate_limiter import AdaptiveRateLimiter
+
+
+class Clock:
+    """Shared fake time: sleeping only moves the clock forward."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class ScriptedClient:
+    """Raises the next scripted error (None = answer) on every request."""
+
+    def __init__(self, proxy, script, calls):
+        self.proxy = proxy
+        self.script = script
+        self.calls = calls
+
+    def build_payload(self, keywords, timeframe=None, geo=None):
+        self.keywords = keywords
+
+    def interest_over_time(self):
+        self.calls.append(self.proxy)
+        error = self.script[self.proxy].pop(0) if self.script[self.proxy] else None
+        if error:
+            raise Exception(error)
+        return {"proxy": self.proxy, "keywords": self.keywords}
+
+
+def make_pool(script, max_retries=3):
+    clock, calls, clients = Clock(), [], []
+
+    def client_factory(proxy):
+        clients.append(proxy)
+        return ScriptedClient(proxy, script, calls)
+
+    pool = TrendsFetchPool.from_proxies(
+        list(script), client_factory=client_factory, max_retries=max_retries,
+        limiter_factory=lambda: AdaptiveRateLimiter(rate_per_min=60, jitter=0, clock=clock, sleep=clock.sleep),
+    )
+    return pool, clock, calls, clients
+
+
+def test_429_retries_on_another_session():
+    pool, clock, calls, clients = make_pool({"a": ["429 Too Many Requests"], "b": []})
+    cooled = []
+    data = pool.fetch(["Spa Ubud"], "today 12-m", "ID", on_rate_limit=lambda s, ctx, wait: cooled.append(s.name))
+
+    assert data == {"proxy": "b", "keywords": ["Spa Ubud"]}
+    assert calls == ["a", "b"] and cooled == ["s0:a"]
+    totals = pool.totals()
+    assert totals["rate_limited"] == 1 and totals["retries"] == 1 and totals["failed_queries"] == 0
+    # Only the session that got the 429 cools down
+    a, b = pool.sessions
+    assert a.limiter.cooldown_until > clock() and b.limiter.cooldown_until <= clock()
+
+
+def test_client_is_rebuilt_after_an_error():
+    pool, clock, calls, clients = make_pool({"a": ["Connection reset", None]})
+    assert pool.fetch(["Spa Ubud"], "today 12-m", "ID") is not None
+    assert clients == ["a", "a"] and pool.totals()["fetch_errors"] == 1
+
+
+def test_every_attempt_failing_returns_none():
+    pool, clock, calls, clients = make_pool({"a": ["boom"] * 3}, max_retries=3)
+    assert pool.fetch(["Spa Ubud"], "today 12-m", "ID") is None
+    assert pool.totals()["failed_queries"] == 1 and pool.totals()["retries"] == 2
+
+
+def test_failing_session_is_benched_then_tried_again():
+    pool, clock, calls, clients = make_pool({"a": ["boom"] * TrendsSession.UNHEALTHY_AFTER, "b": []})
+    a, b = pool.sessions
+    # Pin every attempt to "a" until it is benched
+    b.busy = True
+    assert pool.fetch(["Spa Ubud"], "today 12-m", "ID") is None
+    b.busy = False
+    assert not a.healthy and a.benched_until == clock() + TrendsSession.UNHEALTHY_COOLDOWN
+
+    # While benched, queries go to the healthy session even though "a" is free and first
+    for _ in range(3):
+        assert pool.fetch(["Spa Ubud"], "today 12-m", "ID")["proxy"] == "b"
+    assert "a" not in calls[TrendsSession.UNHEALTHY_AFTER:]
+
+    clock.sleep(TrendsSession.UNHEALTHY_COOLDOWN)
+    assert a.healthy and a.failures == 0
+    b.busy = True
+    assert pool.fetch(["Spa Ubud"], "today 12-m", "ID")["proxy"] == "a"
+    assert pool.summary().startswith("🚦 Sessions: 2/2 healthy")
+
+
+def test_only_benched_sessions_left_waits_for_the_bench():
+    pool, clock, calls, clients = make_pool({"a": ["boom"] * TrendsSession.UNHEALTHY_AFTER})
+    assert pool.fetch(["Spa Ubud"], "today 12-m", "ID") is None
+    benched_until = pool.sessions[0].benched_until
+    assert pool.fetch(["Spa Ubud"], "today 12-m", "ID") is not None
+    assert clock() >= benched_until
@@ -0,0 +1,66 @@
+import pandas as pd
+import pytest
+
+from src.fake_trends import FakeTrendReq
+from src.forecaster import BaliDemandForecaster
+from src.rate_limiter import AdaptiveRateLimiter
+
+ANCHOR = "Wisata Bali"
+WEEKS = pd.date_range("2025-01-05", periods=52, freq="W-SUN")
+
+
+def flat(level):
+    return pd.Series(float(level), index=WEEKS)
+
+
+@pytest.fixture
+def forecaster(tmp_path):
+    recorded = {ANCHOR: flat(10), "Small": flat(5), "Mid": flat(20), "Big": flat(1000), "Huge": flat(20000)}
+    forecaster = BaliDemandForecaster(
+        client_factory=lambda proxy: FakeTrendReq(latency=(0, 0), recorded=recorded),
+        limiter_factory=lambda: AdaptiveRateLimiter(rate_per_min=60000, max_rate=60000, jitter=0),
+        work_dir=str(tmp_path),
+    )
+    yield forecaster
+    forecaster.models.flush()
+
+
+def test_batches_share_the_anchor_scale(forecaster):
+    data = forecaster.fetch_batched(["Small", "Mid"])
+    # Anchor = ANCHOR_LEVEL: half the anchor's volume -> 25, twice -> 100
+    assert data["Small"].mean() == pytest.approx(25)
+    assert data["Mid"].mean() == pytest.approx(100)
+
+
+def test_dominant_keyword_is_scaled_through_a_bridge(forecaster):
+    # Next to "Big" the anchor rounds to ~1 of 100: refetched per keyword,
+    # then "Big" is scaled through "Mid" (already on the anchor scale)
+    data = forecaster.fetch_batched(["Small", "Mid", "Big"])
+    assert sorted(data.columns) == ["Big", "Mid", "Small"]
+    assert data["Small"].mean() == pytest.approx(25)
+    assert data["Mid"].mean() == pytest.approx(100)
+    assert data["Big"].mean() == pytest.approx(5000)
+    assert forecaster.metrics.counters["anchor_refetches"] == 3
+    assert forecaster.metrics.counters["anchor_bridged"] == 1
+
+
+def test_bridges_chain_up_to_the_biggest_keyword(forecaster):
+    # "Huge" dwarfs "Mid" too: it is scaled through "Big" once "Big" is scaled
+    data = forecaster.fetch_batched(["Mid", "Big", "Huge"])
+    assert data["Big"].mean() == pytest.approx(5000)
+    assert data["Huge"].mean() == pytest.approx(100000)
+    assert forecaster.metrics.counters["anchor_bridged"] == 2
+    assert "anchor_coarse" not in forecaster.metrics.counters
+
+
+def test_keyword_without_a_bridge_keeps_a_coarse_scale(forecaster, capsys):
+    # Alone, "Huge" has no bridge; its anchor rounds to 0 -> floored, a lower bound
+    data = forecaster.fetch_batched(["Huge"])
+    assert data["Huge"].mean() == pytest.approx(100 * forecaster.ANCHOR_LEVEL / forecaster.ANCHOR_FLOOR)
+    assert forecaster.metrics.counters["anchor_coarse"] == 1
+    assert capsys.readouterr().out.endswith("(lower bound)\n")
+
+
+def test_thresholds_are_in_anchor_units(forecaster):
+    assert forecaster.VOLUME_THRESHOLD == pytest.approx(0.04 * forecaster.ANCHOR_LEVEL)
+    assert forecaster.REGION_THRESHOLD == pytest.approx(0.10 * forecaster.ANCHOR_LEVEL)
@@ -0,0 +1,93 @@
+import pytest
+
+from src.fake_trends import FakeTrendReq
+from src.forecaster import BaliDemandForecaster
+from src.planner import QueryPlan
+from src.rate_limiter import AdaptiveRateLimiter
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class FlakyTrendReq(FakeTrendReq):
+    """Synthetic Trends data; payloads with a term in `failing` raise like a dropped connection."""
+
+    def __init__(self, failing):
+        super().__init__(latency=(0, 0))
+        self.failing = failing
+
+    def interest_over_time(self):
+        if self.failing.intersection(self.kw_list):
+            raise ConnectionError("Connection reset")
+        return super().interest_over_time()
+
+
+def forecaster_for(tmp_path, failing, districts=2):
+    clock = Clock()
+    forecaster = BaliDemandForecaster(
+        client_factory=lambda proxy: FlakyTrendReq(failing),
+        limiter_factory=lambda: AdaptiveRateLimiter(rate_per_min=60000, max_rate=60000, jitter=0,
+                                                    clock=clock, sleep=clock.sleep),
+        work_dir=str(tmp_path),
+    )
+    load_data = forecaster.load_data
+    forecaster.load_data = lambda: (lambda d, s: (d[:districts], s))(*load_data())
+    forecaster.export_report = lambda: []
+    return forecaster
+
+
+def test_missing_proxies_are_not_pruned():
+    plan = QueryPlan(["Ubud"], ["Spa", "Yoga"], {})
+    assert plan.prune({"Spa": 0.5}, threshold=2.0) == {"Spa"}  # Yoga: no proxy forecast -> kept
+    assert plan.specific_keywords("Ubud") == ["Yoga Ubud"]
+
+
+def test_failed_stage_one_does_not_finalize_cells(tmp_path):
+    forecaster = forecaster_for(tmp_path, set())
+    districts, services = forecaster.load_data()
+    plan = forecaster.build_plan(districts, services)
+    # Bali-wide proxies fail, and so does one service's specific query -> it needs the missing proxy
+    lost_kw = plan.all_search_kws[0]
+    failing = set(plan.proxy_keywords()) | {plan.specific_kw(lost_kw, d) for d in districts}
+
+    forecaster = forecaster_for(tmp_path, failing)
+    forecaster.run()
+    assert not forecaster.build_plan(districts, services).pruned
+    done = forecaster.open_checkpoint().read_keys()
+    lost = {f"{item} {d}" for d in districts for item, kw in plan.cells_for(d) if kw == lost_kw}
+    assert lost and not lost & done  # Its whole batch fell back to the missing proxy
+    assert 0 < len(done) < len(plan.cells)
+
+    # Next run (Trends back) retries what was not final
+    forecaster = forecaster_for(tmp_path, set())
+    forecaster.run()
+    assert len(forecaster.open_checkpoint().read_keys()) == len(plan.cells)
+
+
+def test_failed_region_check_is_retried(tmp_path):
+    forecaster = forecaster_for(tmp_path, set())
+    districts, services = forecaster.load_data()
+    plan = forecaster.build_plan(districts, services)
+
+    forecaster = forecaster_for(tmp_path, set(plan.region_keywords()))
+    forecaster.run()
+    assert forecaster.open_checkpoint().read_keys() == set()
+
+
+def test_on_demand_cell_without_proxy_data_raises(tmp_path):
+    forecaster = forecaster_for(tmp_path, set())
+    districts, services = forecaster.load_data()
+    plan = forecaster.build_plan(districts[:1], services[:1])
+    failing = set(plan.proxy_keywords()) | {plan.specific_kw(plan.all_search_kws[0], districts[0])}
+
+    forecaster = forecaster_for(tmp_path, failing)
+    with pytest.raises(RuntimeError, match="proxy"):
+        forecaster.forecast_cell(districts[0], services[0])
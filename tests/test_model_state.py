@@ -0,0 +1,36 @@
+import numpy as np
+
+from src.model_state import STATE_DTYPE, ModelStateStore
+
+MONTHS = np.arange(24000, 24012, dtype=np.int32)
+
+
+def series(n):
+    return np.array([50 + 2 * i + 3 * (i % 3) for i in range(12)], dtype=float)[None, :].repeat(n, 0)
+
+
+def test_long_keys_are_stored_whole_and_reused(tmp_path):
+    path = str(tmp_path / 'model_state.npy')
+    prefix = "Surf Lessons " + "Very Long District Name " * 3
+    keys = [prefix + "Canggu", prefix + "Uluwatu", "Spa Ubud"]
+    assert len(keys[0]) > 64 and keys[0][:64] == keys[1][:64]
+
+    store = ModelStateStore(path)
+    store.forecast(keys, series(3), MONTHS)
+    store.flush()
+    assert store.refits == 3 and store.size == 3
+
+    store = ModelStateStore(path)
+    assert sorted(store.index) == sorted(keys)
+    store.forecast(keys, series(3), MONTHS)
+    assert store.refits == 0 and store.reused == 3 and store.size == 3
+
+
+def test_truncated_keys_of_the_old_layout_are_dropped(tmp_path):
+    path = str(tmp_path / 'model_state.npy')
+    states = np.zeros(2, dtype=STATE_DTYPE)
+    states["key"] = ["x" * 100, "Spa Ubud"]  # First one was cut to 64 characters
+    np.save(path, states)
+
+    store = ModelStateStore(path)
+    assert list(store.index) == ["Spa Ubud"]
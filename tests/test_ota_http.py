@@ -0,0 +1,92 @@
+import asyncio
+
+from aiohttp import web
+
+from src.fake_ota import CAPTCHA_FIXTURE
+from src.ota_http import OUTCOME_CAPTCHA, OUTCOME_OK, CountHeadingParser, HttpCountClient
+
+# Valid results page whose inline script / CSS mention "captcha"
+RESULTS_WITH_CAPTCHA_SCRIPT = """<!DOCTYPE html>
+<html><head>
+<style>.captcha-widget { display: none; }</style>
+<script>window.captchaConfig = {challenge: "verify you are a human"};</script>
+</head><body>
+<h1 class="e1f827110f">Ubud: 1,234 properties found</h1>
+<div class="results">...</div>
+</body></html>"""
+
+
+def fetch(html, stats=None):
+    async def page(request):
+        return web.Response(text=html, content_type="text/html")
+
+    async def run():
+        app = web.Application()
+        app.router.add_get("/", page)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        try:
+            async with HttpCountClient(limit=2) as client:
+                result = await client.fetch_count(f"http://127.0.0.1:{port}/")
+                if stats is not None:
+                    stats.update(early_stops=client.early_stops, bytes_read=client.bytes_read)
+                return result
+        finally:
+            await runner.cleanup()
+
+    return asyncio.run(run())
+
+
+def test_parser_ignores_script_and_style():
+    parser = CountHeadingParser()
+    parser.feed(RESULTS_WITH_CAPTCHA_SCRIPT)
+    assert parser.heading == "Ubud: 1,234 properties found"
+    assert not parser.captcha
+
+
+def test_results_page_with_captcha_script_is_ok():
+    count, text, outcome, _ = fetch(RESULTS_WITH_CAPTCHA_SCRIPT)
+    assert outcome == OUTCOME_OK
+    assert count == 1234
+
+
+def test_h1_count_wins_over_captcha_class():
+    html = '<div class="captcha-badge"></div><h1>Kuta: 87 properties found</h1>'
+    count, _, outcome, _ = fetch(html)
+    assert (count, outcome) == (87, OUTCOME_OK)
+
+
+def test_captcha_page_is_captcha():
+    with open(CAPTCHA_FIXTURE, encoding="utf-8") as f:
+        html = f.read()
+    count, _, outcome, _ = fetch(html)
+    assert (count, outcome) == (0, OUTCOME_CAPTCHA)
+
+
+def test_parser_stops_at_captcha_challenge():
+    with open(CAPTCHA_FIXTURE, encoding="utf-8") as f:
+        html = f.read()
+    head, tail = html.split("</p>", 1)
+    parser = CountHeadingParser()
+    parser.feed(head + "</p>")
+    assert parser.done and parser.captcha
+    assert parser.heading is None
+
+    # Only a captcha class before the H1: keep reading
+    parser = CountHeadingParser()
+    parser.feed('<div class="captcha-badge"></div>')
+    assert parser.captcha and not parser.done
+
+
+def test_captcha_page_with_large_body_stops_early():
+    with open(CAPTCHA_FIXTURE, encoding="utf-8") as f:
+        html = f.read()
+    html = html.replace("</body>", "<div>" + "x" * (HttpCountClient.DRAIN_LIMIT * 2) + "</div></body>")
+    stats = {}
+    count, _, outcome, _ = fetch(html, stats)
+    assert (count, outcome) == (0, OUTCOME_CAPTCHA)
+    assert stats["early_stops"] == 1
+    assert stats["bytes_read"] < len(html)
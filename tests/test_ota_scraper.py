@@ -0,0 +1,24 @@
+import math
+
+from src.ota_scraper import supply_status, supply_writer
+from src.supply_store import SupplyMatrix
+
+
+def test_sweep_stores_zero_and_retries_failures(tmp_path):
+    districts, dates = ["Ubud", "Kuta"], ["2026-11-07", "2026-11-14"]
+    matrix = SupplyMatrix.create(str(tmp_path), districts, dates)
+    save = supply_writer(matrix, [])
+
+    save(("Ubud", "2026-11-07"), 0, "Ubud: 0 properties found", 0.1, "HTTP")
+    save(("Ubud", "2026-11-14"), None, "Captcha", 0.1, "HTTP")
+    save(("Kuta", "2026-11-07"), 350, "Kuta: 350 properties found", 0.1, "HTTP")
+
+    # Zero is a result: not scraped again; the failure stays pending
+    assert sorted(matrix.pending(districts, dates)) == [("Kuta", "2026-11-14"), ("Ubud", "2026-11-14")]
+    ubud = matrix.get("Ubud")
+    assert ubud.iloc[0] == 0 and math.isnan(ubud.iloc[1])
+
+
+def test_supply_status_tells_zero_from_failure():
+    assert supply_status(0) != supply_status(None)
+    assert supply_status(None) == "❌ ERROR/BLOCKED"
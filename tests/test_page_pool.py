@@ -0,0 +1,99 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.page_pool import PagePool
+
+
+class FakePage:
+    def __init__(self, number):
+        self.number = number
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeContext:
+    """Browser context double: hands out numbered pages and records the route handler."""
+
+    def __init__(self):
+        self.pages = []
+        self.handler = None
+
+    async def route(self, pattern, handler):
+        self.handler = handler
+
+    async def new_page(self):
+        self.pages.append(FakePage(len(self.pages)))
+        return self.pages[-1]
+
+
+class FakeRoute:
+    def __init__(self, url, resource_type):
+        self.request = SimpleNamespace(url=url, resource_type=resource_type)
+        self.outcome = None
+
+    async def abort(self):
+        self.outcome = 'aborted'
+
+    async def continue_(self):
+        self.outcome = 'continued'
+
+
+def test_pages_are_bounded_and_reused():
+    context = FakeContext()
+    in_use, peak, used = set(), [0], []
+
+    async def scrape(pool):
+        async with pool.page() as page:
+            assert page.number not in in_use  # Never lent to two tasks at once
+            in_use.add(page.number)
+            peak[0] = max(peak[0], len(in_use))
+            used.append(page.number)
+            await asyncio.sleep(0.001)
+            in_use.discard(page.number)
+
+    async def run():
+        pool = await PagePool(context, size=3).start()
+        await asyncio.gather(*(scrape(pool) for _ in range(20)))
+        return pool
+
+    pool = asyncio.run(run())
+    assert len(context.pages) == 3 and peak[0] == 3
+    assert len(used) == 20 and set(used) == {0, 1, 2}
+    assert pool.pages.qsize() == 3
+
+
+def test_page_goes_back_after_an_error():
+    async def run():
+        pool = await PagePool(FakeContext(), size=1).start()
+        with pytest.raises(RuntimeError):
+            async with pool.page():
+                raise RuntimeError("navigation failed")
+        async with pool.page() as page:
+            return pool, page
+
+    pool, page = asyncio.run(run())
+    assert page.number == 0 and pool.pages.qsize() == 1
+
+
+def test_heavy_and_tracking_requests_are_blocked():
+    context = FakeContext()
+
+    async def run():
+        pool = await PagePool(context, size=1).start()
+        routes = [FakeRoute("https://www.booking.com/searchresults.html", 'document'),
+                  FakeRoute("https://cf.bstatic.com/hotel.jpg", 'image'),
+                  FakeRoute("https://www.google-analytics.com/collect?v=1", 'xhr'),
+                  FakeRoute("https://cf.bstatic.com/font.woff2", 'font')]
+        for route in routes:
+            await context.handler(route)
+        await pool.close()
+        return pool, routes
+
+    pool, routes = asyncio.run(run())
+    assert [r.outcome for r in routes] == ['continued', 'aborted', 'aborted', 'aborted']
+    assert pool.allowed == 1 and pool.blocked == 3
+    assert all(page.closed for page in context.pages)
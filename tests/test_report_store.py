@@ -0,0 +1,59 @@
+import json
+import os
+
+import pandas as pd
+
+from src import report_store
+from src.report_store import MANIFEST_FILE, read_store, store_file, write_store
+
+
+def report(n, growth=1.0):
+    return pd.DataFrame({
+        'District': [f"D{i % 3}" for i in range(n)],
+        'Service Category': [f"S{i}" for i in range(n)],
+        'Market Status': ["➡️ STABLE"] * n,
+        'Growth %': [growth * i for i in range(n)],
+    })
+
+
+def data_files(directory):
+    return sorted(name for name in os.listdir(directory) if name.startswith('report-'))
+
+
+def test_rows_and_aggregates_come_from_the_same_export(tmp_path):
+    directory = str(tmp_path)
+    assert store_file(directory) is None and read_store(directory) == (None, None)
+
+    write_store(report(4), directory)
+    write_store(report(7), directory)
+    df, aggs = read_store(directory)
+    assert len(df) == aggs['rows'] == 7
+    assert store_file(directory) == os.path.join(directory, MANIFEST_FILE)
+
+
+def test_reader_holding_the_previous_manifest_still_finds_its_rows(tmp_path):
+    directory = str(tmp_path)
+    write_store(report(4), directory)
+    with open(os.path.join(directory, MANIFEST_FILE), encoding='utf-8') as f:
+        old = json.load(f)
+    write_store(report(7), directory)
+    assert old['data'] in data_files(directory)
+
+    write_store(report(9), directory)
+    assert len(data_files(directory)) == 2  # Current + previous only
+    assert old['data'] not in data_files(directory)
+
+
+def test_legacy_files_are_removed(tmp_path):
+    directory = str(tmp_path)
+    for legacy in ('report.pkl', 'aggregates.json'):
+        (tmp_path / legacy).write_text("old")
+    write_store(report(2), directory)
+    assert not (tmp_path / 'report.pkl').exists() and not (tmp_path / 'aggregates.json').exists()
+
+
+def test_pickle_fallback_warns(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(report_store, '_parquet_available', lambda: False)
+    path = write_store(report(3), str(tmp_path))
+    assert path.endswith('.pkl')
+    assert "pyarrow" in capsys.readouterr().out
@@ -0,0 +1,66 @@
+import asyncio
+
+import pandas as pd
+import pytest
+
+from src.fake_trends import FakeTrendsServer
+from src.report_store import write_store
+from src.serve import ForecastService
+from src.settings import ForecasterConfig
+
+FAST = {'RATE_START': 6000.0, 'RATE_MAX': 6000.0}
+
+
+@pytest.fixture
+def trends():
+    server = FakeTrendsServer(latency=(0.05, 0.1), port=0).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def service(tmp_path, trends):
+    service = ForecastService(ForecasterConfig(work_dir=str(tmp_path / 'sweep')), client_factory=trends.client_factory,
+                              work_dir=str(tmp_path / 'serve'), overrides=FAST)
+    yield service
+    service.executor.shutdown()
+
+
+def first_cell(service):
+    return next(iter(service.districts.values())), next(iter(service.services.values()))
+
+
+def test_concurrent_requests_for_one_cell_run_one_forecast(service, trends):
+    district, service_name = first_cell(service)
+
+    async def burst():
+        return await asyncio.gather(*(service.cell(district, service_name) for _ in range(20)))
+
+    results = asyncio.run(burst())
+    assert {source for _, source in results} == {'on_demand'}
+    assert all(row is results[0][0] for row, _ in results)
+    assert service.coalescer.started == 1 and service.coalescer.joined == 19
+    assert service.metrics.counters['on_demand_forecasts'] == 1
+
+    requests = trends.requests
+    row, source = asyncio.run(service.cell(district, service_name))
+    assert source == 'on_demand' and trends.requests == requests
+
+
+def test_refreshed_cell_wins_over_the_older_export(service):
+    district, service_name = first_cell(service)
+    exported = {'District': district, 'Service Category': service_name, 'Market Status': '➡️ STABLE',
+                'Growth %': 123.0, 'Forecast Index': 1.0, 'Avg Volume': 1.0}
+    write_store(pd.DataFrame([exported]), service.store_dir)
+
+    async def run():
+        await service.reload()
+        first = await service.cell(district, service_name)
+        refreshed = await service.cell(district, service_name, refresh=True)
+        again = await service.cell(district, service_name)
+        return first, refreshed, again
+
+    (first, source), (refreshed, refreshed_source), (again, again_source) = asyncio.run(run())
+    assert source == 'export' and first['Growth %'] == 123.0
+    assert refreshed_source == again_source == 'on_demand'
+    assert again is refreshed
@@ -0,0 +1,80 @@
+import time
+
+from src.work_queue import DONE, FAILED, LEASED, MAX_ATTEMPTS, PENDING, WorkQueue
+
+LEASE = 0.05
+
+
+def queue_with(tmp_path, n=3):
+    queue = WorkQueue(str(tmp_path / 'queue.sqlite'))
+    queue.enqueue([("Ubud", f"Service {i}", f"kw {i}", 10.0) for i in range(n)])
+    return queue
+
+
+def expire():
+    time.sleep(LEASE * 2)
+
+
+def test_expired_lease_is_reclaimed_by_another_worker(tmp_path):
+    queue = queue_with(tmp_path)
+    first = queue.lease("a", limit=10, lease_seconds=LEASE)
+    assert len(first) == 3 and queue.lease("b", limit=10, lease_seconds=LEASE) == []
+
+    expire()
+    second = queue.lease("b", limit=10, lease_seconds=60)
+    assert [t.id for t in second] == [t.id for t in first]
+    assert queue.reclaimed == 3
+    assert queue.workers() == {"b": (0, 3)}
+
+
+def test_heartbeat_keeps_the_lease(tmp_path):
+    queue = queue_with(tmp_path)
+    tasks = queue.lease("a", limit=10, lease_seconds=LEASE)
+    with queue.heartbeat("a", [t.id for t in tasks], LEASE, interval=LEASE / 5) as beat:
+        expire()
+        assert queue.lease("b", limit=10, lease_seconds=60) == []
+    assert beat.beats > 0 and not beat.lost
+
+
+def test_each_task_keeps_one_result(tmp_path):
+    queue = queue_with(tmp_path)
+    tasks = queue.lease("a", limit=10, lease_seconds=LEASE)
+    expire()
+    queue.lease("b", limit=10, lease_seconds=60)
+
+    # The worker that lost its lease is rejected while "b" holds the tasks
+    assert queue.complete("a", {t.id: {"from": "a"} for t in tasks}) == 0
+    assert queue.complete("b", {t.id: {"from": "b"} for t in tasks}) == 3
+    assert queue.complete("b", {t.id: {"from": "b again"} for t in tasks}) == 0
+    assert list(queue.results()) == [{"from": "b"}] * 3
+    assert queue.counts()[DONE] == 3
+
+
+def test_late_result_of_an_expired_lease_is_accepted_once(tmp_path):
+    queue = queue_with(tmp_path, n=1)
+    tasks = queue.lease("a", limit=10, lease_seconds=LEASE)
+    expire()
+    queue.reclaim()
+    assert queue.counts()[PENDING] == 1
+    assert queue.complete("a", {tasks[0].id: {"from": "a"}}) == 1
+    assert queue.lease("b", limit=10, lease_seconds=60) == []
+    assert queue.complete("b", {tasks[0].id: {"from": "b"}}) == 0
+    assert list(queue.results()) == [{"from": "a"}]
+
+
+def test_task_that_always_crashes_its_worker_ends_failed(tmp_path):
+    queue = queue_with(tmp_path, n=1)
+    for attempt in range(MAX_ATTEMPTS):
+        assert len(queue.lease(f"w{attempt}", limit=10, lease_seconds=LEASE)) == 1
+        expire()  # Worker died without fail() / release()
+    assert queue.lease("next", limit=10, lease_seconds=60) == []
+    counts = queue.counts()
+    assert counts[FAILED] == 1 and counts[LEASED] == counts[PENDING] == 0
+
+
+def test_failed_attempts_end_failed(tmp_path):
+    queue = queue_with(tmp_path, n=1)
+    for attempt in range(MAX_ATTEMPTS):
+        tasks = queue.lease("a", limit=10, lease_seconds=60)
+        queue.fail("a", [t.id for t in tasks], "boom")
+    assert queue.counts()[FAILED] == 1